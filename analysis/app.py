@@ -1,16 +1,127 @@
+import time
+
+# time-to-first-paint is measured from the top of each script run
+_RUN_START = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
+import importlib
 import sqlite3
+import os
 from pathlib import Path
 import json
 
+import cleaning_path  # noqa: F401  (code/cleaning helpers below)
+from boundaries import bounds_view, county_feature, load_county_boundaries, map_view
+from clusters import read_cluster_hexes, read_clusters
+from competition import overlap_matrix, read_county_competition, read_provider_overlap, top_providers
+from county_scores import WEIGHT_COLUMNS, category_columns, score_counties
+from dashboard_queries import contains_mask, filter_hex, filter_providers, scope_kpis
+from build_hex_tiles import tiles_path_for
+from h3_compat import h3_parent, h3_to_lat_lon
+from hex_pyramid import CATEGORY_SEVERITY, merge_counties, pick_resolution, read_pyramid, read_pyramid_sizes
+from location_sketch import read_sketches, rollup
+from partials import read_partials, rollup_partials
+from speed_sketch import read_speed_sketches, speed_histogram, speed_quantiles
+from step_h3_points import SERVICE_CATEGORIES, UNDERSERVED_BELOW, UNSERVED_BELOW, classify_speeds
+from step_unserved_clusters import CLUSTER_LEVELS, find_clusters, hex_adjacency
+from perf_panel import finish_rerun, process_rss_mb, start_rerun, track_cache
+from shared_dataset import count_multi_values, load_shared_table, read_state_rows
+from startup_snapshot import discover_datasets, load_snapshot, snapshot_county_df
+from tile_server import TILES_DIR, TILE_PORT, start_tile_server
+
+
+class _LazyModule:
+    """Imports a module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# Plotly is only imported once a chart is drawn, after the header, filters
+# and KPI cards are already on screen.
+px = _LazyModule("plotly.express")
+go = _LazyModule("plotly.graph_objects")
+# scipy.sparse (behind the provider scenarios) only loads with the Data tab section
+provider_scenarios = _LazyModule("provider_scenarios")
+# scipy.spatial (behind the county peers) only loads once a county is selected
+county_peers = _LazyModule("county_peers")
+
 # ==================================================
 # CONFIG: locate DB relative to this file
 # ==================================================
 THIS_DIR = Path(__file__).resolve().parent      # e.g. .../analysis
 PROJECT_ROOT = THIS_DIR.parent                  # repo root
-DB_PATH = PROJECT_ROOT / "db" / "broadband_ky.db"
+DB_PATH = PROJECT_ROOT / "db" / "broadband_ky.db"     # default dataset
+
+# Service categories are ordered worst -> best (CATEGORY_SEVERITY, from the
+# pipeline); a rolled-up map cell takes the worst category among its res-8 children.
+SERVICE_COLORS = {
+    "Unserved": "red",
+    "Underserved": "orange",
+    "Served": "green",
+    "Unknown": "gray",
+}
+
+# H3 resolutions the county map may draw, finest first
+MAP_RESOLUTIONS = [8, 7, 6, 5]
+MAP_MARKER_SIZE = {8: 6, 7: 10, 6: 16, 5: 28}
+
+# largest unserved clusters listed in the Data tab
+CLUSTER_LIST_LIMIT = 25
+
+# default row budget for the hex roll-up export (finest resolution under it)
+PYRAMID_EXPORT_ROWS = 50_000
+
+# county shares (0-1) shown as percentages on the choropleth
+PCT_METRICS = [
+    "pct_unserved_hex", "pct_underserved_hex",
+    "pct_unserved_pop", "pct_underserved_pop", "pct_unserved_hu", "pct_underserved_hu",
+]
+
+# Statewide hex vector tiles (built by code/cleaning/build_hex_tiles.py,
+# served by analysis/tile_server.py). Set BROADBAND_TILE_URL to the address
+# the browser reaches the tile endpoint on when it is not this machine's
+# localhost (hosted dashboard, proxy); {store} is the tile store's name.
+TILE_URL = os.environ.get(
+    "BROADBAND_TILE_URL", f"http://localhost:{TILE_PORT}/tiles/{{store}}/{{z}}/{{x}}/{{y}}.pbf"
+)
+
+# Columns shown for a clicked/selected map point. They stay on the server:
+# the figure itself only carries coordinates and a row id per point.
+HEX_DETAIL_COLS = [
+    "h3_res8_id",
+    "county_fips",
+    "max_down",
+    "max_up",
+    "provider_count",
+    "provider_names",
+    "tech_types",
+    "service_category",
+    "distance_to_served",
+]
+ROLLUP_DETAIL_COLS = [
+    "h3_cell",
+    "hex_count",
+    "hex_unserved",
+    "hex_underserved",
+    "hex_served",
+    "hex_unknown",
+    "best_down",
+    "best_up",
+    "service_category",
+    "distance_to_served",
+    "providers",
+    "locations",
+    "population",
+]
 
 st.set_page_config(
     page_title="KY Broadband Analytics Dashboard",
@@ -73,195 +184,429 @@ footer {visibility: hidden;}
 """
 st.markdown(SAAS_CSS, unsafe_allow_html=True)
 
+# Opt-in performance panel (?perf=1 or KY_PERF_PANEL=1; see perf_panel.py).
+# When it is off the blocks below are no-ops and charts go straight out.
+perf = start_rerun(started=_RUN_START)
+
 # ==================================================
 # HELPERS
 # ==================================================
 
 
-def normalize_series(s: pd.Series) -> pd.Series:
-    """Normalize a numeric series to 0–1; return 0.5 if constant/empty."""
-    s = pd.to_numeric(s, errors="coerce")
-    if s.empty:
-        return pd.Series(0.5, index=s.index)
-    minv = s.min()
-    maxv = s.max()
-    if pd.isna(minv) or pd.isna(maxv) or maxv == minv:
-        return pd.Series(0.5, index=s.index)
-    return (s - minv) / (maxv - minv)
+def memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 1e6
+
 
+@track_cache(st.cache_data, ttl=60)
+def load_datasets():
+    """Per-state and partitioned DBs in db/ (see code/cleaning/run_pipeline.py)."""
+    return discover_datasets(DB_PATH.parent)
 
-@st.cache_data(show_spinner="Loading broadband database…")
-def load_db():
-    conn = sqlite3.connect(str(DB_PATH))
 
-    county_df = pd.read_sql("SELECT * FROM county_summary", conn)
-    provider_df = pd.read_sql("SELECT * FROM provider_summary_by_county", conn)
-    hex_df = pd.read_sql("SELECT * FROM hex_coverage", conn)
+@track_cache(st.cache_data, show_spinner="Loading broadband database…")
+def load_startup_snapshot(db_path: str, state_filter=None):
+    """
+    Prebuilt county table, filter lists and statewide KPIs (see
+    startup_snapshot.py). Enough to paint the first screen without touching
+    the hex table.
+    """
+    return load_snapshot(Path(db_path), state_filter)
 
+
+@track_cache(st.cache_resource, show_spinner="Attaching shared hex table…")
+def load_hex_table(db_path: str, state_filter=None):
+    """
+    Hex table memory-mapped from an Arrow file next to the DB.
+
+    cache_resource hands every session the same read-only frame (no
+    per-call copy), and the mapping itself is shared by all worker processes.
+    Only loaded once a view actually needs hex rows.
+    """
+    return load_shared_table(Path(db_path), "hex_coverage", state_filter)
+
+
+@track_cache(st.cache_resource)
+def load_hex_county_index(db_path: str, state_filter=None) -> dict:
+    """
+    Arrays mapping hex table rows to county roll-ups: for every (hex,
+    county) share, the hex's row position, the county's position in
+    `counties` and the weight. Uses the hex_county area shares when the DB
+    has them, otherwise each hex counts once for its own county.
+    """
+    hex_df = load_hex_table(db_path, state_filter)
+    conn = sqlite3.connect(db_path)
+    shares = None
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hex_county'"
+    ).fetchone():
+        shares = read_state_rows(conn, "hex_county", state_fips=state_filter)
     conn.close()
 
-    # standardize county_fips to 5-char strings
-    for df in (county_df, provider_df, hex_df):
-        if "county_fips" in df.columns:
-            df["county_fips"] = df["county_fips"].astype(str).str.zfill(5)
+    if shares is None or shares.empty:
+        pos = np.arange(len(hex_df))
+        fips = hex_df["county_fips"].astype(str).to_numpy()
+        weight = np.ones(len(hex_df))
+    else:
+        pos = pd.Index(hex_df["h3_res8_id"].astype(str)).get_indexer(shares["h3_res8_id"])
+        keep = pos >= 0
+        pos = pos[keep]
+        fips = shares["county_fips"].astype(str).str.zfill(5).to_numpy()[keep]
+        weight = shares["weight"].to_numpy(dtype=float)[keep]
+    counties, county_pos = np.unique(fips, return_inverse=True)
+    return {"pos": pos, "county": county_pos, "weight": weight, "counties": counties}
+
+
+@track_cache(st.cache_resource)
+def load_hex_weights(db_path: str, state_filter=None) -> dict:
+    """
+    Hex population / housing units as float arrays aligned with the hex
+    table (0 where unknown), or {} when the DB has no population columns.
+    """
+    hex_df = load_hex_table(db_path, state_filter)
+    return {
+        col: np.nan_to_num(
+            pd.to_numeric(hex_df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        )
+        for col in WEIGHT_COLUMNS.values()
+        if col in hex_df.columns
+    }
+
+
+@track_cache(st.cache_resource, show_spinner="Attaching shared provider table…")
+def load_provider_table(db_path: str, state_filter=None):
+    return load_shared_table(Path(db_path), "provider_summary_by_county", state_filter)
+
+
+@track_cache(st.cache_data)
+def load_provider_sketches(db_path: str, state_filter=None):
+    """Provider x county distinct-location sketches (None if the DB has none)."""
+    return read_sketches(db_path, "provider", state_filter)
+
+
+@track_cache(st.cache_data)
+def load_speed_sketches(db_path: str, state_filter=None, level: str = "county"):
+    """County or provider x county speed histograms (None if the DB has none)."""
+    return read_speed_sketches(db_path, level, state_filter)
+
+
+@track_cache(st.cache_data)
+def load_partials(db_path: str, state_filter=None):
+    """County x provider x tech x service-flag speed partials (None if the DB has none)."""
+    return read_partials(db_path, state_filter)
 
-    return county_df, provider_df, hex_df
 
+@track_cache(st.cache_data)
+def load_provider_overlap(db_path: str, state_filter=None, county_fips=None):
+    """Provider pair overlaps statewide, or in one county (None if the DB has none)."""
+    if county_fips is None:
+        return read_provider_overlap(db_path, "state", state_filter)
+    return read_provider_overlap(db_path, "county", county_fips)
 
-@st.cache_data
-def load_ky_county_geojson():
+
+@track_cache(st.cache_data)
+def load_county_competition(db_path: str, state_filter=None):
+    """Hexes per county by number of providers at 100/20 (None if the DB has none)."""
+    return read_county_competition(db_path, state_filter)
+
+
+@track_cache(st.cache_data)
+def load_has_hex_provider(db_path: str) -> bool:
+    return provider_scenarios.has_hex_provider(db_path)
+
+
+@track_cache(st.cache_resource)
+def load_provider_matrix(db_path: str, state_filter=None):
+    """Sparse hex x provider speed matrices aligned with the hex table (None if the DB has none)."""
+    hex_provider = provider_scenarios.read_hex_provider(db_path, state_filter)
+    if hex_provider is None:
+        return None
+    return provider_scenarios.provider_matrix(load_hex_table(db_path, state_filter)["h3_res8_id"], hex_provider)
+
+
+@track_cache(st.cache_data)
+def load_clusters(db_path: str, state_filter=None, level: str = "unserved", county_fips=None, order_by="hexes"):
+    """Stored unserved clusters of one level, largest first (None if the DB has none)."""
+    return read_clusters(db_path, level, state_filter, county_fips, limit=CLUSTER_LIST_LIMIT, order_by=order_by)
+
+
+@track_cache(st.cache_data)
+def load_cluster_hexes(db_path: str, cluster_id: str, level: str) -> pd.DataFrame:
+    """Hexes of one stored cluster, read from the DB so the map doesn't need the hex table."""
+    return read_cluster_hexes(db_path, cluster_id, level)
+
+
+@track_cache(st.cache_data)
+def load_pyramid(db_path: str, state_filter=None, resolution: int = 7, county_fips=None):
+    """Precomputed res 7/6/5 cells of one county, or of the state merged over counties (None if the DB has none)."""
+    cells = read_pyramid(db_path, resolution, state_filter, county_fips)
+    if cells is None or county_fips is not None:
+        return cells
+    return merge_counties(cells)
+
+
+@track_cache(st.cache_data)
+def load_pyramid_sizes(db_path: str, state_filter=None, county_fips=None):
+    """{resolution: cells} of the precomputed pyramid in scope (None if the DB has none)."""
+    return read_pyramid_sizes(db_path, state_filter, county_fips)
+
+
+@track_cache(st.cache_resource)
+def load_peer_index(db_path: str, state_filter, weights: tuple, thresholds: tuple, _county_df):
+    """
+    Nearest-neighbor index over the county features for one weight
+    configuration ((feature, weight) pairs). _county_df is the county table
+    under `thresholds`, so the key pins it down without hashing the frame.
     """
-    Load Kentucky county boundaries GeoJSON.
+    return county_peers.build_peer_index(_county_df, dict(weights))
+
+
+@track_cache(st.cache_resource, show_spinner="Building hex adjacency…")
+def load_hex_adjacency(db_path: str, state_filter=None):
+    """Neighboring hex pairs (row positions in the hex table), for re-clustering under a what-if."""
+    return hex_adjacency(load_hex_table(db_path, state_filter)["h3_res8_id"].astype(str))
 
-    Expected path: project_root/data/ky_counties.geojson
+
+@track_cache(st.cache_data, show_spinner="Re-clustering unserved hexes…")
+def scenario_clusters(db_path: str, state_filter, state_fips: str, level: str, thresholds: tuple):
+    """(cluster id per hex row, cluster table) under what-if thresholds."""
+    hex_df = load_hex_table(db_path, state_filter)
+    categories = classify_speeds(hex_df["max_down"], hex_df["max_up"], *thresholds)
+    in_set = np.asarray(categories.isin(CLUSTER_LEVELS[level][0]))
+    return find_clusters(hex_df, in_set, load_hex_adjacency(db_path, state_filter), level, state_fips)
+
+
+@st.cache_resource
+def _process_state():
+    # survives reruns: the first script run in this process is the cold start
+    return {"painted": False}
+
+
+@track_cache(st.cache_data)
+def load_state_county_geojson(state_fips: str, zoom: float):
+    """
+    Load one state's county boundaries GeoJSON.
+
+    Uses the level of detail for the map's rendered `zoom` from data/boundaries/<fips>/
+    (see code/cleaning/build_county_lod.py), falling back to the
+    full-precision project_root/data/ky_counties.geojson for Kentucky.
     Expected property: properties.GEOID = 5-digit county FIPS
     """
+    geojson = load_county_boundaries(state_fips, zoom)
+    if geojson is not None:
+        return geojson
+
     gj_path = PROJECT_ROOT / "data" / "ky_counties.geojson"
-    if not gj_path.exists():
+    if state_fips != "21" or not gj_path.exists():
         return None
 
     with open(gj_path, "r") as f:
         return json.load(f)
 
 
-def enrich_county_with_hex(county_df: pd.DataFrame, hex_df: pd.DataFrame) -> pd.DataFrame:
-    """Attach hex service-category counts and scores to county_df."""
-    # hex counts per county by service_category
-    svc_counts = (
-        hex_df.groupby(["county_fips", "service_category"])
-        .size()
-        .unstack(fill_value=0)
-    )
+@track_cache(st.cache_data)
+def load_state_map(state_fips: str):
+    """
+    (geojson, center, zoom) for the statewide map: the view is framed on the
+    coarsest level, then the level for that zoom is loaded (small states
+    zoom in past the coarse level's range). None without boundaries.
+    """
+    coarse = load_state_county_geojson(state_fips, 0.0)
+    if coarse is None:
+        return None
+    center, zoom = map_view(coarse)
+    return load_state_county_geojson(state_fips, zoom), center, zoom
 
-    # Ensure consistent columns
-    for col in ["Unserved", "Underserved", "Served", "Unknown"]:
-        if col not in svc_counts.columns:
-            svc_counts[col] = 0
-
-    svc_counts = svc_counts.reset_index().rename(
-        columns={
-            "Unserved": "hex_unserved",
-            "Underserved": "hex_underserved",
-            "Served": "hex_served",
-            "Unknown": "hex_unknown",
-        }
-    )
-    svc_counts["hex_total"] = (
-        svc_counts["hex_unserved"]
-        + svc_counts["hex_underserved"]
-        + svc_counts["hex_served"]
-        + svc_counts["hex_unknown"]
-    )
-    svc_counts["pct_unserved_hex"] = svc_counts["hex_unserved"] / svc_counts["hex_total"].replace(
-        {0: pd.NA}
-    )
-    svc_counts["pct_underserved_hex"] = svc_counts["hex_underserved"] / svc_counts[
-        "hex_total"
-    ].replace({0: pd.NA})
 
-    df = county_df.merge(svc_counts, on="county_fips", how="left")
+@track_cache(st.cache_data)
+def load_county_outline(state_fips: str, county_fips: str):
+    """(outline geojson, center, zoom) framing one county, at the level for that zoom; or None."""
+    coarse = load_state_county_geojson(state_fips, 0.0)
+    county = county_feature(coarse, county_fips) if coarse is not None else None
+    if county is None:
+        return None
+    center, zoom = map_view(county)
+    return county_feature(load_state_county_geojson(state_fips, zoom), county_fips), center, zoom
 
-    # Fill NaNs where appropriate
-    for col in [
-        "hex_unserved",
-        "hex_underserved",
-        "hex_served",
-        "hex_unknown",
-        "hex_total",
-    ]:
-        if col in df.columns:
-            df[col] = df[col].fillna(0)
-
-    for col in ["pct_unserved_hex", "pct_underserved_hex"]:
-        if col in df.columns:
-            df[col] = df[col].fillna(0.0)
-
-    # --------------------------------------------------
-    # Compute Broadband Quality Score
-    # --------------------------------------------------
-    unserved_rate = df["pct_unserved_hex"].clip(0, 1)
-    underserved_rate = df["pct_underserved_hex"].clip(0, 1)
-    down_norm = normalize_series(df.get("county_avg_down", 0))
-    prov_norm = normalize_series(df.get("provider_count", 0))
-
-    # Higher is better: lower un/underserved, higher down speed, more providers
-    df["broadband_quality_score"] = 100 * (
-        (1 - unserved_rate) * 0.4
-        + (1 - underserved_rate) * 0.2
-        + down_norm * 0.25
-        + prov_norm * 0.15
-    )
 
-    # --------------------------------------------------
-    # Compute Digital Readiness Index
-    # --------------------------------------------------
-    edu_low = (
-        pd.to_numeric(df.get("Less_Than_9th_grade", 0), errors="coerce").fillna(0)
-        + pd.to_numeric(df.get("Less_Than_HighSchool", 0), errors="coerce").fillna(0)
-    )
-    edu_high = pd.to_numeric(df.get("Atleast_Bachelors", 0), errors="coerce").fillna(0)
-    edu_total = edu_low + edu_high
-    edu_high_share = edu_high / edu_total.replace({0: pd.NA})
-    edu_high_share = edu_high_share.fillna(0)
-
-    population = pd.to_numeric(df.get("Population", 0), errors="coerce").fillna(0)
-    desktop = pd.to_numeric(df.get("desktop_laptop_estimate", 0), errors="coerce").fillna(0)
-    smartphone = pd.to_numeric(df.get("smartphone_estimate", 0), errors="coerce").fillna(0)
-    devices_per_person = (desktop + smartphone) / population.replace({0: pd.NA})
-    devices_per_person = devices_per_person.fillna(0)
-
-    income = pd.to_numeric(
-        df.get("Median_Household_Income", 0), errors="coerce"
-    ).fillna(0)
-    poverty = pd.to_numeric(df.get("total_est_poverty", 0), errors="coerce").fillna(0)
-    poverty_rate = poverty / population.replace({0: pd.NA})
-    poverty_rate = poverty_rate.fillna(0)
-    poverty_comfort = 1 - poverty_rate  # higher is better
-
-    edu_norm = normalize_series(edu_high_share)
-    device_norm = normalize_series(devices_per_person)
-    income_norm = normalize_series(income)
-    poverty_norm = normalize_series(poverty_comfort)
-
-    df["digital_readiness_index"] = 100 * (
-
-        + device_norm * 0.50
-        + income_norm * 0.50
+def _parent_cells(cells: pd.Series, res: int) -> pd.Series:
+    """Map H3 cells to their parents at `res` (one h3 call per distinct cell)."""
+    lookup = {h: h3_parent(h, res) for h in cells.unique()}
+    return cells.map(lookup)
+
 
+def rollup_hex_points(hex_points: pd.DataFrame, max_points: int, resolution=None):
+    """
+    Roll res-8 hex points up to coarser H3 parents for the map.
+
+    With resolution=None the finest resolution in MAP_RESOLUTIONS that fits in
+    `max_points` cells is used (res 5 is the floor). Every input hex is counted
+    in exactly one output cell, and each cell is colored by its worst service
+    category, so no unserved area is dropped from the map.
+
+    Returns (map_df, resolution).
+    """
+    cells = hex_points["h3_res8_id"]
+    if resolution is None:
+        resolution = MAP_RESOLUTIONS[0]
+        for res in MAP_RESOLUTIONS[1:]:
+            if cells.nunique() <= max_points:
+                break
+            cells = _parent_cells(cells, res)
+            resolution = res
+    elif resolution != MAP_RESOLUTIONS[0]:
+        cells = _parent_cells(cells, resolution)
+
+    if resolution == MAP_RESOLUTIONS[0]:
+        map_df = hex_points.copy()
+        map_df["hex_count"] = 1
+        return map_df, resolution
+
+    counts = (
+        pd.crosstab(cells.values, hex_points["service_category"].values)
+        .reindex(columns=CATEGORY_SEVERITY, fill_value=0)
+    )
+    map_df = counts.add_prefix("hex_").rename(columns=str.lower)
+    map_df["hex_count"] = counts.sum(axis=1)
+    # first non-zero column in severity order = worst category present
+    map_df["service_category"] = counts.gt(0).idxmax(axis=1)
+
+    speeds = (
+        hex_points.groupby(cells.values)[["max_down", "max_up"]]
+        .max()
+        .rename(columns={"max_down": "best_down", "max_up": "best_up"})
     )
+    map_df = map_df.join(speeds)
+    if "distance_to_served" in hex_points.columns:
+        # farthest hex inside the cell, like the worst category
+        dist = pd.to_numeric(hex_points["distance_to_served"], errors="coerce")
+        map_df = map_df.join(dist.groupby(cells.values).max())
 
-    return df
+    centers = [h3_to_lat_lon(h) for h in map_df.index]
+    map_df["lat"] = [c[0] for c in centers]
+    map_df["lon"] = [c[1] for c in centers]
 
+    map_df.index.name = "h3_cell"
+    return map_df.reset_index(), resolution
 
-# ==================================================
-# LOAD DATA
-# ==================================================
 
-county_df_raw, provider_df, hex_df = load_db()
-county_df = enrich_county_with_hex(county_df_raw, hex_df)
-ky_geojson = load_ky_county_geojson()
+def hex_map_figure(map_df: pd.DataFrame, map_res: int, color_by: str = "service_category") -> "go.Figure":
+    """
+    Build a compact scatter-mapbox figure for hex points.
 
-# Pre-calc lists for filters
-service_categories = sorted(hex_df["service_category"].dropna().unique().tolist())
-all_providers = sorted(provider_df["provider_name"].dropna().unique().tolist())
-
-# Extract tech types list
-tech_values = set()
-for val in hex_df["tech_types"].dropna().unique():
-    for t in str(val).split(";"):
-        t = t.strip()
-        if t:
-            tech_values.add(t)
-all_tech_types = sorted(tech_values)
+    One trace per service category (the trace is the category code), with
+    float32 lat/lon and an int32 row id as customdata. Plotly serializes numpy
+    arrays as typed binary arrays, so the payload holds no per-point strings;
+    details for a point are looked up from `map_df` on the server.
 
-# County labels
-county_options = (
-    county_df[["county_fips", "county_name"]]
-    .drop_duplicates()
-    .sort_values("county_name")
-)
-county_options["label"] = (
-    county_options["county_name"] + " (" + county_options["county_fips"] + ")"
+    color_by="distance_to_served" draws one trace colored by the ring
+    distance to the nearest served hex instead.
+    """
+    lat = map_df["lat"].to_numpy(dtype=np.float32)
+    lon = map_df["lon"].to_numpy(dtype=np.float32)
+    row_ids = np.arange(len(map_df), dtype=np.int32)
+    categories = map_df["service_category"].astype(object).fillna("Unknown").to_numpy()
+
+    fig = go.Figure()
+    if color_by == "distance_to_served":
+        dist = pd.to_numeric(map_df["distance_to_served"], errors="coerce").to_numpy(
+            dtype=np.float32, na_value=np.nan
+        )
+        fig.add_trace(
+            go.Scattermapbox(
+                lat=lat,
+                lon=lon,
+                customdata=row_ids,
+                mode="markers",
+                name="Distance to served",
+                marker={
+                    "size": MAP_MARKER_SIZE[map_res],
+                    "color": dist,
+                    "colorscale": "YlOrRd",
+                    "cmin": 0,
+                    "colorbar": {"title": "Rings to<br>served hex"},
+                },
+                hovertemplate="%{marker.color} rings to served<extra></extra>",
+            )
+        )
+    for cat in CATEGORY_SEVERITY if color_by == "service_category" else []:
+        mask = categories == cat
+        if not mask.any():
+            continue
+        fig.add_trace(
+            go.Scattermapbox(
+                lat=lat[mask],
+                lon=lon[mask],
+                customdata=row_ids[mask],
+                mode="markers",
+                name=cat,
+                marker={"size": MAP_MARKER_SIZE[map_res], "color": SERVICE_COLORS[cat]},
+                hovertemplate=f"{cat}<extra></extra>",
+            )
+        )
+
+    fig.update_layout(
+        mapbox_style="open-street-map",
+        mapbox_center={"lat": float(lat.mean()), "lon": float(lon.mean())},
+        mapbox_zoom=8,
+        height=650,
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        legend_title_text="service_category",
+    )
+    return fig
+
+
+def selected_map_rows(event, map_df: pd.DataFrame) -> pd.DataFrame:
+    """Return the map_df rows for points clicked/selected in a hex map figure."""
+    if event is None:
+        return map_df.iloc[0:0]
+    points = event.get("selection", {}).get("points", [])
+    row_ids = []
+    for pt in points:
+        cd = pt.get("customdata")
+        if isinstance(cd, list):
+            cd = cd[0] if cd else None
+        if cd is not None:
+            row_ids.append(int(cd))
+    return map_df.iloc[sorted(set(row_ids))]
+
+
+@st.cache_resource
+def ensure_tile_server():
+    """Start the hex tile endpoint over db/ once per process."""
+    try:
+        return start_tile_server(TILES_DIR)
+    except OSError:
+        # port already bound, e.g. by another dashboard worker
+        return "external"
+
+
+def hex_tile_layers(tile_url: str) -> list:
+    """Mapbox layers drawing the statewide hex tiles, one per service category."""
+    return [
+        {
+            "sourcetype": "vector",
+            "source": [tile_url],
+            "sourcelayer": f"hex_{cat.lower()}",
+            "type": "fill",
+            "color": SERVICE_COLORS[cat],
+            "opacity": 0.65,
+        }
+        for cat in CATEGORY_SEVERITY
+    ]
+
+
+# ==================================================
+# DATASETS (one per state)
+# ==================================================
+datasets = load_datasets()
+if not datasets:
+    st.error(
+        "No broadband database found in `db/`. Build one with "
+        "`python code/cleaning/run_pipeline.py --states KY`."
+    )
+    st.stop()
+default_dataset = next(
+    (i for i, d in enumerate(datasets) if d["db_path"] == DB_PATH), 0
 )
 
 # ==================================================
@@ -273,19 +618,57 @@ c1, c2, c3 = st.columns([0.8, 5, 2])
 with c1:
     st.write("📶")
 
+with c3:
+    # state selector (only when more than one state has been built)
+    if len(datasets) > 1:
+        dataset_labels = [d["label"] for d in datasets]
+        dataset_choice = st.selectbox("State", dataset_labels, index=default_dataset)
+        dataset = datasets[dataset_labels.index(dataset_choice)]
+    else:
+        dataset = datasets[0]
+    st.caption("MSIS 695 – Capstone Project")
+    st.caption(f"Data Store: SQLite · `{dataset['db_path'].name}`")
+
+STATE_FIPS = dataset["state_fips"]
+STATE_NAME = dataset["state_name"]
+ALL_STATE = f"All {STATE_NAME}"
+# cache key for every per-state table loader
+DATA_KEY = (str(dataset["db_path"]), dataset["state_filter"])
+# this dataset's hex vector tiles (written next to the DB by run_pipeline.py)
+TILES_PATH = tiles_path_for(dataset["db_path"], dataset["state_filter"])
+
 with c2:
-    st.markdown("### Kentucky Broadband Analytics Dashboard")
+    st.markdown(f"### {STATE_NAME} Broadband Analytics Dashboard")
     st.markdown(
         "Statewide and county-level analytics built from **FCC BDC**, "
         "**Census ACS**, and **H3 spatial aggregation**."
     )
 
-with c3:
-    st.caption("MSIS 695 – Capstone Project")
-    st.caption("Data Store: SQLite · `broadband_ky.db`")
-
 st.markdown("</div>", unsafe_allow_html=True)
 
+# ==================================================
+# LOAD DATA
+# ==================================================
+
+with perf.block("load snapshot"):
+    snapshot = load_startup_snapshot(*DATA_KEY)
+    county_df = snapshot_county_df(snapshot)
+
+# Pre-calc lists for filters
+service_categories = snapshot["service_categories"]
+all_providers = snapshot["all_providers"]
+all_tech_types = snapshot["all_tech_types"]
+
+# County labels
+county_options = (
+    county_df[["county_fips", "county_name"]]
+    .drop_duplicates()
+    .sort_values("county_name")
+)
+county_options["label"] = (
+    county_options["county_name"] + " (" + county_options["county_fips"] + ")"
+)
+
 # ==================================================
 # TOP FILTER BAR
 # ==================================================
@@ -293,12 +676,12 @@ fb1, fb2, fb3, fb4 = st.columns([1.7, 1.3, 1.6, 1.6])
 
 # County filter
 with fb1:
-    county_labels = ["All Kentucky"] + county_options["label"].tolist()
+    county_labels = [ALL_STATE] + county_options["label"].tolist()
     county_choice = st.selectbox("County", county_labels, index=0)
 
-    if county_choice == "All Kentucky":
+    if county_choice == ALL_STATE:
         selected_fips = None
-        selected_county_name = "All Kentucky"
+        selected_county_name = ALL_STATE
     else:
         row = county_options[county_options["label"] == county_choice].iloc[0]
         selected_fips = row["county_fips"]
@@ -319,6 +702,104 @@ with fb4:
     tech_choices = ["All technologies"] + all_tech_types
     tech_choice = st.selectbox("Tech type", tech_choices, index=0)
 
+# Threshold what-if: reclassify every hex from its best speeds
+with st.expander("🎚 Threshold what-if (reclassify hexes live)", expanded=False):
+    t1, t2, t3, t4 = st.columns(4)
+    unserved_below = (
+        t1.number_input("Unserved below: down (Mbps)", 0, 100000, UNSERVED_BELOW[0], key="wi_unserved_down"),
+        t2.number_input("Unserved below: up (Mbps)", 0, 100000, UNSERVED_BELOW[1], key="wi_unserved_up"),
+    )
+    underserved_below = (
+        t3.number_input("Underserved below: down (Mbps)", 0, 100000, UNDERSERVED_BELOW[0], key="wi_underserved_down"),
+        t4.number_input("Underserved below: up (Mbps)", 0, 100000, UNDERSERVED_BELOW[1], key="wi_underserved_up"),
+    )
+    st.caption(
+        "A hex is Unserved if its best download or upload is below the first pair, "
+        "Underserved if below the second. KPI cards, county scores, maps and the hex "
+        "views are recomputed from the hex speeds; the defaults are the FCC 25/3 and 100/20 rules."
+    )
+what_if = (unserved_below, underserved_below) != (UNSERVED_BELOW, UNDERSERVED_BELOW)
+
+# Coverage counted in hex cells, or in people / housing units apportioned
+# from census blocks (DBs built with step_hex_population)
+weight_choices = {"Hex cells": "hex"}
+if "pop_total" in snapshot["state_kpis"]:
+    weight_choices.update({"People": "pop", "Housing units": "hu"})
+weight_label = "Hex cells"
+if len(weight_choices) > 1:
+    weight_label = st.radio("Count coverage by", list(weight_choices), horizontal=True, key="kpi_weight")
+weight_prefix = weight_choices[weight_label]
+weight_noun = weight_label.lower()
+
+perf.context = {
+    "state": STATE_FIPS,
+    "county": selected_fips or "All",
+    "service": svc_choice,
+    "provider": provider_choice,
+    "tech": tech_choice,
+    "thresholds": f"{unserved_below[0]}/{unserved_below[1]}, {underserved_below[0]}/{underserved_below[1]}",
+    "weight": weight_prefix,
+}
+
+def county_category_counts(codes: np.ndarray, hex_weight: np.ndarray = None) -> pd.DataFrame:
+    """
+    Area-share weighted hex counts per county (index) by category (columns)
+    in one bincount; with hex_weight (e.g. hex population) the sums of it.
+    """
+    idx = load_hex_county_index(*DATA_KEY)
+    n_cat = len(SERVICE_CATEGORIES)
+    weights = idx["weight"] if hex_weight is None else idx["weight"] * hex_weight[idx["pos"]]
+    counts = np.bincount(
+        idx["county"] * n_cat + codes[idx["pos"]],
+        weights=weights,
+        minlength=len(idx["counties"]) * n_cat,
+    ).reshape(-1, n_cat)
+    return pd.DataFrame(counts, index=pd.Index(idx["counties"], name="county_fips"), columns=SERVICE_CATEGORIES)
+
+
+scenario_categories = None
+if what_if:
+    with perf.block("what-if reclassify"):
+        base_hex = load_hex_table(*DATA_KEY)
+        scenario_categories = classify_speeds(
+            base_hex["max_down"], base_hex["max_up"], unserved_below, underserved_below
+        )
+        codes = scenario_categories.codes.astype(np.int64)
+        county_df = score_counties(county_df, county_category_counts(codes))
+
+        state_counts = np.bincount(codes, minlength=len(SERVICE_CATEGORIES))
+        scenario_state_kpis = {
+            "hex_unserved": int(state_counts[0]),
+            "hex_underserved": int(state_counts[1]),
+            "hex_served": int(state_counts[2]),
+            "hex_total": int(len(codes)),
+        }
+
+        hex_weights = load_hex_weights(*DATA_KEY)
+        for prefix, col in WEIGHT_COLUMNS.items():
+            if col not in hex_weights:
+                continue
+            weighted = category_columns(county_category_counts(codes, hex_weights[col]), prefix)
+            county_df = county_df.drop(columns=weighted.columns, errors="ignore").merge(
+                weighted, left_on="county_fips", right_index=True, how="left"
+            )
+            state_counts = np.bincount(codes, weights=hex_weights[col], minlength=len(SERVICE_CATEGORIES))
+            scenario_state_kpis.update({
+                f"{prefix}_unserved": float(state_counts[0]),
+                f"{prefix}_underserved": float(state_counts[1]),
+                f"{prefix}_served": float(state_counts[2]),
+                f"{prefix}_total": float(state_counts.sum()),
+            })
+
+
+def hex_table() -> pd.DataFrame:
+    """The shared hex table, with reclassified categories while a what-if is active."""
+    hex_df = load_hex_table(*DATA_KEY)
+    if scenario_categories is not None:
+        hex_df = hex_df.assign(service_category=scenario_categories)
+    return hex_df
+
+
 # ==================================================
 # FILTERED DATASETS
 # ==================================================
@@ -328,92 +809,72 @@ if selected_fips is None:
 else:
     scope_counties_df = county_df[county_df["county_fips"] == selected_fips].copy()
 
-# Hex subset (for tech, map, service stats)
-hex_filtered = hex_df.copy()
-if selected_fips is not None:
-    hex_filtered = hex_filtered[hex_filtered["county_fips"] == selected_fips]
+# Hex subset (for tech, map, service stats). The hex and provider tables are
+# only attached when a view below actually asks for their rows.
+def hex_filtered_rows() -> pd.DataFrame:
+    with perf.block("filter hex"):
+        return filter_hex(
+            hex_table(), selected_fips, svc_choice, provider_choice, tech_choice
+        )
 
-if svc_choice != "All":
-    hex_filtered = hex_filtered[hex_filtered["service_category"] == svc_choice]
-
-if provider_choice != "All providers":
-    hex_filtered = hex_filtered[
-        hex_filtered["provider_names"].str.contains(provider_choice, na=False)
-    ]
-
-if tech_choice != "All technologies":
-    hex_filtered = hex_filtered[
-        hex_filtered["tech_types"].fillna("").str.contains(tech_choice, na=False)
-    ]
 
 # Provider subset for charts
-prov_filtered = provider_df.copy()
-if selected_fips is not None:
-    prov_filtered = prov_filtered[prov_filtered["county_fips"] == selected_fips]
-if provider_choice != "All providers":
-    prov_filtered = prov_filtered[prov_filtered["provider_name"] == provider_choice]
+def provider_filtered_rows() -> pd.DataFrame:
+    with perf.block("filter providers"):
+        return filter_providers(load_provider_table(*DATA_KEY), selected_fips, provider_choice)
+
+
+# Speed histograms for the county/provider scope (None if the DB has none)
+def speed_scope_rows():
+    if provider_choice == "All providers":
+        rows = load_speed_sketches(*DATA_KEY, "county")
+        if rows is None or selected_fips is None:
+            return rows
+        return rows[rows["county_fips"] == selected_fips]
+    rows = load_speed_sketches(*DATA_KEY, "provider")
+    if rows is None:
+        return None
+    pairs = provider_filtered_rows()[["county_fips", "provider_id"]].astype(str)
+    return rows.merge(pairs.drop_duplicates(), on=["county_fips", "provider_id"])
 
-# For KPI service totals we want **only county filter**, not service/provider/tech filters
-if selected_fips is None:
-    hex_for_kpi = hex_df.copy()
-else:
-    hex_for_kpi = hex_df[hex_df["county_fips"] == selected_fips]
 
 # ==================================================
 # HIGH-LEVEL KPIs
 # ==================================================
-# Demographic aggregates
-pop_total = pd.to_numeric(scope_counties_df["Population"], errors="coerce").sum()
-poverty_total = pd.to_numeric(
-    scope_counties_df["total_est_poverty"], errors="coerce"
-).sum()
-area_total = pd.to_numeric(scope_counties_df["area_sq_mi"], errors="coerce").sum()
-desktop_total = pd.to_numeric(
-    scope_counties_df["desktop_laptop_estimate"], errors="coerce"
-).sum()
-smart_total = pd.to_numeric(
-    scope_counties_df["smartphone_estimate"], errors="coerce"
-).sum()
-
-if pop_total > 0:
-    poverty_rate_scope = poverty_total / pop_total
-else:
-    poverty_rate_scope = 0.0
-
-# Statewide/service KPIs
-unserved_total = (hex_for_kpi["service_category"] == "Unserved").sum()
-underserved_total = (hex_for_kpi["service_category"] == "Underserved").sum()
-served_total = (hex_for_kpi["service_category"] == "Served").sum()
-hex_total_scope = len(hex_for_kpi)
-
-# Scores
+# Demographic aggregates and scores
+with perf.block("scope KPIs"):
+    kpis = scope_kpis(scope_counties_df)
+pop_total = kpis["pop_total"]
+poverty_rate_scope = kpis["poverty_rate"]
+area_total = kpis["area_total"]
+desktop_total = kpis["desktop_total"]
+smart_total = kpis["smart_total"]
+bqs = kpis["bqs"]
+dri = kpis["dri"]
+
+# Statewide/service KPIs: only the county filter applies, not the
+# service/provider/tech filters, so they come straight from the snapshot
+# (statewide) or the county's precomputed hex counts.
 if selected_fips is None:
-    # population-weighted average across counties
-    w = pd.to_numeric(scope_counties_df["Population"], errors="coerce").fillna(0)
-    bqs = (
-        (scope_counties_df["broadband_quality_score"] * w).sum()
-        / w.replace({0: pd.NA}).sum()
-    )
-    dri = (
-        (scope_counties_df["digital_readiness_index"] * w).sum()
-        / w.replace({0: pd.NA}).sum()
-    )
+    kpi_counts = scenario_state_kpis if what_if else snapshot["state_kpis"]
 else:
-    row = scope_counties_df.iloc[0]
-    bqs = float(row["broadband_quality_score"])
-    dri = float(row["digital_readiness_index"])
+    kpi_counts = scope_counties_df.iloc[0]
+unserved_total = kpi_counts[f"{weight_prefix}_unserved"]
+underserved_total = kpi_counts[f"{weight_prefix}_underserved"]
+served_total = kpi_counts[f"{weight_prefix}_served"]
+hex_total_scope = kpi_counts["hex_total"]
 
 # ==================================================
 # TABS
 # ==================================================
 tab_overview, tab_explorer, tab_data = st.tabs(
-    ["📌 Kentucky Overview", "🗺 County Explorer", "📄 Data & Rankings"]
+    [f"📌 {STATE_NAME} Overview", "🗺 County Explorer", "📄 Data & Rankings"]
 )
 
 # --------------------------------------------------
 # TAB 1 – KENTUCKY OVERVIEW
 # --------------------------------------------------
-with tab_overview:
+with tab_overview, perf.block("tab: overview"):
     st.markdown(
         f"#### Overview – **{selected_county_name}**"
         + ("" if svc_choice == "All" else f" · Service: **{svc_choice}**")
@@ -433,28 +894,28 @@ with tab_overview:
     with k2:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.markdown(
-            '<div class="small-label">Unserved hex cells (red)</div>',
+            f'<div class="small-label">Unserved {weight_noun} (red)</div>',
             unsafe_allow_html=True,
         )
-        st.metric("", f"{int(unserved_total):,}")
+        st.metric("", f"{unserved_total:,.0f}")
         st.markdown("</div>", unsafe_allow_html=True)
 
     with k3:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.markdown(
-            '<div class="small-label">Underserved hex cells (yellow)</div>',
+            f'<div class="small-label">Underserved {weight_noun} (yellow)</div>',
             unsafe_allow_html=True,
         )
-        st.metric("", f"{int(underserved_total):,}")
+        st.metric("", f"{underserved_total:,.0f}")
         st.markdown("</div>", unsafe_allow_html=True)
 
     with k4:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.markdown(
-            '<div class="small-label">Served hex cells (green)</div>',
+            f'<div class="small-label">Served {weight_noun} (green)</div>',
             unsafe_allow_html=True,
         )
-        st.metric("", f"{int(served_total):,}")
+        st.metric("", f"{served_total:,.0f}")
         st.markdown("</div>", unsafe_allow_html=True)
 
     st.write("")
@@ -488,6 +949,15 @@ with tab_overview:
         st.metric("", f"{poverty_rate_scope*100:0.1f}%")
         st.markdown("</div>", unsafe_allow_html=True)
 
+    # header, filters and KPI cards are on screen
+    process_state = _process_state()
+    print(
+        f"[startup] time to first paint "
+        f"{(time.perf_counter() - _RUN_START) * 1000:,.0f} ms "
+        f"({'warm' if process_state['painted'] else 'cold'})"
+    )
+    process_state["painted"] = True
+
     st.write("")
 
     # === Technology vs Devices row ===
@@ -497,25 +967,24 @@ with tab_overview:
     c_left, c_right = st.columns([1.5, 1])
 
     # Tech mix pie
-    with c_left:
-        if hex_filtered.empty:
+    with c_left, perf.block("tech pie"):
+        if (
+            svc_choice == "All"
+            and provider_choice == "All providers"
+            and tech_choice == "All technologies"
+        ):
+            # only the county filter is active: counts are in the snapshot
+            tech_totals = snapshot["tech_counts"].get(selected_fips or "All", {})
+        else:
+            hex_rows = hex_filtered_rows()
+            with perf.block("count tech types"):
+                tech_totals = count_multi_values(hex_rows["tech_types"])
+
+        if not tech_totals:
             st.info("No hex cells match the current filters.")
         else:
-            tech_df = hex_filtered.copy()
-            tech_df["tech_types"] = tech_df["tech_types"].fillna("Unknown")
-
-            # split semicolon-separated tech_types into individual rows
-            tech_long = tech_df.assign(
-                tech=tech_df["tech_types"].str.split(";")
-            ).explode("tech")
-            tech_long["tech"] = tech_long["tech"].str.strip()
-            tech_long = tech_long[tech_long["tech"] != ""]  # drop blanks just in case
-
-            # clean, duplicate-free aggregation
-            tech_counts = (
-                tech_long.groupby("tech", as_index=False)
-                .size()
-                .rename(columns={"size": "count"})
+            tech_counts = pd.DataFrame(
+                {"tech": list(tech_totals.keys()), "count": list(tech_totals.values())}
             )
 
             fig_tech = px.pie(
@@ -524,10 +993,10 @@ with tab_overview:
                 values="count",
                 title="Share of hex cells by technology type",
             )
-            st.plotly_chart(fig_tech, use_container_width=True)
+            perf.plotly_chart("tech pie", fig_tech, use_container_width=True)
 
     # Devices bar
-    with c_right:
+    with c_right, perf.block("devices bar"):
         dev_df = pd.DataFrame(
             {
                 "device": ["Desktop / Laptop", "Smartphone"],
@@ -542,7 +1011,7 @@ with tab_overview:
             title="Household device estimates",
         )
         fig_dev.update_layout(xaxis_title="", yaxis_title="Households")
-        st.plotly_chart(fig_dev, use_container_width=True)
+        perf.plotly_chart("devices bar", fig_dev, use_container_width=True)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -552,7 +1021,7 @@ with tab_overview:
 
     e_left, e_right = st.columns([1, 1.4])
 
-    with e_left:
+    with e_left, perf.block("education pie"):
         edu_low_9 = pd.to_numeric(
             scope_counties_df["Less_Than_9th_grade"], errors="coerce"
         ).sum()
@@ -576,9 +1045,10 @@ with tab_overview:
             values="count",
             title="Education attainment (approximate counts)",
         )
-        st.plotly_chart(fig_edu, use_container_width=True)
+        perf.plotly_chart("education pie", fig_edu, use_container_width=True)
 
-    with e_right:
+    with e_right, perf.block("provider bar"):
+        prov_filtered = provider_filtered_rows()
         if prov_filtered.empty:
             st.info("No provider records match the current filters.")
         else:
@@ -601,31 +1071,50 @@ with tab_overview:
             )
 
             # aggregate across selected counties
-            prov_agg = (
-                tmp.groupby("provider_name", as_index=False)[
-                    ["locations", "underserved_locations"]
-                ]
-                .sum()
-                .sort_values("locations", ascending=False)
-                .head(top_n)
-            )
+            prov_agg = tmp.groupby("provider_name", as_index=False, observed=True)[
+                ["locations", "underserved_locations"]
+            ].sum()
+
+            # `locations` counts BDC records (one per technology); when the DB
+            # has location sketches, merge them for distinct locations in scope
+            size_col = "locations"
+            sketches = load_provider_sketches(*DATA_KEY)
+            if sketches is not None and not sketches.empty:
+                scoped = tmp[["provider_name", "county_fips", "provider_id"]].astype(str).merge(
+                    sketches[["county_fips", "provider_id", "sketch"]],
+                    on=["county_fips", "provider_id"],
+                )
+                prov_agg["distinct_locations"] = (
+                    prov_agg["provider_name"].astype(str).map(rollup(scoped, "provider_name")).fillna(0)
+                )
+                size_col = "distinct_locations"
+
+            prov_agg = prov_agg.sort_values(size_col, ascending=False).head(top_n)
 
             # pretty labels like 1,234,567
             prov_agg["locations_label"] = (
-                prov_agg["locations"].round(0).astype(int).map("{:,}".format)
+                prov_agg[size_col].round(0).astype(int).map("{:,}".format)
             )
 
             fig_prov = px.bar(
                 prov_agg,
-                x="locations",
+                x=size_col,
                 y="provider_name",
                 orientation="h",
                 hover_data={
+                    size_col: ":,.0f",
                     "locations": ":,",
                     "underserved_locations": ":,",
                     "provider_name": True,
                 },
-                title="Provider footprint (locations in scope)",
+                labels={"distinct_locations": "distinct locations", "locations": "records"}
+                if size_col == "distinct_locations"
+                else None,
+                title=(
+                    "Provider footprint (distinct locations in scope)"
+                    if size_col == "distinct_locations"
+                    else "Provider footprint (locations in scope)"
+                ),
             )
 
             fig_prov.update_traces(
@@ -635,16 +1124,57 @@ with tab_overview:
             )
 
             fig_prov.update_layout(
-                xaxis_title="Reported service locations",
+                xaxis_title="Distinct service locations"
+                if size_col == "distinct_locations"
+                else "Reported service locations",
                 yaxis_title="Provider",
                 margin=dict(l=0, r=20, t=60, b=40),
             )
 
-            st.plotly_chart(fig_prov, use_container_width=True)
+            perf.plotly_chart("provider bar", fig_prov, use_container_width=True)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
-    # === Rankings section (only meaningful for All Kentucky) ===
+    # === Speed distribution row (merged speed sketches) ===
+    with perf.block("speed distribution"):
+        speed_rows = speed_scope_rows()
+        if speed_rows is not None:
+            st.markdown('<div class="section-card">', unsafe_allow_html=True)
+            st.subheader("Advertised Speed Distribution")
+
+            if speed_rows.empty:
+                st.info("No speed data for the current county/provider filters.")
+            else:
+                unit = speed_rows["units"].iloc[0]
+                st.caption(
+                    f"Best advertised speed per {'location' if unit == 'locations' else 'BDC record'}"
+                    f"{' from the selected provider' if provider_choice != 'All providers' else ''}. "
+                    "Follows the county and provider filters only."
+                )
+                sp_cols = st.columns(6)
+                for i, (direction, col) in enumerate([("Download", "down_sketch"), ("Upload", "up_sketch")]):
+                    q = speed_quantiles(speed_rows[col])
+                    for j, (name, key) in enumerate([("p10", 0.1), ("median", 0.5), ("p90", 0.9)]):
+                        sp_cols[i * 3 + j].metric(f"{direction} {name}", f"{q[key]:,.0f} Mbps")
+
+                h_left, h_right = st.columns(2)
+                for holder, direction, col in [(h_left, "download", "down_sketch"), (h_right, "upload", "up_sketch")]:
+                    hist = speed_histogram(speed_rows[col])
+                    fig_speed = px.bar(
+                        hist,
+                        x="label",
+                        y="count",
+                        hover_data={"mean": ":,.1f", "label": False},
+                        labels={"label": "Mbps", "count": unit, "mean": "mean Mbps"},
+                        title=f"Advertised {direction} speed",
+                    )
+                    fig_speed.update_layout(xaxis_type="category", margin=dict(l=0, r=10, t=50, b=40))
+                    with holder:
+                        perf.plotly_chart(f"{direction} histogram", fig_speed, use_container_width=True)
+
+            st.markdown("</div>", unsafe_allow_html=True)
+
+    # === Rankings section (only meaningful statewide) ===
     st.markdown('<div class="section-card">', unsafe_allow_html=True)
     st.subheader("County Rankings – Broadband & Digital Readiness")
 
@@ -663,7 +1193,7 @@ with tab_overview:
 
         r1, r2 = st.columns(2)
 
-        with r1:
+        with r1, perf.block("rankings: broadband"):
             st.markdown("**Top 10 counties by Broadband Quality Score**")
             fig_bq = px.bar(
                 top_broadband,
@@ -673,9 +1203,9 @@ with tab_overview:
                 range_x=[0, 100],
                 labels={"broadband_quality_score": "Score"},
             )
-            st.plotly_chart(fig_bq, use_container_width=True)
+            perf.plotly_chart("rankings: broadband", fig_bq, use_container_width=True)
 
-        with r2:
+        with r2, perf.block("rankings: readiness"):
             st.markdown("**Top 10 counties by Digital Readiness Index**")
             fig_dr = px.bar(
                 top_digital,
@@ -685,11 +1215,11 @@ with tab_overview:
                 range_x=[0, 100],
                 labels={"digital_readiness_index": "Index"},
             )
-            st.plotly_chart(fig_dr, use_container_width=True)
+            perf.plotly_chart("rankings: readiness", fig_dr, use_container_width=True)
     else:
         st.info(
             "Rankings are most informative at the statewide level. "
-            "Switch county filter to **All Kentucky** to see rankings."
+            f"Switch county filter to **{ALL_STATE}** to see rankings."
         )
 
     st.markdown("</div>", unsafe_allow_html=True)
@@ -697,21 +1227,22 @@ with tab_overview:
 # --------------------------------------------------
 # TAB 2 – COUNTY EXPLORER (MAP + LOCAL DETAIL)
 # --------------------------------------------------
-with tab_explorer:
+with tab_explorer, perf.block("tab: county explorer"):
     st.markdown("#### County Explorer")
 
-    # IF ALL KENTUCKY -> show statewide county choropleth
+    # IF WHOLE STATE -> show statewide county choropleth
     if selected_fips is None:
-        if ky_geojson is None:
+        state_map = load_state_map(STATE_FIPS)
+        if state_map is None:
             st.warning(
-                "Kentucky county GeoJSON not found at `data/ky_counties.geojson`. "
-                "Add it to the repo to see the statewide map."
+                f"{STATE_NAME} county boundaries not found under `data/boundaries/{STATE_FIPS}/`. "
+                "Build them with `code/cleaning/build_county_lod.py` to see the statewide map."
             )
         else:
             # ---------- BUILD MAP DATAFRAME DEPENDING ON PROVIDER FILTER ----------
             if provider_choice == "All providers":
                 st.markdown(
-                    "Exploring **All Kentucky** – county-level broadband coverage "
+                    f"Exploring **{ALL_STATE}** – county-level broadband coverage "
                     "based on FCC BDC hex aggregation (all providers)."
                 )
 
@@ -722,14 +1253,22 @@ with tab_explorer:
                     "Percent underserved hex cells": "pct_underserved_hex",
                     "Broadband Quality Score (0–100)": "broadband_quality_score",
                     "Digital Readiness Index (0–100)": "digital_readiness_index",
+                    "Avg rings to nearest served hex (un/underserved hexes)": "avg_distance_to_served",
                 }
+                if "pct_unserved_pop" in df_map.columns:
+                    metric_options.update({
+                        "Percent of people unserved": "pct_unserved_pop",
+                        "Percent of people underserved": "pct_underserved_pop",
+                        "Percent of housing units unserved": "pct_unserved_hu",
+                    })
 
             else:
                 st.markdown(
-                    f"Exploring **All Kentucky** – footprint for provider "
+                    f"Exploring **{ALL_STATE}** – footprint for provider "
                     f"**{provider_choice}**."
                 )
 
+                provider_df = load_provider_table(*DATA_KEY)
                 tmp = provider_df[provider_df["provider_name"] == provider_choice].copy()
                 tmp["locations"] = pd.to_numeric(tmp["locations"], errors="coerce").fillna(0)
                 tmp["underserved_locations"] = pd.to_numeric(
@@ -738,7 +1277,7 @@ with tab_explorer:
 
                 # aggregate provider metrics per county
                 prov_agg = (
-                    tmp.groupby("county_fips", as_index=False)[
+                    tmp.groupby("county_fips", as_index=False, observed=True)[
                         ["locations", "underserved_locations"]
                     ]
                     .sum()
@@ -800,7 +1339,7 @@ with tab_explorer:
             metric_col = pretty_to_col[metric_label]
 
             # if it's a fraction, convert to 0–100 for legend readability
-            if metric_col in ["pct_unserved_hex", "pct_underserved_hex"]:
+            if metric_col in PCT_METRICS:
                 df_map[metric_col] = df_map[metric_col] * 100
 
             # ---------- BUILD SAFE HOVER DATA ----------
@@ -813,6 +1352,7 @@ with tab_explorer:
                 "digital_readiness_index": True,
                 "pct_unserved_hex": True,
                 "pct_underserved_hex": True,
+                "pct_unserved_pop": True,
                 "provider_coverage_share": True,
             }
             hover_data = {
@@ -821,43 +1361,67 @@ with tab_explorer:
 
             # ---------- DRAW CHOROPLETH ----------
             # choose color scale based on whether "high is bad" or "high is good"
-            if metric_col in ["pct_unserved_hex", "pct_underserved_hex"]:
+            if metric_col in PCT_METRICS + ["avg_distance_to_served"]:
                 # higher = worse → red for high values
                 color_scale = "RdYlGn_r"
             else:
                 # higher = better → green for high values
                 color_scale = "RdYlGn"
 
-            fig_state = px.choropleth_mapbox(
-                df_map,
-                geojson=ky_geojson,
-                locations="county_fips",
-                featureidkey="properties.GEOID",
-                color=metric_col,
-                hover_name="county_name",
-                hover_data=hover_data,
-                mapbox_style="carto-positron",
-                center={"lat": 37.8, "lon": -85.8},
-                zoom=6.2,
-                opacity=0.85,
-                height=650,
-                color_continuous_scale=color_scale,
-            )
-            fig_state.update_layout(margin={"r": 0, "t": 10, "l": 0, "b": 0})
+            with perf.block("build state map"):
+                state_geojson, map_center, map_zoom = state_map
+                fig_state = px.choropleth_mapbox(
+                    df_map,
+                    geojson=state_geojson,
+                    locations="county_fips",
+                    featureidkey="properties.GEOID",
+                    color=metric_col,
+                    hover_name="county_name",
+                    hover_data=hover_data,
+                    mapbox_style="carto-positron",
+                    center=map_center,
+                    zoom=map_zoom,
+                    opacity=0.85,
+                    height=650,
+                    color_continuous_scale=color_scale,
+                )
+                fig_state.update_layout(margin={"r": 0, "t": 10, "l": 0, "b": 0})
 
             st.markdown('<div class="section-card">', unsafe_allow_html=True)
             st.subheader("Statewide county-level broadband map")
-            st.plotly_chart(fig_state, use_container_width=True)
+
+            show_hex_tiles = False
+            # the tiles are pre-rendered with the default thresholds
+            if TILES_PATH.exists() and not what_if:
+                show_hex_tiles = st.toggle(
+                    "Overlay statewide hex detail (vector tiles)",
+                    value=False,
+                    help="Draws every H3 hex from prebuilt map tiles; zoom in for res-8 detail.",
+                )
+            if show_hex_tiles and ensure_tile_server() is not None:
+                fig_state.update_traces(marker_opacity=0.25)
+                fig_state.update_layout(
+                    mapbox_layers=hex_tile_layers(TILE_URL.replace("{store}", TILES_PATH.stem))
+                )
+
+            perf.plotly_chart("state map", fig_state, use_container_width=True)
+
+            if show_hex_tiles:
+                st.caption(
+                    "Hex overlay: H3 res-5/6/7 parents at state zoom (worst category shown), "
+                    "full res-8 hexes from zoom 10. Red = Unserved, orange = Underserved, "
+                    "green = Served."
+                )
 
             if provider_choice == "All providers":
                 st.caption(
-                    "Each polygon is a Kentucky county. Colors show the selected broadband "
+                    f"Each polygon is a {STATE_NAME} county. Colors show the selected broadband "
                     "metric (e.g., percent unserved hex cells or broadband quality score) "
                     "aggregated across all providers."
                 )
             else:
                 st.caption(
-                    f"Each polygon is a Kentucky county. Colors show **{provider_choice}**’s "
+                    f"Each polygon is a {STATE_NAME} county. Colors show **{provider_choice}**’s "
                     "footprint (locations, underserved locations, or coverage share) in each county."
                 )
 
@@ -869,37 +1433,68 @@ with tab_explorer:
     # ELSE -> per-county hex map
     else:
         # Filter hexes for this county only, but keep provider/tech filters
-        county_hex = hex_df[hex_df["county_fips"] == selected_fips].copy()
-
-        if svc_choice != "All":
-            county_hex = county_hex[
-                county_hex["service_category"] == svc_choice
-            ]
-        if provider_choice != "All providers":
-            county_hex = county_hex[
-                county_hex["provider_names"].str.contains(provider_choice, na=False)
-            ]
-        if tech_choice != "All technologies":
-            county_hex = county_hex[
-                county_hex["tech_types"].fillna("").str.contains(tech_choice, na=False)
-            ]
+        with perf.block("filter county hex"):
+            hex_df = hex_table()
+            county_hex = hex_df[hex_df["county_fips"] == selected_fips].copy()
+
+            if svc_choice != "All":
+                county_hex = county_hex[
+                    county_hex["service_category"] == svc_choice
+                ]
+            if provider_choice != "All providers":
+                county_hex = county_hex[
+                    contains_mask(county_hex["provider_names"], provider_choice)
+                ]
+            if tech_choice != "All technologies":
+                county_hex = county_hex[
+                    contains_mask(county_hex["tech_types"], tech_choice)
+                ]
 
         total_points = len(county_hex)
-        max_points = st.slider(
-            "Max hex points to plot (for performance)",
-            min_value=2000,
-            max_value=70000,
-            value=20000,
-            step=2000,
-        )
+        mc1, mc2 = st.columns([3, 1])
+        with mc1:
+            max_points = st.slider(
+                "Max map points before hexes are rolled up to coarser cells",
+                min_value=2000,
+                max_value=70000,
+                value=20000,
+                step=2000,
+            )
+        with mc2:
+            detail_options = {"Auto": None}
+            for res in MAP_RESOLUTIONS:
+                label = f"H3 res {res}" + (" (full detail)" if res == 8 else "")
+                detail_options[label] = res
+            detail_choice = st.selectbox("Map detail", list(detail_options.keys()), index=0)
+            color_by = "service_category"
+            if "distance_to_served" in county_hex.columns:
+                color_label = st.selectbox(
+                    "Color hexes by", ["Service category", "Distance to served"], key="hex_color_by"
+                )
+                if color_label == "Distance to served":
+                    color_by = "distance_to_served"
 
         if total_points == 0:
             st.warning("No hex cells match filters for this county.")
         else:
-            if total_points > max_points:
-                map_df = county_hex.sample(max_points, random_state=42)
-            else:
-                map_df = county_hex
+            # the unfiltered county at the default thresholds is precomputed
+            # in hex_pyramid; anything else is rolled up from the hexes
+            pyramid_sizes = None
+            if (
+                not what_if
+                and svc_choice == "All"
+                and provider_choice == "All providers"
+                and tech_choice == "All technologies"
+            ):
+                pyramid_sizes = load_pyramid_sizes(*DATA_KEY, selected_fips)
+            with perf.block("roll up hexes"):
+                map_res = detail_options[detail_choice]
+                if pyramid_sizes and map_res is None:
+                    map_res = pick_resolution(pyramid_sizes, total_points, max_points)
+                if pyramid_sizes and map_res in pyramid_sizes:
+                    map_df = load_pyramid(*DATA_KEY, map_res, selected_fips)
+                else:
+                    map_df, map_res = rollup_hex_points(county_hex, max_points, resolution=map_res)
 
             st.markdown('<div class="section-card">', unsafe_allow_html=True)
             st.subheader("Hex-level broadband map")
@@ -907,51 +1502,75 @@ with tab_explorer:
             if not {"lat", "lon"}.issubset(map_df.columns):
                 st.error("Hex dataset is missing lat/lon columns.")
             else:
-                color_map = {
-                    "Unserved": "red",
-                    "Underserved": "orange",
-                    "Served": "green",
-                    "Unknown": "gray",
-                }
-                fig_map = px.scatter_mapbox(
-                    map_df,
-                    lat="lat",
-                    lon="lon",
-                    color="service_category",
-                    color_discrete_map=color_map,
-                    zoom=8,
-                    height=650,
-                    hover_data={
-                        "county_fips": True,
-                        "max_down": True,
-                        "max_up": True,
-                        "provider_count": True,
-                        "provider_names": True,
-                        "tech_types": True,
-                        "service_category": True,
-                    },
+                with perf.block("build hex map"):
+                    fig_map = hex_map_figure(map_df, map_res, color_by)
+                    county_outline = load_county_outline(STATE_FIPS, selected_fips)
+                    if county_outline is not None:
+                        outline, center, zoom = county_outline
+                        fig_map.update_layout(
+                            mapbox_center=center,
+                            mapbox_zoom=zoom,
+                            mapbox_layers=[
+                                {"source": outline, "type": "line", "color": "#333333", "line": {"width": 2}}
+                            ],
+                        )
+                map_event = perf.plotly_chart(
+                    "hex map",
+                    fig_map,
+                    use_container_width=True,
+                    key="hex_map",
+                    on_select="rerun",
+                    selection_mode=("points", "box", "lasso"),
                 )
-                fig_map.update_layout(
-                    mapbox_style="open-street-map",
-                    margin={"r": 0, "t": 0, "l": 0, "b": 0},
-                )
-                st.plotly_chart(fig_map, use_container_width=True)
 
+                picked = selected_map_rows(map_event, map_df)
+                if not picked.empty:
+                    detail_cols = (
+                        HEX_DETAIL_COLS
+                        if map_res == MAP_RESOLUTIONS[0]
+                        else ROLLUP_DETAIL_COLS
+                    )
+                    st.markdown(f"**Selected cells ({len(picked):,})**")
+                    st.dataframe(
+                        picked[[c for c in detail_cols if c in picked.columns]],
+                        use_container_width=True,
+                        height=min(400, 38 + 35 * len(picked)),
+                    )
+
+            if map_res != MAP_RESOLUTIONS[0]:
+                st.caption(
+                    f"{total_points:,} hex cells rolled up to {len(map_df):,} H3 res-{map_res} "
+                    "cells. Each cell takes the worst service category of the hexes inside it; "
+                    "narrow the filters or pick **H3 res 8** under *Map detail* for full detail."
+                )
             st.caption(
                 "Each point is an H3 hex cell with at least one broadband service report. "
-                "Colors show FCC BDC service category; hover to see provider and technology details."
+                "Colors show FCC BDC service category; click a point (or box/lasso select) "
+                "to see provider and technology details."
             )
+            if color_by == "distance_to_served":
+                st.caption(
+                    "Distance = H3 rings (about 0.9 km each) from the hex to the nearest Served hex "
+                    "in the state, under the pipeline's 25/3 and 100/20 rules; rolled-up cells show "
+                    "their farthest hex. Blank = no served hex within 60 rings."
+                )
             st.markdown("</div>", unsafe_allow_html=True)
 
             # Category breakdown for this county
             st.markdown('<div class="section-card">', unsafe_allow_html=True)
             st.subheader("Service category breakdown in selected county")
 
+            if weight_prefix == "hex":
+                by_cat = county_hex["service_category"].value_counts()
+            else:
+                by_cat = pd.to_numeric(county_hex[WEIGHT_COLUMNS[weight_prefix]], errors="coerce").groupby(
+                    county_hex["service_category"], observed=True
+                ).sum()
             cat_counts = (
-                county_hex["service_category"]
-                .value_counts()
+                by_cat
                 .reindex(service_categories)
                 .fillna(0)
+                .round()
                 .astype(int)
                 .reset_index()
             )
@@ -965,27 +1584,82 @@ with tab_explorer:
                     x="service_category",
                     y="count",
                     color="service_category",
-                    title="Hex cells by service category",
+                    title=f"{weight_label} by service category",
                     text="count",
                 )
                 fig_bar.update_layout(showlegend=False)
-                st.plotly_chart(fig_bar, use_container_width=True)
+                perf.plotly_chart("category bar", fig_bar, use_container_width=True)
 
             with bc2:
                 fig_pie_cat = px.pie(
                     cat_counts,
                     names="service_category",
                     values="count",
-                    title="Share of hex cells",
+                    title=f"Share of {weight_noun}",
                 )
-                st.plotly_chart(fig_pie_cat, use_container_width=True)
+                perf.plotly_chart("category pie", fig_pie_cat, use_container_width=True)
 
             st.markdown("</div>", unsafe_allow_html=True)
 
+        # ---------- PEER COUNTIES ----------
+        with perf.block("county peers"):
+            st.markdown('<div class="section-card">', unsafe_allow_html=True)
+            st.subheader(f"Counties most like {selected_county_name}")
+
+            with st.expander("Similarity weights"):
+                wcols = st.columns(3)
+                peer_weights = tuple(
+                    (name, wcols[i % 3].slider(label, 0.0, 3.0, 1.0, 0.5, key=f"peer_w_{name}"))
+                    for i, (name, label) in enumerate(county_peers.PEER_FEATURES.items())
+                )
+            pc1, pc2 = st.columns([1, 2])
+            with pc1:
+                n_peers = st.slider("Peers shown", 3, 15, 8, key="peer_k")
+            with pc2:
+                better_only = st.checkbox(
+                    "Only peers with a higher Broadband Quality Score", key="peer_better"
+                )
+
+            if not any(w > 0 for _, w in peer_weights):
+                st.info("Give at least one feature a weight above 0.")
+            else:
+                peer_index = load_peer_index(
+                    *DATA_KEY, peer_weights, (unserved_below, underserved_below), county_df
+                )
+                peers = county_peers.nearest_peers(
+                    peer_index, county_df, selected_fips,
+                    county_peers.MAX_PEERS if better_only else n_peers,
+                )
+                if better_only and not peers.empty:
+                    peers = peers[peers["broadband_quality_score_gap"] > 0].head(n_peers)
+                if peers.empty:
+                    st.info("No peer counties to show for these settings.")
+                else:
+                    share_cols = ["education", "poverty", "unserved", "pct_unserved_hex", "pct_unserved_hex_gap"]
+                    peers[share_cols] = peers[share_cols] * 100
+                    st.dataframe(
+                        peers[[
+                            "county_fips", "county_name", "distance",
+                            "broadband_quality_score", "broadband_quality_score_gap",
+                            "digital_readiness_index", "digital_readiness_index_gap",
+                            "pct_unserved_hex", "pct_unserved_hex_gap",
+                            "income", "education", "devices", "poverty", "speed",
+                        ]].round(2),
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+            st.caption(
+                "Peers are the nearest counties in the state over income, bachelor's share, devices per "
+                "person, poverty rate, average download speed and unserved hex share (each z-scored, "
+                "then weighted). Gaps are peer minus this county; shares are in percent."
+                + (" Unserved shares and scores use the what-if thresholds." if what_if else "")
+            )
+            st.markdown("</div>", unsafe_allow_html=True)
+
 # --------------------------------------------------
 # TAB 3 – DATA & RANKINGS
 # --------------------------------------------------
-with tab_data:
+with tab_data, perf.block("tab: data & rankings"):
     st.markdown("#### Data & County Scores")
 
     st.markdown('<div class="section-card">', unsafe_allow_html=True)
@@ -996,9 +1670,15 @@ with tab_data:
         "county_name",
         "county_avg_down",
         "total_locations",
+        "distinct_locations",
         "hex_unserved",
         "hex_underserved",
         "hex_served",
+        "pop_unserved",
+        "pop_underserved",
+        "pct_unserved_pop",
+        "hu_unserved",
+        "avg_distance_to_served",
         "broadband_quality_score",
         "digital_readiness_index",
         "Population",
@@ -1015,12 +1695,337 @@ with tab_data:
     )
     st.markdown("</div>", unsafe_allow_html=True)
 
+    partials = load_partials(*DATA_KEY)
+    if partials is not None:
+        with perf.block("partials rollup"):
+            st.markdown('<div class="section-card">', unsafe_allow_html=True)
+            st.subheader("Speed roll-up (county / provider / technology filters)")
+
+            group_options = {
+                "Technology": "tech_group",
+                "Provider": "provider_name",
+                "County": "county_fips",
+                "Service flag (100/20)": "is_underserved",
+            }
+            group_label = st.selectbox("Group by", list(group_options), key="partials_group_by")
+
+            scope = partials
+            if selected_fips is not None:
+                scope = scope[scope["county_fips"] == selected_fips]
+            if provider_choice != "All providers":
+                scope = scope[scope["provider_name"] == provider_choice]
+            if tech_choice != "All technologies":
+                scope = scope[scope["tech_group"] == tech_choice]
+
+            if scope.empty:
+                st.info("No BDC records match the current filters.")
+            else:
+                group_col = group_options[group_label]
+                rolled = rollup_partials(scope, group_col)
+                if group_col == "county_fips":
+                    names = county_df.set_index("county_fips")["county_name"]
+                    rolled.insert(1, "county_name", rolled["county_fips"].map(names))
+                elif group_col == "is_underserved":
+                    rolled["is_underserved"] = rolled["is_underserved"].map({0: "100/20 or better", 1: "below 100/20"})
+                st.dataframe(
+                    rolled.sort_values("records", ascending=False).round(1),
+                    hide_index=True,
+                    use_container_width=True,
+                )
+                st.caption(
+                    "Record-weighted statistics over BDC records (location × provider × technology), "
+                    "summed from stored partials; the service-category filter does not apply."
+                )
+            st.markdown("</div>", unsafe_allow_html=True)
+
+    if load_has_hex_provider(DATA_KEY[0]):
+        st.markdown('<div class="section-card">', unsafe_allow_html=True)
+        st.subheader("Provider exit / entry scenario")
+
+        # the hex x provider matrix (and the hex table) are only built once asked for
+        show_scenario = st.toggle("Run a provider scenario", value=False, key="show_provider_scenario")
+        if show_scenario:
+            matrix = load_provider_matrix(*DATA_KEY)
+
+            provider_ids = {}
+            pairs = load_provider_table(*DATA_KEY)[["provider_name", "provider_id"]].astype(str).drop_duplicates()
+            for name, pid in pairs.itertuples(index=False):
+                provider_ids.setdefault(name, []).append(pid)
+            sc1, sc2, sc3, sc4 = st.columns([3, 2, 1, 1])
+            sc_provider = sc1.selectbox("Provider", sorted(provider_ids), key="scenario_provider")
+            sc_action = sc2.radio("Scenario", ["Exits", "Upgrades to", "Enters at"], horizontal=True,
+                                  key="scenario_action")
+            sc_down = sc3.number_input("Down (Mbps)", 0, 100000, 1000, key="scenario_down",
+                                       disabled=sc_action == "Exits")
+            sc_up = sc4.number_input("Up (Mbps)", 0, 100000, 100, key="scenario_up",
+                                     disabled=sc_action == "Exits")
+
+            with perf.block("provider scenario"):
+                hex_df = load_hex_table(*DATA_KEY)
+                hex_mask = None
+                if selected_fips is not None:
+                    hex_mask = (hex_df["county_fips"] == selected_fips).to_numpy()
+                ids = provider_ids[sc_provider]
+                change = {
+                    "Exits": {"remove": ids},
+                    "Upgrades to": {"upgrade": {pid: (sc_down, sc_up) for pid in ids}},
+                    "Enters at": {"enter": {ids[0]: (sc_down, sc_up)}},
+                }[sc_action]
+                after = provider_scenarios.simulate(
+                    matrix,
+                    hex_mask=hex_mask,
+                    unserved_below=unserved_below,
+                    underserved_below=underserved_below,
+                    **change,
+                )
+
+                hex_weight = None
+                if weight_prefix != "hex":
+                    hex_weight = load_hex_weights(*DATA_KEY)[WEIGHT_COLUMNS[weight_prefix]]
+                before_counts = county_category_counts(
+                    classify_speeds(hex_df["max_down"], hex_df["max_up"], unserved_below, underserved_below)
+                    .codes.astype(np.int64),
+                    hex_weight,
+                )
+                after_counts = county_category_counts(
+                    after["service_category"].cat.codes.to_numpy(dtype=np.int64), hex_weight
+                )
+                if selected_fips is not None:
+                    before_counts = before_counts.loc[[selected_fips]]
+                    after_counts = after_counts.loc[[selected_fips]]
+
+                impact = pd.DataFrame({
+                    "unserved_before": before_counts["Unserved"],
+                    "unserved_after": after_counts["Unserved"],
+                    "underserved_before": before_counts["Underserved"],
+                    "underserved_after": after_counts["Underserved"],
+                })
+                impact["unserved_change"] = impact["unserved_after"] - impact["unserved_before"]
+                impact["underserved_change"] = impact["underserved_after"] - impact["underserved_before"]
+                impact = impact.reset_index()
+                impact.insert(1, "county_name", impact["county_fips"].map(county_df.set_index("county_fips")["county_name"]))
+                impact = impact[(impact["unserved_change"].abs() + impact["underserved_change"].abs()) > 0.005]
+
+            m1, m2 = st.columns(2)
+            m1.metric(f"Unserved {weight_noun}", f"{after_counts['Unserved'].sum():,.0f}",
+                      f"{after_counts['Unserved'].sum() - before_counts['Unserved'].sum():+,.0f}", delta_color="inverse")
+            m2.metric(f"Underserved {weight_noun}", f"{after_counts['Underserved'].sum():,.0f}",
+                      f"{after_counts['Underserved'].sum() - before_counts['Underserved'].sum():+,.0f}",
+                      delta_color="inverse")
+            if impact.empty:
+                st.info("No county changes category counts under this scenario.")
+            else:
+                st.dataframe(
+                    impact.sort_values("unserved_change", ascending=False).round(1),
+                    hide_index=True,
+                    use_container_width=True,
+                )
+            st.caption(
+                f"Recomputed from each provider's best speeds per hex ({matrix['down'].nnz:,} hex × provider entries) "
+                f"in {'the selected county' if selected_fips else 'the whole state'}, under the current thresholds. "
+                "Entry offers the speeds in every hex in scope."
+            )
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    competition = load_county_competition(*DATA_KEY)
+    overlap = load_provider_overlap(*DATA_KEY, selected_fips)
+    if competition is not None and overlap is not None:
+        with perf.block("provider competition"):
+            st.markdown('<div class="section-card">', unsafe_allow_html=True)
+            st.subheader("Provider competition (hex overlap)")
+
+            comp_scope = competition
+            if selected_fips is not None:
+                comp_scope = competition[competition["county_fips"] == selected_fips]
+            cm1, cm2, cm3 = st.columns(3)
+            cm1.metric("Hexes with no 100/20 provider", f"{comp_scope['hexes_no_100_20'].sum():,.0f}")
+            cm2.metric("Monopoly hexes (one 100/20 provider)", f"{comp_scope['monopoly_hexes_100_20'].sum():,.0f}")
+            cm3.metric("Competitive hexes (2+ at 100/20)", f"{comp_scope['competitive_hexes_100_20'].sum():,.0f}")
+
+            overlap_col = st.radio(
+                "Overlap counted over",
+                ["All shared hexes", "Hexes where both meet 100/20"],
+                horizontal=True,
+                key="overlap_measure",
+            )
+            column = "shared_hexes" if overlap_col == "All shared hexes" else "shared_hexes_100_20"
+            providers = top_providers(overlap, 15)
+            if len(providers) < 2:
+                st.info("Fewer than two providers serve hexes in this scope.")
+            else:
+                mat = overlap_matrix(overlap, providers, column)
+                names = (
+                    load_provider_table(*DATA_KEY)[["provider_id", "provider_name"]]
+                    .astype(str)
+                    .drop_duplicates("provider_id")
+                    .set_index("provider_id")["provider_name"]
+                )
+                labels = [f"{names.get(p, p)} ({p})" for p in mat.index]
+                fig_overlap = px.imshow(
+                    mat.to_numpy(),
+                    x=labels,
+                    y=labels,
+                    color_continuous_scale="Blues",
+                    labels={"color": "Hexes"},
+                    aspect="auto",
+                )
+                fig_overlap.update_layout(height=560, margin=dict(l=10, r=10, t=30, b=10))
+                perf.plotly_chart("overlap heatmap", fig_overlap, use_container_width=True)
+                st.caption(
+                    f"The {len(providers)} providers with the most hexes "
+                    f"{'in the selected county' if selected_fips else 'statewide'}; "
+                    "the diagonal is each provider's own hex count."
+                )
+
+            if selected_fips is None:
+                names = county_df.set_index("county_fips")["county_name"]
+                comp_table = competition.assign(county_name=competition["county_fips"].map(names))
+                comp_table["pct_monopoly"] = comp_table["monopoly_hexes_100_20"] / comp_table["hexes"] * 100
+                st.dataframe(
+                    comp_table[[
+                        "county_fips", "county_name", "hexes", "avg_providers_100_20",
+                        "hexes_no_100_20", "monopoly_hexes_100_20", "competitive_hexes_100_20", "pct_monopoly",
+                    ]].sort_values("pct_monopoly", ascending=False).round(2),
+                    hide_index=True,
+                    use_container_width=True,
+                )
+            st.markdown("</div>", unsafe_allow_html=True)
+
+    stored_clusters = load_clusters(*DATA_KEY, "unserved")
+    if stored_clusters is not None:
+        with perf.block("unserved clusters"):
+            st.markdown('<div class="section-card">', unsafe_allow_html=True)
+            st.subheader("Largest unserved areas (contiguous hex clusters)")
+
+            level_label = st.radio(
+                "Cluster hexes that are",
+                ["Unserved", "Unserved or Underserved"],
+                horizontal=True,
+                key="cluster_level",
+            )
+            level = "unserved" if level_label == "Unserved" else "unserved_underserved"
+
+            # largest by the coverage weight picked above
+            order_by = "hexes" if weight_prefix == "hex" else WEIGHT_COLUMNS[weight_prefix]
+            scenario_labels = None
+            if what_if:
+                scenario_labels, cluster_list = scenario_clusters(
+                    *DATA_KEY, STATE_FIPS, level, (unserved_below, underserved_below)
+                )
+                if selected_fips is not None:
+                    cluster_list = cluster_list[
+                        cluster_list["counties"].str.contains(selected_fips, regex=False)
+                    ]
+                cluster_list = cluster_list.sort_values([order_by, "hexes"], ascending=False, kind="stable")
+                cluster_list = cluster_list.head(CLUSTER_LIST_LIMIT)
+            else:
+                cluster_list = load_clusters(*DATA_KEY, level, selected_fips, order_by)
+
+            if cluster_list.empty:
+                st.info("No clusters of this kind in the current scope.")
+            else:
+                names = county_df.set_index("county_fips")["county_name"]
+                cluster_list = cluster_list.assign(county_name=cluster_list["county_fips"].map(names))
+                st.dataframe(
+                    cluster_list[[
+                        "cluster_id", "hexes", "population", "housing_units", "county_name", "county_count",
+                        "counties", "candidate_providers", "lat", "lon",
+                    ]].dropna(axis=1, how="all").round(4),
+                    hide_index=True,
+                    use_container_width=True,
+                )
+
+                by_id = cluster_list.set_index("cluster_id")
+
+                def cluster_label(cid):
+                    label = f"{cid} · {int(by_id.at[cid, 'hexes']):,} hexes"
+                    if order_by != "hexes":
+                        label += f" · {by_id.at[cid, order_by]:,.0f} {weight_noun}"
+                    return label
+
+                pick = st.selectbox(
+                    "Zoom to cluster", cluster_list["cluster_id"].tolist(), format_func=cluster_label, key="cluster_pick"
+                )
+                row = cluster_list[cluster_list["cluster_id"] == pick].iloc[0]
+                if scenario_labels is not None:
+                    members = hex_table()[scenario_labels == pick]
+                else:
+                    members = load_cluster_hexes(DATA_KEY[0], pick, level)
+
+                fig_cluster = hex_map_figure(members, 8)
+                center, zoom = bounds_view(
+                    row["min_lat"], row["min_lon"], row["max_lat"], row["max_lon"], pad=-0.3, min_span=0.02
+                )
+                fig_cluster.update_layout(mapbox_center=center, mapbox_zoom=zoom, height=480)
+                perf.plotly_chart("cluster map", fig_cluster, use_container_width=True)
+
+            st.caption(
+                "Clusters are connected groups of neighboring res-8 hexes; candidate providers report "
+                "service in or right next to the cluster. "
+                + ("Recomputed for the what-if thresholds." if what_if else "Computed for the default 25/3 and 100/20 rules.")
+            )
+            st.markdown("</div>", unsafe_allow_html=True)
+
+    pyramid_sizes = load_pyramid_sizes(*DATA_KEY, selected_fips)
+    if pyramid_sizes:
+        with perf.block("hex roll-up export"):
+            st.markdown('<div class="section-card">', unsafe_allow_html=True)
+            st.subheader("Hex roll-up export (coarser H3 cells)")
+
+            export_options = sorted(pyramid_sizes, reverse=True)
+            default_res = next(
+                (r for r in export_options if pyramid_sizes[r] <= PYRAMID_EXPORT_ROWS), export_options[-1]
+            )
+            export_res = st.selectbox(
+                "Resolution",
+                export_options,
+                index=export_options.index(default_res),
+                format_func=lambda r: f"H3 res {r} ({pyramid_sizes[r]:,} cells)",
+                key="pyramid_res",
+            )
+            cells = load_pyramid(*DATA_KEY, export_res, selected_fips)
+            st.dataframe(cells.head(300), hide_index=True, use_container_width=True, height=350)
+            scope_name = selected_fips if selected_fips is not None else STATE_FIPS
+            st.download_button(
+                f"Download {len(cells):,} cells (CSV)",
+                cells.to_csv(index=False).encode("utf-8"),
+                file_name=f"hex_res{export_res}_{scope_name}.csv",
+                mime="text/csv",
+            )
+            st.caption(
+                "Res-8 hexes rolled up to their H3 parents in the pipeline: hex counts per service "
+                "category (worst one shown), min/max of the hexes' best speeds, providers, "
+                "locations and population. Computed for the default 25/3 and 100/20 rules"
+                + (", not the what-if thresholds." if what_if else ".")
+                + ("" if selected_fips else " Statewide, `providers` is the largest county count in the cell.")
+            )
+            st.markdown("</div>", unsafe_allow_html=True)
+
     st.markdown('<div class="section-card">', unsafe_allow_html=True)
     st.subheader("Raw hex data (filtered)")
 
-    st.dataframe(
-        hex_filtered.head(300),
-        use_container_width=True,
-        height=450,
-    )
+    # the hex and provider tables are only attached once asked for
+    show_raw_hexes = st.toggle("Show raw hex rows", value=False, key="show_raw_hexes")
+    if show_raw_hexes:
+        st.dataframe(
+            hex_filtered_rows().head(300),
+            use_container_width=True,
+            height=450,
+        )
     st.markdown("</div>", unsafe_allow_html=True)
+
+    footprint = (
+        f"hex table {memory_mb(load_hex_table(*DATA_KEY)):,.1f} MB · "
+        f"provider table {memory_mb(load_provider_table(*DATA_KEY)):,.1f} MB "
+        "(both memory-mapped, shared by all workers) · "
+        if show_raw_hexes
+        else ""
+    )
+    rss = process_rss_mb()
+    st.caption(
+        f"In-memory footprint: {footprint}"
+        f"county table {memory_mb(county_df):,.1f} MB"
+        + (f" · process RSS {rss:,.0f} MB" if rss is not None else "")
+    )
+
+finish_rerun(perf)
@@ -0,0 +1,119 @@
+"""
+County boundary levels of detail for the choropleth maps.
+
+Reads the per-state TopoJSON files written by code/cleaning/build_county_lod.py
+and converts the level that fits the map zoom into a GeoJSON FeatureCollection
+for Plotly.
+"""
+import json
+import math
+from pathlib import Path
+
+THIS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = THIS_DIR.parent
+BOUNDARY_DIR = PROJECT_ROOT / "data" / "boundaries"
+
+# level -> lowest map zoom it is used at (coarsest level for statewide views)
+LOD_MIN_ZOOM = {2: 0.0, 1: 7.0, 0: 9.0}
+
+# decimal places kept per level in the GeoJSON sent to the browser
+LOD_DECIMALS = {0: 5, 1: 4, 2: 3}
+
+
+def pick_lod(zoom: float) -> int:
+    """Return the coarsest level whose minimum zoom is <= `zoom`."""
+    level = max(LOD_MIN_ZOOM)
+    for lvl, min_zoom in sorted(LOD_MIN_ZOOM.items(), key=lambda kv: kv[1]):
+        if zoom >= min_zoom:
+            level = lvl
+    return level
+
+
+def lod_path(state_fips: str, level: int) -> Path:
+    return BOUNDARY_DIR / state_fips / f"counties_lod{level}.topo.json"
+
+
+def topology_to_geojson(topo: dict, object_name: str = "counties", decimals: int = 5) -> dict:
+    """Convert a quantized TopoJSON object to a GeoJSON FeatureCollection."""
+    tf = topo.get("transform")
+    arcs = []
+    for arc in topo["arcs"]:
+        if tf:
+            (kx, ky), (tx, ty) = tf["scale"], tf["translate"]
+            x = y = 0
+            pts = []
+            for dx, dy in arc:
+                x += dx
+                y += dy
+                pts.append([round(x * kx + tx, decimals), round(y * ky + ty, decimals)])
+        else:
+            pts = [[round(px, decimals), round(py, decimals)] for px, py in arc]
+        arcs.append(pts)
+
+    def ring_coords(ring):
+        coords = []
+        for i, a in enumerate(ring):
+            pts = arcs[a] if a >= 0 else arcs[~a][::-1]
+            # consecutive arcs share an endpoint
+            coords.extend(pts if i == 0 else pts[1:])
+        return coords
+
+    features = []
+    for g in topo["objects"][object_name]["geometries"]:
+        if g["type"] == "MultiPolygon":
+            coords = [[ring_coords(r) for r in poly] for poly in g["arcs"]]
+        else:
+            coords = [ring_coords(r) for r in g["arcs"]]
+        features.append({
+            "type": "Feature",
+            "id": g.get("id"),
+            "properties": g.get("properties", {}),
+            "geometry": {"type": g["type"], "coordinates": coords},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def load_county_boundaries(state_fips: str, zoom: float):
+    """County GeoJSON for a state at the level of detail picked for `zoom`, or None."""
+    level = pick_lod(zoom)
+    path = lod_path(state_fips, level)
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        topo = json.load(f)
+    return topology_to_geojson(topo, decimals=LOD_DECIMALS[level])
+
+
+def county_feature(geojson: dict, county_fips: str):
+    """FeatureCollection holding just `county_fips` (by properties.GEOID), or None."""
+    features = [f for f in geojson["features"] if f["properties"].get("GEOID") == county_fips]
+    return {"type": "FeatureCollection", "features": features} if features else None
+
+
+def map_view(geojson: dict, pad: float = 0.65):
+    """
+    ({"lat", "lon"} center, zoom) that frames every feature. `pad` is added
+    to the fit-to-bounds zoom; 0.65 gives Kentucky's usual view of 6.2.
+    """
+    lons, lats = [], []
+
+    def walk(coords):
+        if isinstance(coords[0], (int, float)):
+            lons.append(coords[0])
+            lats.append(coords[1])
+        else:
+            for c in coords:
+                walk(c)
+
+    for f in geojson["features"]:
+        walk(f["geometry"]["coordinates"])
+    return bounds_view(min(lats), min(lons), max(lats), max(lons), pad)
+
+
+def bounds_view(min_lat, min_lon, max_lat, max_lon, pad: float = 0.65, min_span: float = 1e-6):
+    """({"lat", "lon"} center, zoom) that frames a bounding box."""
+    lon_span = max(max_lon - min_lon, min_span)
+    lat_span = max(max_lat - min_lat, min_span)
+    zoom = min(math.log2(360 / lon_span), math.log2(180 / lat_span)) + pad
+    center = {"lat": (max_lat + min_lat) / 2, "lon": (max_lon + min_lon) / 2}
+    return center, round(zoom, 2)
@@ -0,0 +1,15 @@
+"""
+Puts code/cleaning on sys.path so the dashboard imports the pipeline's own
+helpers (h3_compat, ...) instead of keeping copies of them.
+
+    import cleaning_path  # noqa: F401
+    from h3_compat import h3_parent
+"""
+import sys
+from pathlib import Path
+
+CLEANING_DIR = Path(__file__).resolve().parent.parent / "code" / "cleaning"
+
+# appended, so an analysis module never gets shadowed by a pipeline one
+if str(CLEANING_DIR) not in sys.path:
+    sys.path.append(str(CLEANING_DIR))
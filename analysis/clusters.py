@@ -0,0 +1,66 @@
+"""
+Contiguous unserved areas (unserved_cluster table and the hex_coverage
+cluster ids, built by code/cleaning/step_unserved_clusters.py).
+
+The stored clusters use the default thresholds. While a threshold what-if
+is active the dashboard recomputes them from the hex table with the
+pipeline's own hex_adjacency / find_clusters.
+
+    clusters = read_clusters(db_path, "unserved", state_fips="21", limit=20)
+    hexes = read_cluster_hexes(db_path, clusters["cluster_id"].iloc[0])
+"""
+import sqlite3
+
+import pandas as pd
+
+import cleaning_path  # noqa: F401  (code/cleaning helpers below)
+from step_unserved_clusters import CLUSTER_LEVELS
+
+
+# ------------ DB ------------
+def _has_table(conn, table) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def read_clusters(db_path, level: str, state_fips=None, county_fips=None, limit=None, order_by: str = "hexes"):
+    """
+    Clusters of one level, largest first by `order_by` (hexes, population
+    or housing_units): one state's (FIPS prefix) or the ones touching one
+    county if given. None when the DB has no cluster table.
+    """
+    if order_by not in ("hexes", "population", "housing_units"):
+        raise ValueError(f"cannot order clusters by {order_by!r}")
+    conn = sqlite3.connect(str(db_path))
+    try:
+        if not _has_table(conn, "unserved_cluster"):
+            return None
+        sql = "SELECT * FROM unserved_cluster WHERE level = ?"
+        params = [level]
+        if county_fips is not None:
+            sql += " AND counties LIKE ?"
+            params.append(f"%{county_fips}%")
+        elif state_fips is not None:
+            sql += " AND county_fips LIKE ?"
+            params.append(f"{state_fips}%")
+        sql += f" ORDER BY {order_by} DESC, hexes DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return pd.read_sql(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def read_cluster_hexes(db_path, cluster_id: str, level: str = "unserved") -> pd.DataFrame:
+    """The hexes of one stored cluster (h3_res8_id, lat, lon, service_category), for its map."""
+    column = CLUSTER_LEVELS[level][1]
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return pd.read_sql(
+            f"SELECT h3_res8_id, lat, lon, service_category FROM hex_coverage WHERE {column} = ?",
+            conn,
+            params=(cluster_id,),
+        )
+    finally:
+        conn.close()
@@ -0,0 +1,64 @@
+"""
+Provider overlap and competition counts (provider_overlap and
+county_competition tables, built by code/cleaning/step_provider_competition.py).
+
+    overlap = read_provider_overlap(db_path, "state", "21")
+    overlap_matrix(overlap, top_providers(overlap, 15))   # square frame for a heatmap
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+
+def _read(db_path, table: str, sql: str, params=()):
+    conn = sqlite3.connect(str(db_path))
+    try:
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone():
+            return None
+        return pd.read_sql(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def read_provider_overlap(db_path, level: str, county_fips=None):
+    """
+    Overlap pairs of one level (county / state), for one county or state
+    FIPS prefix if given, or None when the DB has no overlap table.
+    """
+    sql = "SELECT * FROM provider_overlap WHERE level = ?"
+    params = [level]
+    if county_fips is not None:
+        sql += " AND county_fips LIKE ?"
+        params.append(f"{county_fips}%")
+    return _read(db_path, "provider_overlap", sql, params)
+
+
+def read_county_competition(db_path, state_fips=None):
+    """county_competition rows (one state's if given), or None when the DB has none."""
+    sql = "SELECT * FROM county_competition"
+    params = ()
+    if state_fips is not None:
+        sql += " WHERE county_fips LIKE ?"
+        params = (f"{state_fips}%",)
+    return _read(db_path, "county_competition", sql, params)
+
+
+def top_providers(overlap: pd.DataFrame, n: int) -> list:
+    """The n providers with the most hexes (the diagonal of the overlap)."""
+    own = overlap[overlap["provider_a"] == overlap["provider_b"]]
+    own = own.groupby("provider_a")["shared_hexes"].sum()
+    return own.sort_values(ascending=False).head(n).index.tolist()
+
+
+def overlap_matrix(overlap: pd.DataFrame, providers: list, column: str = "shared_hexes") -> pd.DataFrame:
+    """Symmetric provider x provider frame of `column`, summed over the rows given (e.g. counties)."""
+    pairs = overlap[overlap["provider_a"].isin(providers) & overlap["provider_b"].isin(providers)]
+    pairs = pairs.groupby(["provider_a", "provider_b"])[column].sum()
+    mat = pd.DataFrame(0, index=providers, columns=providers, dtype=np.int64)
+    for (a, b), v in pairs.items():
+        mat.loc[a, b] = v
+        mat.loc[b, a] = v
+    return mat
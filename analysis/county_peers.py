@@ -0,0 +1,112 @@
+"""
+County similarity search: "which counties look like us, and how do their
+scores compare?"
+
+Each county is a point in a feature space built from county_summary and
+the computed scores (income, education, devices, poverty, download
+speed, unserved share). Features are z-scored across the counties in
+scope and scaled by sqrt(weight), so squared distance is the weighted sum
+of squared z-gaps. A KD-tree over that matrix gives every county's
+nearest neighbors once; peer lookups afterwards are array slices.
+
+    index = build_peer_index(county_df, {"income": 2.0, "unserved": 1.0})
+    peers = nearest_peers(index, county_df, "21111", k=8)
+"""
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from county_scores import demographic_rates
+
+# feature -> label (all weighted 1 by default)
+PEER_FEATURES = {
+    "income": "Median household income",
+    "education": "Bachelor's degree share",
+    "devices": "Devices per person",
+    "poverty": "Poverty rate",
+    "speed": "Avg download speed",
+    "unserved": "Unserved hex share",
+}
+DEFAULT_WEIGHTS = {name: 1.0 for name in PEER_FEATURES}
+
+# neighbors kept per county in the index
+MAX_PEERS = 25
+
+# scores compared between a county and its peers (gap = peer - county)
+GAP_COLS = ["broadband_quality_score", "digital_readiness_index", "pct_unserved_hex"]
+
+
+def peer_features(county_df: pd.DataFrame) -> pd.DataFrame:
+    """Raw PEER_FEATURES per county, indexed by county_fips."""
+    feats = demographic_rates(county_df)
+    feats["speed"] = pd.to_numeric(county_df.get("county_avg_down", 0), errors="coerce").astype(float)
+    feats["unserved"] = pd.to_numeric(county_df.get("pct_unserved_hex", 0), errors="coerce").astype(float)
+    feats.index = county_df["county_fips"].astype(str).to_numpy()
+    feats.index.name = "county_fips"
+    return feats[list(PEER_FEATURES)]
+
+
+def feature_matrix(features: pd.DataFrame, weights: dict) -> np.ndarray:
+    """z-scored features (missing = the mean) scaled by sqrt(weight); weight 0 drops a feature."""
+    x = features.to_numpy(dtype=float)
+    mean = np.nanmean(x, axis=0) if len(x) else np.zeros(x.shape[1])
+    std = np.nanstd(x, axis=0) if len(x) else np.ones(x.shape[1])
+    mean = np.nan_to_num(mean)
+    std = np.where(np.isfinite(std) & (std > 0), std, 1.0)
+    z = np.nan_to_num((x - mean) / std)
+    w = np.array([max(float(weights.get(c, 0.0)), 0.0) for c in features.columns])
+    return z * np.sqrt(w)
+
+
+def build_peer_index(county_df: pd.DataFrame, weights: dict = None, max_peers: int = MAX_PEERS) -> dict:
+    """
+    Nearest neighbors of every county under `weights`:
+    {"fips": county order, "neighbors": (n, k) row positions, "distances": (n, k)}.
+    """
+    features = peer_features(county_df)
+    matrix = feature_matrix(features, DEFAULT_WEIGHTS if weights is None else weights)
+    n = len(matrix)
+    k = min(max_peers, n - 1)
+    if k <= 0:
+        empty = np.empty((n, 0))
+        return {"fips": features.index.to_numpy(), "neighbors": empty.astype(np.int64), "distances": empty}
+
+    # k + 1: the county itself comes back too (or a twin at distance 0)
+    dist, idx = cKDTree(matrix).query(matrix, k=k + 1)
+    self_hit = idx == np.arange(n)[:, None]
+    # drop the county itself, or the last neighbor when a twin took its slot
+    drop = np.where(self_hit.any(axis=1), self_hit.argmax(axis=1), k)
+    keep = np.ones_like(self_hit)
+    keep[np.arange(n), drop] = False
+    return {
+        "fips": features.index.to_numpy(),
+        "neighbors": idx[keep].reshape(n, k),
+        "distances": dist[keep].reshape(n, k),
+    }
+
+
+def nearest_peers(index: dict, county_df: pd.DataFrame, county_fips: str, k: int = 8) -> pd.DataFrame:
+    """
+    The k counties most like `county_fips` (closest first) with their
+    distance, PEER_FEATURES and score gaps (<score>_gap = peer - county).
+    """
+    pos = np.flatnonzero(index["fips"] == str(county_fips))
+    if len(pos) == 0:
+        return pd.DataFrame()
+    pos = pos[0]
+    k = min(k, index["neighbors"].shape[1])
+    peer_fips = index["fips"][index["neighbors"][pos, :k]]
+
+    by_fips = county_df.assign(county_fips=county_df["county_fips"].astype(str)).set_index("county_fips")
+    features = peer_features(county_df)
+    out = pd.DataFrame({"county_fips": peer_fips, "distance": index["distances"][pos, :k]})
+    out["county_name"] = by_fips["county_name"].reindex(peer_fips).to_numpy()
+    for col in PEER_FEATURES:
+        out[col] = features[col].reindex(peer_fips).to_numpy()
+    for col in GAP_COLS:
+        if col not in by_fips.columns:
+            continue
+        values = pd.to_numeric(by_fips[col], errors="coerce")
+        out[col] = values.reindex(peer_fips).to_numpy()
+        out[f"{col}_gap"] = out[col] - values.get(str(county_fips), np.nan)
+    return out
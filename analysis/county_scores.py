@@ -0,0 +1,234 @@
+"""
+County-level broadband scores shared by the dashboard and its startup snapshot.
+"""
+import pandas as pd
+
+
+def normalize_series(s: pd.Series) -> pd.Series:
+    """Normalize a numeric series to 0–1; return 0.5 if constant/empty."""
+    s = pd.to_numeric(s, errors="coerce")
+    if s.empty:
+        return pd.Series(0.5, index=s.index)
+    minv = s.min()
+    maxv = s.max()
+    if pd.isna(minv) or pd.isna(maxv) or maxv == minv:
+        return pd.Series(0.5, index=s.index)
+    return (s - minv) / (maxv - minv)
+
+
+# columns added by score_counties (dropped first when re-scoring)
+HEX_SCORE_COLS = [
+    "hex_unserved",
+    "hex_underserved",
+    "hex_served",
+    "hex_unknown",
+    "hex_total",
+    "pct_unserved_hex",
+    "pct_underserved_hex",
+    "broadband_quality_score",
+    "digital_readiness_index",
+]
+
+
+# people / housing-unit weighted counts: prefix -> hex column
+# (apportioned from census blocks by step_hex_population)
+WEIGHT_COLUMNS = {"pop": "population", "hu": "housing_units"}
+
+
+def hex_category_counts(hex_df: pd.DataFrame, hex_county: pd.DataFrame = None, weight: str = None) -> pd.DataFrame:
+    """
+    Hex counts per county (index) by service_category (columns).
+
+    With hex_county (h3_res8_id, county_fips, weight) a hex on a county line
+    counts toward each county by its area share, so the counts can be
+    fractional; without it each hex counts once for its own county_fips.
+    With `weight` (a hex column such as "population") each hex counts its
+    value instead of 1.
+    """
+    cols = ["h3_res8_id", "service_category"] + ([weight] if weight else [])
+    if hex_county is not None and len(hex_county):
+        shares = hex_county.merge(hex_df[cols], on="h3_res8_id", how="inner")
+    else:
+        shares = hex_df[cols + ["county_fips"]].assign(weight=1.0)
+    if weight:
+        shares["weight"] = shares["weight"] * pd.to_numeric(shares[weight], errors="coerce").fillna(0)
+    return (
+        shares.groupby(["county_fips", "service_category"], observed=True)["weight"]
+        .sum()
+        .unstack(fill_value=0)
+    )
+
+
+def category_columns(counts: pd.DataFrame, prefix: str) -> pd.DataFrame:
+    """
+    <prefix>_unserved / _underserved / _served / _total and
+    pct_unserved_<prefix> / pct_underserved_<prefix> from per-county
+    category counts (as from hex_category_counts).
+    """
+    counts = counts.copy()
+    counts.columns = counts.columns.astype(str)
+    out = pd.DataFrame(index=counts.index.astype(str).rename("county_fips"))
+    for cat in ["Unserved", "Underserved", "Served"]:
+        out[f"{prefix}_{cat.lower()}"] = counts[cat].to_numpy() if cat in counts.columns else 0.0
+    out[f"{prefix}_total"] = counts.sum(axis=1).to_numpy()
+    # NaN (not pd.NA) where a county has no weight, e.g. a DB built without census blocks
+    total = out[f"{prefix}_total"].where(out[f"{prefix}_total"] != 0)
+    out[f"pct_unserved_{prefix}"] = (out[f"{prefix}_unserved"] / total).astype(float)
+    out[f"pct_underserved_{prefix}"] = (out[f"{prefix}_underserved"] / total).astype(float)
+    return out
+
+
+def county_weighted_counts(hex_df: pd.DataFrame, hex_county: pd.DataFrame = None) -> pd.DataFrame:
+    """People and housing units per county by category, indexed by county_fips (needs the population columns)."""
+    return pd.concat(
+        [category_columns(hex_category_counts(hex_df, hex_county, col), prefix)
+         for prefix, col in WEIGHT_COLUMNS.items()],
+        axis=1,
+    )
+
+
+def county_distance_stats(hex_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mean and max distance_to_served (H3 rings) over each county's
+    Unserved/Underserved hexes, indexed by county_fips.
+    """
+    gaps = hex_df[hex_df["service_category"].isin(["Unserved", "Underserved"])]
+    dist = pd.to_numeric(gaps["distance_to_served"], errors="coerce")
+    return dist.groupby(gaps["county_fips"].astype(str), observed=True).agg(
+        avg_distance_to_served="mean", max_distance_to_served="max"
+    )
+
+
+def enrich_county_with_hex(
+    county_df: pd.DataFrame, hex_df: pd.DataFrame, hex_county: pd.DataFrame = None
+) -> pd.DataFrame:
+    """Attach hex service-category counts and scores to county_df."""
+    return score_counties(county_df, hex_category_counts(hex_df, hex_county))
+
+
+def demographic_rates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-county education (bachelor's share), devices per person, median
+    income and poverty rate from the county_summary columns (0 where missing).
+    """
+    edu_low = (
+        pd.to_numeric(df.get("Less_Than_9th_grade", 0), errors="coerce").fillna(0)
+        + pd.to_numeric(df.get("Less_Than_HighSchool", 0), errors="coerce").fillna(0)
+    )
+    edu_high = pd.to_numeric(df.get("Atleast_Bachelors", 0), errors="coerce").fillna(0)
+    edu_total = edu_low + edu_high
+    edu_high_share = edu_high / edu_total.replace({0: pd.NA})
+    edu_high_share = edu_high_share.fillna(0)
+
+    population = pd.to_numeric(df.get("Population", 0), errors="coerce").fillna(0)
+    desktop = pd.to_numeric(df.get("desktop_laptop_estimate", 0), errors="coerce").fillna(0)
+    smartphone = pd.to_numeric(df.get("smartphone_estimate", 0), errors="coerce").fillna(0)
+    devices_per_person = (desktop + smartphone) / population.replace({0: pd.NA})
+    devices_per_person = devices_per_person.fillna(0)
+
+    income = pd.to_numeric(
+        df.get("Median_Household_Income", 0), errors="coerce"
+    ).fillna(0)
+    poverty = pd.to_numeric(df.get("total_est_poverty", 0), errors="coerce").fillna(0)
+    poverty_rate = poverty / population.replace({0: pd.NA})
+    poverty_rate = poverty_rate.fillna(0)
+
+    return pd.DataFrame({
+        "education": edu_high_share.astype(float),
+        "devices": devices_per_person.astype(float),
+        "income": income.astype(float),
+        "poverty": poverty_rate.astype(float),
+    }, index=df.index)
+
+
+def score_counties(county_df: pd.DataFrame, svc_counts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Attach per-county category counts (as from hex_category_counts) and the
+    broadband / digital readiness scores to county_df.
+    """
+    county_df = county_df.drop(columns=HEX_SCORE_COLS, errors="ignore")
+    svc_counts = svc_counts.copy()
+    svc_counts.columns = svc_counts.columns.astype(str)
+    svc_counts.index = svc_counts.index.astype(str)
+
+    # Ensure consistent columns
+    for col in ["Unserved", "Underserved", "Served", "Unknown"]:
+        if col not in svc_counts.columns:
+            svc_counts[col] = 0
+
+    svc_counts = svc_counts.reset_index().rename(
+        columns={
+            "Unserved": "hex_unserved",
+            "Underserved": "hex_underserved",
+            "Served": "hex_served",
+            "Unknown": "hex_unknown",
+        }
+    )
+    svc_counts["hex_total"] = (
+        svc_counts["hex_unserved"]
+        + svc_counts["hex_underserved"]
+        + svc_counts["hex_served"]
+        + svc_counts["hex_unknown"]
+    )
+    svc_counts["pct_unserved_hex"] = svc_counts["hex_unserved"] / svc_counts["hex_total"].replace(
+        {0: pd.NA}
+    )
+    svc_counts["pct_underserved_hex"] = svc_counts["hex_underserved"] / svc_counts[
+        "hex_total"
+    ].replace({0: pd.NA})
+
+    df = county_df.merge(svc_counts, on="county_fips", how="left")
+
+    # Fill NaNs where appropriate
+    for col in [
+        "hex_unserved",
+        "hex_underserved",
+        "hex_served",
+        "hex_unknown",
+        "hex_total",
+    ]:
+        if col in df.columns:
+            df[col] = df[col].fillna(0)
+
+    for col in ["pct_unserved_hex", "pct_underserved_hex"]:
+        if col in df.columns:
+            df[col] = df[col].fillna(0.0)
+
+    # --------------------------------------------------
+    # Compute Broadband Quality Score
+    # --------------------------------------------------
+    unserved_rate = df["pct_unserved_hex"].clip(0, 1)
+    underserved_rate = df["pct_underserved_hex"].clip(0, 1)
+    down_norm = normalize_series(df.get("county_avg_down", 0))
+    prov_norm = normalize_series(df.get("provider_count", 0))
+
+    # Higher is better: lower un/underserved, higher down speed, more providers
+    df["broadband_quality_score"] = 100 * (
+        (1 - unserved_rate) * 0.4
+        + (1 - underserved_rate) * 0.2
+        + down_norm * 0.25
+        + prov_norm * 0.15
+    )
+
+    # --------------------------------------------------
+    # Compute Digital Readiness Index
+    # --------------------------------------------------
+    rates = demographic_rates(df)
+    edu_high_share = rates["education"]
+    devices_per_person = rates["devices"]
+    income = rates["income"]
+    poverty_comfort = 1 - rates["poverty"]  # higher is better
+
+    edu_norm = normalize_series(edu_high_share)
+    device_norm = normalize_series(devices_per_person)
+    income_norm = normalize_series(income)
+    poverty_norm = normalize_series(poverty_comfort)
+
+    df["digital_readiness_index"] = 100 * (
+
+        + device_norm * 0.50
+        + income_norm * 0.50
+
+    )
+
+    return df
@@ -0,0 +1,87 @@
+"""
+Filter logic behind the dashboard's top filter bar.
+
+Kept out of app.py so it can be timed and reused without a Streamlit
+session (see benchmarks/run_benchmarks.py).
+"""
+import numpy as np
+import pandas as pd
+
+ALL_SERVICES = "All"
+ALL_PROVIDERS = "All providers"
+ALL_TECHS = "All technologies"
+
+
+def contains_mask(s: pd.Series, text: str) -> pd.Series:
+    """
+    Boolean mask of rows whose string contains `text` (literal, not regex).
+
+    For categoricals the substring test runs once per distinct value and is
+    mapped back through the integer codes.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        hit = s.cat.categories.astype(str).str.contains(text, regex=False)
+        return pd.Series(np.isin(s.cat.codes, np.flatnonzero(hit)), index=s.index)
+    return s.fillna("").astype(str).str.contains(text, regex=False)
+
+
+def filter_hex(
+    hex_df: pd.DataFrame,
+    county_fips=None,
+    service=ALL_SERVICES,
+    provider=ALL_PROVIDERS,
+    tech=ALL_TECHS,
+) -> pd.DataFrame:
+    """Hex rows matching the county, service category, provider and tech filters."""
+    out = hex_df
+    if county_fips is not None:
+        out = out[out["county_fips"] == county_fips]
+
+    if service != ALL_SERVICES:
+        out = out[out["service_category"] == service]
+
+    if provider != ALL_PROVIDERS:
+        out = out[contains_mask(out["provider_names"], provider)]
+
+    if tech != ALL_TECHS:
+        out = out[contains_mask(out["tech_types"], tech)]
+    return out
+
+
+def filter_providers(
+    provider_df: pd.DataFrame, county_fips=None, provider=ALL_PROVIDERS
+) -> pd.DataFrame:
+    """Provider-by-county rows for the county and provider filters."""
+    out = provider_df
+    if county_fips is not None:
+        out = out[out["county_fips"] == county_fips]
+    if provider != ALL_PROVIDERS:
+        out = out[out["provider_name"] == provider]
+    return out
+
+
+def scope_kpis(scope_counties_df: pd.DataFrame) -> dict:
+    """Demographic totals and population-weighted scores for the counties in scope."""
+    def total(col):
+        return pd.to_numeric(scope_counties_df[col], errors="coerce").sum()
+
+    pop_total = total("Population")
+    kpis = {
+        "pop_total": pop_total,
+        "poverty_rate": total("total_est_poverty") / pop_total if pop_total > 0 else 0.0,
+        "area_total": total("area_sq_mi"),
+        "desktop_total": total("desktop_laptop_estimate"),
+        "smart_total": total("smartphone_estimate"),
+    }
+
+    if len(scope_counties_df) == 1:
+        row = scope_counties_df.iloc[0]
+        kpis["bqs"] = float(row["broadband_quality_score"])
+        kpis["dri"] = float(row["digital_readiness_index"])
+    else:
+        # population-weighted average across counties
+        w = pd.to_numeric(scope_counties_df["Population"], errors="coerce").fillna(0)
+        w_sum = w.replace({0: pd.NA}).sum()
+        kpis["bqs"] = (scope_counties_df["broadband_quality_score"] * w).sum() / w_sum
+        kpis["dri"] = (scope_counties_df["digital_readiness_index"] * w).sum() / w_sum
+    return kpis
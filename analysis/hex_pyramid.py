@@ -0,0 +1,98 @@
+"""
+Precomputed H3 parents of the hex table (hex_pyramid, built by
+code/cleaning/step_hex_pyramid.py): per county, res 7 / 6 / 5 cells with
+category counts, speed ranges, providers, locations and population.
+
+Maps and exports read the finest resolution whose cell count stays under
+a point budget, through the (resolution, county_fips) primary key. The
+table holds the default-threshold categories; while a what-if or a
+provider/technology filter is active the dashboard rolls up the filtered
+hexes itself.
+
+    sizes = read_pyramid_sizes(db_path, county_fips="21111")   # {7: 412, 6: 70, 5: 14}
+    res = pick_resolution(sizes, n_hexes, max_points)
+    cells = read_pyramid(db_path, res, county_fips="21111")
+    state = merge_counties(read_pyramid(db_path, 6, state_fips="21"))
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import cleaning_path  # noqa: F401  (code/cleaning helpers below)
+from step_hex_pyramid import CATEGORY_SEVERITY, PYRAMID_RESOLUTIONS  # noqa: F401  (re-exported)
+
+_SUM_COLS = ["hex_count", "hex_unserved", "hex_underserved", "hex_unknown", "hex_served",
+             "locations", "population", "housing_units"]
+_MIN_COLS = ["min_down", "min_up"]
+# providers is a distinct count per county row; across counties the max is a lower bound
+_MAX_COLS = ["best_down", "best_up", "max_provider_count", "providers", "distance_to_served"]
+
+
+def _has_table(conn, table) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def _scope(state_fips=None, county_fips=None) -> tuple:
+    if county_fips is not None:
+        return " AND county_fips = ?", [county_fips]
+    if state_fips is not None:
+        return " AND county_fips LIKE ?", [f"{state_fips}%"]
+    return "", []
+
+
+def read_pyramid(db_path, resolution: int, state_fips=None, county_fips=None):
+    """Cells of one resolution for one county or state (per county row), or None without the table."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        if not _has_table(conn, "hex_pyramid"):
+            return None
+        where, params = _scope(state_fips, county_fips)
+        return pd.read_sql(
+            f"SELECT * FROM hex_pyramid WHERE resolution = ?{where}", conn, params=[int(resolution)] + params
+        )
+    finally:
+        conn.close()
+
+
+def read_pyramid_sizes(db_path, state_fips=None, county_fips=None):
+    """{resolution: distinct cells} in scope, or None without the table."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        if not _has_table(conn, "hex_pyramid"):
+            return None
+        where, params = _scope(state_fips, county_fips)
+        rows = conn.execute(
+            f"SELECT resolution, COUNT(DISTINCT h3_cell) FROM hex_pyramid WHERE 1 = 1{where} GROUP BY resolution",
+            params,
+        )
+        return {int(res): int(n) for res, n in rows}
+    finally:
+        conn.close()
+
+
+def pick_resolution(sizes: dict, n_hexes: int, max_points: int, finest: int = 8) -> int:
+    """Finest resolution (res 8 = the hexes themselves) with at most max_points cells; the coarsest otherwise."""
+    if n_hexes <= max_points or not sizes:
+        return finest
+    for res in sorted(sizes, reverse=True):
+        if sizes[res] <= max_points:
+            return res
+    return min(sizes)
+
+
+def merge_counties(cells: pd.DataFrame) -> pd.DataFrame:
+    """One row per cell: county rows of a cell on a county line combined."""
+    if cells["h3_cell"].is_unique:
+        return cells.reset_index(drop=True)
+    grouped = cells.groupby("h3_cell", sort=False)
+    out = grouped[[c for c in _SUM_COLS if c in cells.columns]].sum(min_count=1)
+    out = out.join(grouped[[c for c in _MIN_COLS if c in cells.columns]].min())
+    out = out.join(grouped[[c for c in _MAX_COLS if c in cells.columns]].max())
+    out = out.join(grouped[["resolution", "county_fips", "lat", "lon"]].first())
+    # worst category present, from the merged counts
+    counts = out[[f"hex_{c.lower()}" for c in CATEGORY_SEVERITY]].to_numpy()
+    out["service_category"] = np.array(CATEGORY_SEVERITY)[(counts > 0).argmax(axis=1)]
+    return out.reset_index()[cells.columns.tolist()]
@@ -0,0 +1,97 @@
+"""
+Distinct-location estimates from the sketches in the location_sketch table
+(built by code/cleaning/step_location_sketches.py).
+
+Each sketch is either an exact sorted set of 64-bit location hashes (b"S")
+or a HyperLogLog register array (b"D"). Merging sketches gives the
+distinct locations of the union, so any roll-up of counties, providers or
+hexes is answered without the raw rows:
+
+    distinct_locations(sketch_df["sketch"])
+    rollup(sketch_df, "provider_id")     # one estimate per provider
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import cleaning_path  # noqa: F401  (code/cleaning helpers below)
+from step_location_sketches import hll_registers, sparse_max
+
+
+def read_sketches(db_path, level: str, state_fips=None):
+    """
+    Sketch rows of one level (county / provider / hex), for one state if
+    given, or None when the DB was built without location sketches.
+    """
+    conn = sqlite3.connect(str(db_path))
+    try:
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'location_sketch'"
+        ).fetchone():
+            return None
+        sql = (
+            "SELECT county_fips, provider_id, h3_res8_id, distinct_locations, sketch "
+            "FROM location_sketch WHERE level = ?"
+        )
+        params = [level]
+        if state_fips is not None:
+            sql += " AND county_fips LIKE ?"
+            params.append(f"{state_fips}%")
+        return pd.read_sql(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def decode(blob: bytes):
+    """(kind, p, array): kind "S" -> uint64 hashes, "D" -> uint8 registers."""
+    kind, p = blob[:1].decode(), blob[1]
+    dtype = "<u8" if kind == "S" else np.uint8
+    return kind, p, np.frombuffer(blob, dtype=dtype, offset=2)
+
+
+def hll_estimate(regs: np.ndarray) -> float:
+    """HyperLogLog estimate with the small-range (linear counting) correction."""
+    m = len(regs)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    est = alpha * m * m / np.sum(np.ldexp(1.0, -regs.astype(np.int64)))
+    zeros = int(np.count_nonzero(regs == 0))
+    if est <= 2.5 * m and zeros:
+        est = m * np.log(m / zeros)
+    return float(est)
+
+
+def merge(blobs) -> tuple:
+    """
+    Union of sketches as ("S", hashes) while the exact set stays small
+    enough, otherwise ("D", registers).
+    """
+    hash_sets, dense, precisions = [], [], set()
+    for blob in blobs:
+        kind, p, arr = decode(blob)
+        precisions.add(p)
+        (hash_sets if kind == "S" else dense).append(arr)
+    if not precisions:
+        return "S", np.empty(0, dtype=np.uint64)
+    if len(precisions) > 1:
+        raise ValueError(f"Cannot merge sketches with different precisions: {sorted(precisions)}")
+    p = precisions.pop()
+
+    hashes = np.unique(np.concatenate(hash_sets)) if hash_sets else np.empty(0, dtype=np.uint64)
+    if not dense and len(hashes) <= sparse_max(p):
+        return "S", hashes
+    regs = hll_registers(hashes, p)
+    for d in dense:
+        np.maximum(regs, d, out=regs)
+    return "D", regs
+
+
+def distinct_locations(blobs) -> float:
+    """Distinct locations across all the given sketches (exact while small)."""
+    kind, arr = merge(blobs)
+    return float(len(arr)) if kind == "S" else hll_estimate(arr)
+
+
+def rollup(sketch_df: pd.DataFrame, by) -> pd.Series:
+    """Distinct-location estimate per group of `by` over a frame with a `sketch` column."""
+    return sketch_df.groupby(by, observed=True)["sketch"].agg(distinct_locations)
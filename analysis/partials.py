@@ -0,0 +1,62 @@
+"""
+Roll-ups over the agg_partials table (built by
+code/cleaning/step_aggregate_partials.py).
+
+Every partial row holds records, sums, sums of squares, min and max of
+download/upload speed for one county x provider x technology x service
+flag, so any grouping is an exact sum over a small table:
+
+    rollup_partials(partials, "tech_group")
+    rollup_partials(partials[partials["county_fips"].isin(region)], "provider_name")
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+SUM_COLS = ["records", "underserved_records", "down_sum", "down_sumsq", "up_sum", "up_sumsq"]
+
+
+def read_partials(db_path, state_fips=None):
+    """agg_partials rows (one state's if given), or None when the DB has no partials."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'agg_partials'"
+        ).fetchone():
+            return None
+        if state_fips is None:
+            return pd.read_sql("SELECT * FROM agg_partials", conn)
+        return pd.read_sql(
+            "SELECT * FROM agg_partials WHERE county_fips LIKE ?", conn, params=(f"{state_fips}%",)
+        )
+    finally:
+        conn.close()
+
+
+def rollup_partials(partials: pd.DataFrame, by=None) -> pd.DataFrame:
+    """
+    Combine partials per group of `by` (all rows if None) into records,
+    underserved share and mean / std / min / max download and upload.
+    """
+    df = partials.assign(underserved_records=partials["records"] * partials["is_underserved"])
+    if by is None:
+        df = df.assign(_all="All")
+        by = "_all"
+    grouped = df.groupby(by, observed=True, dropna=False)
+    out = grouped[SUM_COLS].sum()
+    out[["down_min", "up_min"]] = grouped[["down_min", "up_min"]].min()
+    out[["down_max", "up_max"]] = grouped[["down_max", "up_max"]].max()
+
+    n = out["records"].where(out["records"] > 0)
+    result = pd.DataFrame(index=out.index)
+    result["records"] = out["records"]
+    result["pct_underserved"] = out["underserved_records"] / n * 100
+    for d in ["down", "up"]:
+        mean = out[f"{d}_sum"] / n
+        var = (out[f"{d}_sumsq"] / n - mean ** 2).clip(lower=0)
+        result[f"{d}_mean"] = mean
+        result[f"{d}_std"] = np.sqrt(var)
+        result[f"{d}_min"] = out[f"{d}_min"]
+        result[f"{d}_max"] = out[f"{d}_max"]
+    return result.reset_index().drop(columns="_all", errors="ignore")
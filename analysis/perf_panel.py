@@ -0,0 +1,330 @@
+"""
+Opt-in performance panel for the dashboard.
+
+Times named blocks of one script rerun, records the serialized size of every
+Plotly figure sent to the browser, counts cache hits/misses per cached
+loader and samples process RSS. Turn it on per browser tab with `?perf=1`
+in the URL, or for every session with KY_PERF_PANEL=1.
+
+Set KY_PERF_LOG=path (or tick "append reruns to log" in the panel) to
+append one JSON line per rerun, then aggregate across sessions with
+
+    python analysis/perf_panel.py summarize logs/dashboard/perf.jsonl
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+import cleaning_path  # noqa: F401  (code/cleaning helpers below)
+from pipeline_trace import process_rss_mb
+
+THIS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = THIS_DIR.parent
+DEFAULT_LOG_PATH = PROJECT_ROOT / "logs" / "dashboard" / "perf.jsonl"
+
+# profiler of the rerun running on this thread (Streamlit runs each
+# session's script on its own thread)
+_local = threading.local()
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes", "on")
+
+
+def _mb(value):
+    return round(value, 1) if value is not None else None
+
+
+# ==================================================
+# PER-RERUN PROFILER
+# ==================================================
+class RerunProfiler:
+    """Collects block timings, figure sizes and cache counts for one rerun."""
+
+    def __init__(self, enabled: bool, show_panel: bool = False, started: float = None):
+        self.enabled = enabled
+        self.show_panel = show_panel
+        self.started = time.perf_counter() if started is None else started
+        self.blocks = []
+        self.figures = []
+        self.cache = {}
+        self.context = {}
+        self._depth = 0
+
+    @contextmanager
+    def block(self, name: str):
+        """Time the enclosed code as one named row of the breakdown."""
+        if not self.enabled:
+            yield
+            return
+        rec = {"name": name, "depth": self._depth}
+        self.blocks.append(rec)
+        rss0 = process_rss_mb()
+        t0 = time.perf_counter()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            rec["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            rss1 = process_rss_mb()
+            rec["rss_delta_mb"] = _mb(rss1 - rss0) if rss0 is not None and rss1 is not None else None
+
+    def plotly_chart(self, name: str, fig, **kwargs):
+        """
+        st.plotly_chart that also records the figure's JSON payload size and
+        how long serializing and sending it took. The payload is serialized an
+        extra time to measure it, so only when the profiler is on.
+        """
+        import streamlit as st
+
+        if not self.enabled:
+            return st.plotly_chart(fig, **kwargs)
+
+        import plotly.io as pio
+
+        t0 = time.perf_counter()
+        payload = pio.to_json(fig, validate=False)
+        t1 = time.perf_counter()
+        result = st.plotly_chart(fig, **kwargs)
+        t2 = time.perf_counter()
+        self.figures.append(
+            {
+                "name": name,
+                "payload_kb": round(len(payload.encode()) / 1024, 1),
+                "traces": len(fig.data),
+                "serialize_ms": round((t1 - t0) * 1000, 2),
+                "chart_ms": round((t2 - t1) * 1000, 2),
+            }
+        )
+        return result
+
+    def count_cache(self, func_name: str, event: str):
+        counts = self.cache.setdefault(func_name, {"calls": 0, "misses": 0})
+        counts[event] += 1
+
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 2)
+
+    def record(self, session_id: str, rerun: int) -> dict:
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "session": session_id,
+            "pid": os.getpid(),
+            "rerun": rerun,
+            "total_ms": self.total_ms(),
+            "rss_mb": _mb(process_rss_mb()),
+            "context": self.context,
+            "blocks": self.blocks,
+            "figures": self.figures,
+            "cache": {
+                name: {"hits": c["calls"] - c["misses"], "misses": c["misses"]}
+                for name, c in self.cache.items()
+            },
+        }
+
+
+def start_rerun(started: float = None) -> RerunProfiler:
+    """
+    Create the profiler for this rerun and make it current on this thread.
+    It only times anything when the panel is open or a log is configured.
+    """
+    show_panel = panel_requested()
+    prof = RerunProfiler(show_panel or log_path() is not None, show_panel, started)
+    _local.profiler = prof
+    return prof
+
+
+def current() -> RerunProfiler:
+    return getattr(_local, "profiler", None)
+
+
+def track_cache(cache_decorator, **cache_kwargs):
+    """
+    Wrap a Streamlit cache decorator so calls and misses are counted.
+
+    The counter inside the cached function only runs on a miss; the one
+    outside runs on every call, so hits = calls - misses.
+
+        @track_cache(st.cache_data, show_spinner="Loading…")
+        def load_something(): ...
+    """
+
+    def wrap(func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def on_miss(*args, **kwargs):
+            prof = current()
+            if prof is not None:
+                prof.count_cache(name, "misses")
+            return func(*args, **kwargs)
+
+        cached = cache_decorator(**cache_kwargs)(on_miss) if cache_kwargs else cache_decorator(on_miss)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            prof = current()
+            if prof is not None:
+                prof.count_cache(name, "calls")
+            return cached(*args, **kwargs)
+
+        call.clear = cached.clear
+        return call
+
+    return wrap
+
+
+# ==================================================
+# PANEL + LOG
+# ==================================================
+def panel_requested() -> bool:
+    import streamlit as st
+
+    return _env_flag("KY_PERF_PANEL") or st.query_params.get("perf") == "1"
+
+
+def log_path():
+    """Log file from KY_PERF_LOG, or None when production logging is off."""
+    env = os.environ.get("KY_PERF_LOG")
+    if not env or env == "off":
+        return None
+    return Path(env)
+
+
+def append_log(path: Path, rec: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # one short write per line so concurrent workers don't interleave
+    with open(path, "a") as f:
+        f.write(json.dumps(rec) + "\n")
+
+
+def finish_rerun(prof: RerunProfiler):
+    """Render the panel (if asked for) and append the rerun to the log."""
+    import streamlit as st
+
+    if not prof.enabled:
+        return
+    state = st.session_state
+    state.setdefault("perf_session", uuid.uuid4().hex[:12])
+    state["perf_rerun"] = state.get("perf_rerun", 0) + 1
+    rec = prof.record(state["perf_session"], state["perf_rerun"])
+
+    path = log_path()
+    if path is None and state.get("perf_log_enabled"):
+        path = DEFAULT_LOG_PATH
+    if path is not None:
+        append_log(path, rec)
+
+    if prof.show_panel:
+        render_panel(rec, path)
+
+
+def render_panel(rec: dict, path):
+    import streamlit as st
+
+    with st.expander("⏱ Performance (this rerun)", expanded=True):
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Rerun total", f"{rec['total_ms']:,.0f} ms")
+        m2.metric("Process RSS", f"{rec['rss_mb']:,.0f} MB" if rec["rss_mb"] is not None else "n/a")
+        m3.metric("Figure payload", f"{sum(f['payload_kb'] for f in rec['figures']):,.0f} KB")
+        m4.metric("Rerun #", rec["rerun"])
+
+        p1, p2 = st.columns([1.3, 1])
+        with p1:
+            st.markdown("**Blocks**")
+            blocks = pd.DataFrame(rec["blocks"], columns=["name", "depth", "ms", "rss_delta_mb"])
+            blocks["name"] = ["  " * d + n for d, n in zip(blocks["depth"], blocks["name"])]
+            blocks["% of rerun"] = (blocks["ms"] / max(rec["total_ms"], 1e-9) * 100).round(1)
+            st.dataframe(blocks.drop(columns="depth"), hide_index=True, use_container_width=True)
+        with p2:
+            st.markdown("**Figures**")
+            st.dataframe(
+                pd.DataFrame(rec["figures"], columns=["name", "payload_kb", "traces", "serialize_ms", "chart_ms"]),
+                hide_index=True,
+                use_container_width=True,
+            )
+            st.markdown("**Cache**")
+            st.dataframe(
+                pd.DataFrame.from_dict(rec["cache"], orient="index", columns=["hits", "misses"]),
+                use_container_width=True,
+            )
+
+        st.checkbox(
+            "Append reruns to log",
+            key="perf_log_enabled",
+            disabled=log_path() is not None,
+            help=f"Writes one JSON line per rerun to {DEFAULT_LOG_PATH.relative_to(PROJECT_ROOT)}.",
+        )
+        if path is not None:
+            st.caption(f"Logging to `{path}`")
+
+
+# ==================================================
+# AGGREGATE LOGS
+# ==================================================
+def summarize_log(path: Path) -> dict:
+    """Per-block, per-figure and per-cache aggregates over a perf log."""
+    with open(path) as f:
+        recs = [json.loads(line) for line in f if line.strip()]
+
+    blocks = pd.DataFrame([b for r in recs for b in r["blocks"]])
+    figures = pd.DataFrame([fig for r in recs for fig in r["figures"]])
+    cache = pd.DataFrame(
+        [{"function": k, **v} for r in recs for k, v in r["cache"].items()]
+    )
+    totals = pd.Series([r["total_ms"] for r in recs], dtype=float)
+
+    def pct(q):
+        return lambda s: s.quantile(q)
+
+    out = {
+        "reruns": len(recs),
+        "sessions": len({r["session"] for r in recs}),
+        "total_ms": totals.describe(percentiles=[0.5, 0.95]),
+        "peak_rss_mb": max((r["rss_mb"] for r in recs if r.get("rss_mb") is not None), default=None),
+    }
+    if not blocks.empty:
+        out["blocks"] = blocks.groupby("name", sort=False)["ms"].agg(
+            ["count", pct(0.5), pct(0.95), "max"]
+        ).set_axis(["count", "p50_ms", "p95_ms", "max_ms"], axis=1)
+    if not figures.empty:
+        out["figures"] = figures.groupby("name", sort=False).agg(
+            count=("payload_kb", "size"),
+            p50_kb=("payload_kb", "median"),
+            max_kb=("payload_kb", "max"),
+            p50_serialize_ms=("serialize_ms", "median"),
+        )
+    if not cache.empty:
+        c = cache.groupby("function")[["hits", "misses"]].sum()
+        c["hit_rate"] = (c["hits"] / (c["hits"] + c["misses"]).clip(lower=1)).round(3)
+        out["cache"] = c
+    return out
+
+
+def main(argv):
+    if len(argv) != 2 or argv[0] != "summarize":
+        print("usage: perf_panel.py summarize PERF_LOG.jsonl")
+        return 2
+    summary = summarize_log(Path(argv[1]))
+    peak = summary["peak_rss_mb"]
+    print(f"{summary['reruns']} reruns from {summary['sessions']} sessions, "
+          f"peak RSS {f'{peak:,.0f} MB' if peak is not None else 'n/a'}")
+    t = summary["total_ms"]
+    print(f"rerun total: p50 {t['50%']:,.0f} ms · p95 {t['95%']:,.0f} ms · max {t['max']:,.0f} ms\n")
+    for key in ("blocks", "figures", "cache"):
+        if key in summary:
+            print(summary[key].round(3 if key == "cache" else 1).to_string(), "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,133 @@
+"""
+Provider exit / upgrade / entry scenarios on the hex x provider speed
+matrix (the hex_provider table, built by code/cleaning/step_h3_points.py).
+
+The matrix holds every provider's best download and upload in every hex
+as two scipy CSR matrices whose rows line up with the hex table, so a
+scenario is a mask over the stored entries plus a row-wise max:
+
+    m = provider_matrix(hex_df["h3_res8_id"], read_hex_provider(db_path))
+    after = simulate(m, remove=["130077"], hex_mask=(hex_df["county_fips"] == "21195").to_numpy())
+    after["service_category"].value_counts()
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import cleaning_path  # noqa: F401  (code/cleaning helpers below)
+from step_h3_points import UNDERSERVED_BELOW, UNSERVED_BELOW, classify_speeds
+
+
+def _has_hex_provider(conn) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hex_provider'"
+    ).fetchone() is not None
+
+
+def has_hex_provider(db_path) -> bool:
+    """Whether the DB has the hex x provider table scenarios are built from (no rows read)."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return _has_hex_provider(conn)
+    finally:
+        conn.close()
+
+
+def read_hex_provider(db_path, state_fips=None):
+    """hex_provider rows (one state's if given), or None when the DB has no hex x provider table."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        if not _has_hex_provider(conn):
+            return None
+        sql = "SELECT h3_res8_id, provider_id, max_down, max_up FROM hex_provider"
+        if state_fips is None:
+            return pd.read_sql(sql, conn)
+        return pd.read_sql(sql + " WHERE county_fips LIKE ?", conn, params=(f"{state_fips}%",))
+    finally:
+        conn.close()
+
+
+def provider_matrix(hex_ids, hex_provider: pd.DataFrame) -> dict:
+    """
+    {"down", "up"}: CSR hex x provider speed matrices with one row per entry
+    of `hex_ids` (in order), "providers": provider_id per column and "row":
+    the row of every stored entry (for masking by hex).
+    """
+    hex_ids = pd.Index(np.asarray(hex_ids))
+    rows = hex_ids.get_indexer(hex_provider["h3_res8_id"])
+    keep = rows >= 0
+    rows = rows[keep]
+    cols, providers = pd.factorize(hex_provider["provider_id"].to_numpy()[keep])
+    shape = (len(hex_ids), len(providers))
+
+    down = sparse.csr_matrix(
+        (hex_provider["max_down"].to_numpy(dtype=np.float32)[keep], (rows, cols)), shape=shape
+    )
+    up = sparse.csr_matrix(
+        (hex_provider["max_up"].to_numpy(dtype=np.float32)[keep], (rows, cols)), shape=shape
+    )
+    down.sort_indices()
+    up.sort_indices()
+    # both matrices share the same sparsity pattern (one entry per hex x provider)
+    row = np.repeat(np.arange(shape[0]), np.diff(down.indptr))
+    return {"down": down, "up": up, "providers": pd.Index(providers), "row": row}
+
+
+def _provider_codes(m: dict, provider_ids) -> np.ndarray:
+    codes = m["providers"].get_indexer(list(provider_ids))
+    return codes[codes >= 0]
+
+
+def simulate(
+    m: dict,
+    remove=(),
+    upgrade=None,
+    enter=None,
+    hex_mask=None,
+    unserved_below=UNSERVED_BELOW,
+    underserved_below=UNDERSERVED_BELOW,
+) -> pd.DataFrame:
+    """
+    Best speeds and service category of every hex after a scenario.
+
+    remove:   provider_ids that stop serving
+    upgrade:  {provider_id: (down, up)} raising that provider's speeds
+              where it already serves
+    enter:    {provider_id: (down, up)} offered in every hex in scope
+    hex_mask: boolean array over the hexes limiting the changes to them
+              (e.g. one county); all hexes when None
+    """
+    down_data = m["down"].data.copy()
+    up_data = m["up"].data.copy()
+    cols = m["down"].indices
+    in_scope = np.ones(len(cols), dtype=bool) if hex_mask is None else np.asarray(hex_mask)[m["row"]]
+
+    if len(remove):
+        hit = np.isin(cols, _provider_codes(m, remove)) & in_scope
+        down_data[hit] = 0
+        up_data[hit] = 0
+
+    for provider_id, (new_down, new_up) in (upgrade or {}).items():
+        hit = np.isin(cols, _provider_codes(m, [provider_id])) & in_scope
+        down_data[hit] = np.maximum(down_data[hit], new_down)
+        up_data[hit] = np.maximum(up_data[hit], new_up)
+
+    def row_max(data):
+        mat = sparse.csr_matrix((data, m["down"].indices, m["down"].indptr), shape=m["down"].shape)
+        return mat.max(axis=1).toarray().ravel()
+
+    best_down = row_max(down_data)
+    best_up = row_max(up_data)
+
+    if enter:
+        scope = slice(None) if hex_mask is None else np.asarray(hex_mask)
+        best_down[scope] = np.maximum(best_down[scope], max(d for d, _ in enter.values()))
+        best_up[scope] = np.maximum(best_up[scope], max(u for _, u in enter.values()))
+
+    return pd.DataFrame({
+        "max_down": best_down.astype(np.float32),
+        "max_up": best_up.astype(np.float32),
+        "service_category": classify_speeds(best_down, best_up, unserved_below, underserved_below),
+    })
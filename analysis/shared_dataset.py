@@ -0,0 +1,228 @@
+"""
+Memory-mapped, read-only copies of the large dashboard tables.
+
+The hex and provider tables are exported once from SQLite to uncompressed
+Arrow IPC files next to the DB. Every Streamlit worker process memory-maps
+the same file and wraps the Arrow buffers as pandas columns without
+copying, so N workers share one copy of the data through the OS page cache
+instead of holding N private copies.
+
+Run `python analysis/shared_dataset.py [path/to/db]` after building the DB
+to export ahead of time; otherwise the first dashboard load does it. A DB
+holding several states (code/cleaning/run_pipeline.py --db-mode
+partitioned) is exported one state at a time.
+"""
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+THIS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = THIS_DIR.parent
+DB_PATH = PROJECT_ROOT / "db" / "broadband_ky.db"
+
+# bump when the exported schema changes so stale files are rebuilt
+DATASET_VERSION = "3"
+
+# Compact in-memory schema. Repeated strings become categoricals (one
+# dictionary per column, small integer codes per row); coordinates and
+# speeds don't need float64 precision.
+HEX_SCHEMA = {
+    "county_fips": "category",
+    "service_category": "category",
+    "provider_names": "category",
+    "tech_types": "category",
+    "lat": "float32",
+    "lon": "float32",
+    "max_down": "float32",
+    "max_up": "float32",
+    "provider_count": "int16",
+    "distance_to_served": "float32",
+    "population": "float32",
+    "housing_units": "float32",
+}
+PROVIDER_SCHEMA = {
+    "county_fips": "category",
+    "county_name": "category",
+    "provider_id": "category",
+    "provider_name": "category",
+    "avg_down": "float32",
+    "avg_up": "float32",
+}
+
+SHARED_TABLES = {
+    "hex_coverage": HEX_SCHEMA,
+    "provider_summary_by_county": PROVIDER_SCHEMA,
+}
+
+# DBs built before run_pipeline.py have no state_partition table
+DEFAULT_STATE = {"state_fips": "21", "state_usps": "KY", "state_name": "Kentucky"}
+
+
+def apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Cast the columns present in `df` to the dtypes in `schema`."""
+    casts = {col: dtype for col, dtype in schema.items() if col in df.columns}
+    if "provider_count" in casts and df["provider_count"].isna().any():
+        casts["provider_count"] = "Int16"
+    return df.astype(casts)
+
+
+def pad_fips(s: pd.Series) -> pd.Series:
+    """Zero-pad county FIPS to 5 chars (on the dictionary only for categoricals)."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.rename_categories(lambda c: str(c).zfill(5))
+    return s.astype(str).str.zfill(5)
+
+
+def split_multi_values(s: pd.Series, sep: str = ";") -> list:
+    """Sorted distinct items in a column of `sep`-joined strings."""
+    values = s.cat.categories if isinstance(s.dtype, pd.CategoricalDtype) else s.dropna().unique()
+    items = set()
+    for val in values:
+        for t in str(val).split(sep):
+            t = t.strip()
+            if t:
+                items.add(t)
+    return sorted(items)
+
+
+def count_multi_values(s: pd.Series, sep: str = ";", missing: str = "Unknown") -> dict:
+    """
+    Row counts per item in a column of `sep`-joined strings.
+
+    Counts each distinct string once, then splits it, instead of exploding
+    every row.
+    """
+    combo_counts = s.astype(object).fillna(missing).value_counts()
+    totals = {}
+    for combo, n in combo_counts.items():
+        for t in str(combo).split(sep):
+            t = t.strip()
+            if t:  # drop blanks just in case
+                totals[t] = totals.get(t, 0) + int(n)
+    return totals
+
+
+def db_states(db_path: Path) -> list:
+    """States held by a DB, from its state_partition table (Kentucky if it has none)."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        rows = conn.execute(
+            "SELECT state_fips, state_usps, state_name FROM state_partition ORDER BY state_name"
+        ).fetchall()
+    except sqlite3.DatabaseError:
+        rows = []
+    finally:
+        conn.close()
+    if not rows:
+        return [DEFAULT_STATE]
+    return [dict(zip(["state_fips", "state_usps", "state_name"], r)) for r in rows]
+
+
+def arrow_path(db_path: Path, table: str, state_fips=None) -> Path:
+    db_path = Path(db_path)
+    state = f".{state_fips}" if state_fips else ""
+    return db_path.with_name(f"{db_path.stem}{state}.{table}.arrow")
+
+
+def read_state_rows(conn, table: str, columns: str = "*", state_fips=None) -> pd.DataFrame:
+    """Rows of `table` for one state (by county_fips prefix), or all rows."""
+    if state_fips is None:
+        return pd.read_sql(f"SELECT {columns} FROM {table}", conn)
+    return pd.read_sql(
+        f"SELECT {columns} FROM {table} WHERE county_fips LIKE ?", conn, params=(f"{state_fips}%",)
+    )
+
+
+# ==================================================
+# EXPORT (SQLite -> Arrow IPC file)
+# ==================================================
+def export_table(db_path: Path, table: str, state_fips=None) -> Path:
+    """Write `table` (one state's rows if given) to an Arrow file; returns the path."""
+    conn = sqlite3.connect(str(db_path))
+    df = read_state_rows(conn, table, state_fips=state_fips)
+    conn.close()
+
+    df = apply_schema(df, SHARED_TABLES[table])
+    if "county_fips" in df.columns:
+        df["county_fips"] = pad_fips(df["county_fips"])
+
+    arrow_table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    arrow_table = arrow_table.replace_schema_metadata(
+        {"dataset_version": DATASET_VERSION}
+    )
+
+    out_path = arrow_path(db_path, table, state_fips)
+    # write under a per-process name, then atomically swap into place, so
+    # workers starting together never map a half-written file
+    tmp_path = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
+    with ipc.new_file(str(tmp_path), arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def is_stale(db_path: Path, table: str, state_fips=None) -> bool:
+    path = arrow_path(db_path, table, state_fips)
+    if not path.exists() or path.stat().st_mtime < Path(db_path).stat().st_mtime:
+        return True
+    with pa.memory_map(str(path), "r") as source:
+        meta = ipc.open_file(source).schema.metadata or {}
+    return meta.get(b"dataset_version") != DATASET_VERSION.encode()
+
+
+# ==================================================
+# ATTACH (memory-map, zero-copy to pandas)
+# ==================================================
+def _column_to_series(name: str, col: pa.ChunkedArray) -> pd.Series:
+    """Wrap one single-chunk Arrow column as a pandas Series without copying."""
+    arr = col.chunk(0) if col.num_chunks == 1 else pa.concat_arrays(col.chunks)
+
+    if pa.types.is_dictionary(arr.type):
+        codes = arr.indices.to_numpy(zero_copy_only=False)
+        if arr.indices.null_count:
+            codes = np.where(arr.indices.is_null().to_numpy(zero_copy_only=False), -1, codes)
+        cat = pd.Categorical.from_codes(
+            codes, categories=pd.Index(arr.dictionary.to_pylist()), validate=False
+        )
+        return pd.Series(cat, name=name, copy=False)
+
+    if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+        return pd.Series(pd.arrays.ArrowStringArray(pa.chunked_array([arr])), name=name)
+
+    if arr.null_count == 0 and (pa.types.is_integer(arr.type) or pa.types.is_floating(arr.type)):
+        return pd.Series(arr.to_numpy(zero_copy_only=True), name=name, copy=False)
+
+    # nullable non-float columns keep their Arrow buffers as-is
+    return pd.Series(pd.arrays.ArrowExtensionArray(pa.chunked_array([arr])), name=name)
+
+
+def attach_table(path: Path) -> pd.DataFrame:
+    """Memory-map an exported Arrow file and return a read-only DataFrame view."""
+    source = pa.memory_map(str(path), "r")
+    table = ipc.open_file(source).read_all()
+    columns = {
+        name: _column_to_series(name, table.column(name)) for name in table.column_names
+    }
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_shared_table(db_path: Path, table: str, state_fips=None) -> pd.DataFrame:
+    """Attach to the shared copy of `table`, exporting it first if missing or stale."""
+    if is_stale(db_path, table, state_fips):
+        export_table(db_path, table, state_fips)
+    return attach_table(arrow_path(db_path, table, state_fips))
+
+
+if __name__ == "__main__":
+    db = Path(sys.argv[1]) if len(sys.argv) > 1 else DB_PATH
+    states = db_states(db)
+    for state in states:
+        for name in SHARED_TABLES:
+            path = export_table(db, name, state["state_fips"] if len(states) > 1 else None)
+            print(f"{name}: {path} ({path.stat().st_size / 1e6:.1f} MB)")
@@ -0,0 +1,111 @@
+"""
+Speed quantiles and histograms from the sketches in the speed_sketch table
+(built by code/cleaning/step_speed_sketches.py).
+
+A sketch is a log-binned histogram with a count and a speed sum per bin.
+Histograms of any set of counties or provider-counties add bin by bin, and
+a quantile is the mean speed of the bin it falls in:
+
+    speed_quantiles(df["down_sketch"])          # {0.1: .., 0.5: .., 0.9: ..}
+    speed_histogram(df["down_sketch"])          # bins with counts, for a bar chart
+"""
+import sqlite3
+import struct
+
+import numpy as np
+import pandas as pd
+
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+def read_speed_sketches(db_path, level: str, state_fips=None):
+    """
+    Sketch rows of one level (county / provider), for one state if given,
+    or None when the DB was built without speed sketches.
+    """
+    conn = sqlite3.connect(str(db_path))
+    try:
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'speed_sketch'"
+        ).fetchone():
+            return None
+        sql = (
+            "SELECT county_fips, provider_id, units, down_sketch, up_sketch "
+            "FROM speed_sketch WHERE level = ?"
+        )
+        params = [level]
+        if state_fips is not None:
+            sql += " AND county_fips LIKE ?"
+            params.append(f"{state_fips}%")
+        return pd.read_sql(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def decode(blob: bytes):
+    """(bins per decade, low exponent, counts, sums)."""
+    per_decade, lo_exp, n = struct.unpack_from("<BbH", blob, 1)
+    counts = np.frombuffer(blob, dtype="<u4", count=n, offset=5)
+    sums = np.frombuffer(blob, dtype="<f8", count=n, offset=5 + 4 * n)
+    return per_decade, lo_exp, counts, sums
+
+
+def bin_edges(per_decade: int, lo_exp: int, n: int) -> np.ndarray:
+    """n + 1 edges: 0, 10**lo_exp, ... (bin 0 is everything below 10**lo_exp)."""
+    return np.r_[0.0, 10.0 ** (lo_exp + np.arange(n) / per_decade)]
+
+
+def merge(blobs):
+    """(per_decade, lo_exp, counts, sums) summed over all the sketches, or None if empty."""
+    layout, counts, sums = None, None, None
+    for blob in blobs:
+        per_decade, lo_exp, c, s = decode(blob)
+        if layout is None:
+            layout = (per_decade, lo_exp, len(c))
+            counts, sums = c.astype(np.int64), s.copy()
+        elif layout != (per_decade, lo_exp, len(c)):
+            raise ValueError(f"Cannot merge speed sketches with different bins: {layout} vs {(per_decade, lo_exp, len(c))}")
+        else:
+            counts += c
+            sums += s
+    if layout is None:
+        return None
+    return layout[0], layout[1], counts, sums
+
+
+def speed_quantiles(blobs, qs=QUANTILES) -> dict:
+    """Quantile -> speed (mean of the bin holding that rank); NaN when empty."""
+    merged = merge(blobs)
+    if merged is None or merged[2].sum() == 0:
+        return {q: float("nan") for q in qs}
+    _, _, counts, sums = merged
+    cum = np.cumsum(counts)
+    out = {}
+    for q in qs:
+        b = int(np.searchsorted(cum, max(1, np.ceil(q * cum[-1]))))
+        out[q] = float(sums[b] / counts[b])
+    return out
+
+
+def speed_histogram(blobs) -> pd.DataFrame:
+    """Non-empty bins with their edges, count and a readable label."""
+    merged = merge(blobs)
+    if merged is None:
+        return pd.DataFrame(columns=["lo", "hi", "count", "mean", "label"])
+    per_decade, lo_exp, counts, sums = merged
+    edges = bin_edges(per_decade, lo_exp, len(counts))
+    keep = counts > 0
+    hist = pd.DataFrame(
+        {
+            "lo": edges[:-1][keep],
+            "hi": edges[1:][keep],
+            "count": counts[keep],
+            "mean": sums[keep] / counts[keep],
+        }
+    )
+    hist["label"] = [f"{_fmt(lo)}–{_fmt(hi)}" for lo, hi in zip(hist["lo"], hist["hi"])]
+    return hist
+
+
+def _fmt(mbps: float) -> str:
+    return f"{mbps:,.0f}" if mbps >= 10 else f"{mbps:.2g}"
@@ -0,0 +1,178 @@
+"""
+Prebuilt startup snapshot for the dashboard.
+
+Holds everything the first screen needs: filter option lists, the county
+table with its scores, statewide hex KPIs and technology counts. The
+dashboard can paint without reading the hex table or importing Plotly.
+
+Build it after the DB with `python analysis/startup_snapshot.py [path/to/db]`.
+The dashboard rebuilds it when it is missing or older than the DB. A DB
+holding several states gets one snapshot per state.
+"""
+import json
+import os
+import sqlite3
+import sys
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+from county_scores import WEIGHT_COLUMNS, county_distance_stats, county_weighted_counts, enrich_county_with_hex
+from shared_dataset import (
+    HEX_SCHEMA,
+    apply_schema,
+    count_multi_values,
+    db_states,
+    pad_fips,
+    read_state_rows,
+    split_multi_values,
+)
+
+THIS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = THIS_DIR.parent
+DB_PATH = PROJECT_ROOT / "db" / "broadband_ky.db"
+
+SNAPSHOT_VERSION = 4
+
+
+def snapshot_path(db_path: Path, state_fips=None) -> Path:
+    db_path = Path(db_path)
+    state = f".{state_fips}" if state_fips else ""
+    return db_path.with_name(f"{db_path.stem}{state}.snapshot.json")
+
+
+def discover_datasets(db_dir: Path = DB_PATH.parent) -> list:
+    """
+    Every (DB, state) the dashboard can show: one entry per per-state DB and
+    one per state in a partitioned DB. `state_filter` is the county_fips
+    prefix to read with, or None when the DB holds a single state.
+    """
+    datasets = []
+    for db_path in sorted(Path(db_dir).glob("broadband_*.db")):
+        states = db_states(db_path)
+        for state in states:
+            datasets.append({
+                **state,
+                "db_path": db_path,
+                "state_filter": state["state_fips"] if len(states) > 1 else None,
+            })
+
+    # tell apart a state that is in more than one DB
+    names = [d["state_name"] for d in datasets]
+    for d in datasets:
+        d["label"] = d["state_name"]
+        if names.count(d["state_name"]) > 1:
+            d["label"] += f" ({d['db_path'].name})"
+    return sorted(datasets, key=lambda d: d["label"])
+
+
+def build_snapshot(db_path: Path = DB_PATH, state_fips=None) -> dict:
+    """Compute the snapshot (for one state of a partitioned DB if given) and write it next to the DB."""
+    conn = sqlite3.connect(str(db_path))
+    county_df = read_state_rows(conn, "county_summary", state_fips=state_fips)
+    providers = read_state_rows(
+        conn, "provider_summary_by_county", "DISTINCT provider_name", state_fips
+    )
+    hex_cols = "h3_res8_id, county_fips, service_category, tech_types"
+    # DBs built before step_hex_distance / step_hex_population have no
+    # distance / population columns
+    table_cols = {r[1] for r in conn.execute("PRAGMA table_info(hex_coverage)")}
+    if "distance_to_served" in table_cols:
+        hex_cols += ", distance_to_served"
+    has_population = "population" in table_cols
+    if has_population:
+        hex_cols += ", population, housing_units"
+    hex_df = read_state_rows(conn, "hex_coverage", hex_cols, state_fips)
+    # area shares of border hexes (DBs built before step_hex_county have none)
+    hex_county = None
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hex_county'"
+    ).fetchone():
+        hex_county = read_state_rows(conn, "hex_county", state_fips=state_fips)
+        hex_county["county_fips"] = pad_fips(hex_county["county_fips"])
+    conn.close()
+
+    hex_df = apply_schema(hex_df, HEX_SCHEMA)
+    hex_df["county_fips"] = pad_fips(hex_df["county_fips"])
+    county_df["county_fips"] = pad_fips(county_df["county_fips"])
+    county_df = enrich_county_with_hex(county_df, hex_df, hex_county)
+    if "distance_to_served" in hex_df.columns:
+        county_df = county_df.merge(
+            county_distance_stats(hex_df), left_on="county_fips", right_index=True, how="left"
+        )
+
+    state_kpis = {}
+    # built without a census block file: the columns are there but empty
+    if has_population and hex_df["population"].notna().any():
+        county_df = county_df.merge(
+            county_weighted_counts(hex_df, hex_county), left_on="county_fips", right_index=True, how="left"
+        )
+        for prefix, col in WEIGHT_COLUMNS.items():
+            by_cat = pd.to_numeric(hex_df[col], errors="coerce").groupby(hex_df["service_category"], observed=True).sum()
+            state_kpis.update({
+                f"{prefix}_unserved": float(by_cat.get("Unserved", 0)),
+                f"{prefix}_underserved": float(by_cat.get("Underserved", 0)),
+                f"{prefix}_served": float(by_cat.get("Served", 0)),
+                f"{prefix}_total": float(by_cat.sum()),
+            })
+
+    cat_counts = hex_df["service_category"].value_counts()
+    tech_counts = {"All": count_multi_values(hex_df["tech_types"])}
+    for fips, grp in hex_df.groupby("county_fips", observed=True)["tech_types"]:
+        tech_counts[str(fips)] = count_multi_values(grp)
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "db_mtime": Path(db_path).stat().st_mtime,
+        "service_categories": sorted(hex_df["service_category"].dropna().unique().tolist()),
+        "all_providers": sorted(providers["provider_name"].dropna().unique().tolist()),
+        "all_tech_types": split_multi_values(hex_df["tech_types"]),
+        "state_kpis": {
+            "hex_unserved": int(cat_counts.get("Unserved", 0)),
+            "hex_underserved": int(cat_counts.get("Underserved", 0)),
+            "hex_served": int(cat_counts.get("Served", 0)),
+            "hex_total": int(len(hex_df)),
+            **state_kpis,
+        },
+        "tech_counts": tech_counts,
+        "county": county_df.to_json(orient="table", index=False),
+    }
+
+    out_path = snapshot_path(db_path, state_fips)
+    tmp_path = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, out_path)
+    return snapshot
+
+
+def load_snapshot(db_path: Path = DB_PATH, state_fips=None) -> dict:
+    """Read the snapshot, rebuilding it first if it is missing or stale."""
+    path = snapshot_path(db_path, state_fips)
+    if path.exists():
+        with open(path) as f:
+            snapshot = json.load(f)
+        if (
+            snapshot.get("version") == SNAPSHOT_VERSION
+            and snapshot.get("db_mtime") == Path(db_path).stat().st_mtime
+        ):
+            return snapshot
+    return build_snapshot(db_path, state_fips)
+
+
+def snapshot_county_df(snapshot: dict) -> pd.DataFrame:
+    """The scored county table stored in a snapshot."""
+    df = pd.read_json(StringIO(snapshot["county"]), orient="table")
+    df["county_fips"] = df["county_fips"].astype(str).str.zfill(5)
+    return df
+
+
+if __name__ == "__main__":
+    db = Path(sys.argv[1]) if len(sys.argv) > 1 else DB_PATH
+    states = db_states(db)
+    for state in states:
+        state_filter = state["state_fips"] if len(states) > 1 else None
+        snap = build_snapshot(db, state_filter)
+        print(f"{state['state_name']} snapshot written to:", snapshot_path(db, state_filter))
+        print("Counties:", len(snapshot_county_df(snap)), "| providers:", len(snap["all_providers"]))
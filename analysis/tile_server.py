@@ -0,0 +1,104 @@
+"""
+Tiny HTTP endpoint for the prebuilt hex vector tiles.
+
+Serves GET /tiles/{store}/{z}/{x}/{y}.pbf from {store}.mbtiles in the tile
+folder (db/), the stores code/cleaning/build_hex_tiles.py writes next to
+each DB (run_pipeline.py builds them). Run standalone with
+
+    python analysis/tile_server.py [tile folder] [port]
+
+or let the dashboard start it in a background thread.
+
+It binds 127.0.0.1:8765 by default. Where the browser is not on the
+dashboard's machine, set BROADBAND_TILE_HOST=0.0.0.0 (and
+BROADBAND_TILE_PORT) and point BROADBAND_TILE_URL (read by app.py) at the
+address the browser reaches the endpoint on, e.g. behind a proxy.
+"""
+import os
+import re
+import sqlite3
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+THIS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = THIS_DIR.parent
+TILES_DIR = PROJECT_ROOT / "db"
+
+TILE_HOST = os.environ.get("BROADBAND_TILE_HOST", "127.0.0.1")
+TILE_PORT = int(os.environ.get("BROADBAND_TILE_PORT", "8765"))
+
+TILE_RE = re.compile(r"^/tiles/([A-Za-z0-9_-]+)/(\d+)/(\d+)/(\d+)\.pbf$")
+
+
+def make_handler(tiles_dir: Path):
+    local = threading.local()
+
+    def get_conn(store):
+        # one read-only connection per server thread and store (None if missing)
+        conns = local.__dict__.setdefault("conns", {})
+        if store not in conns:
+            path = tiles_dir / f"{store}.mbtiles"
+            conns[store] = (
+                sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+                if path.exists() else None
+            )
+        return conns[store]
+
+    class TileHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            m = TILE_RE.match(self.path.split("?")[0])
+            if not m:
+                self.send_error(404)
+                return
+            store = m.group(1)
+            z, x, y = (int(v) for v in m.groups()[1:])
+            conn = get_conn(store)
+            if conn is None:
+                self.send_error(404)
+                return
+            tms_y = (1 << z) - 1 - y
+            row = conn.execute(
+                "SELECT tile_data FROM tiles "
+                "WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, tms_y),
+            ).fetchone()
+
+            if row is None:
+                # empty tile: nothing to draw here
+                self.send_response(204)
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                return
+
+            data = row[0]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-protobuf")
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Cache-Control", "public, max-age=86400")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return TileHandler
+
+
+def start_tile_server(tiles_dir=TILES_DIR, host=TILE_HOST, port=TILE_PORT):
+    """Start the tile server in a daemon thread and return the server object."""
+    server = ThreadingHTTPServer((host, port), make_handler(Path(tiles_dir)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else TILES_DIR
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else TILE_PORT
+    server = ThreadingHTTPServer((TILE_HOST, port), make_handler(path))
+    print(f"Serving {path}/*.mbtiles at http://{TILE_HOST}:{port}/tiles/{{store}}/{{z}}/{{x}}/{{y}}.pbf")
+    server.serve_forever()
@@ -0,0 +1,329 @@
+"""
+Benchmark suite for the cleaning pipeline and the dashboard query paths.
+
+For each input size a deterministic Kentucky raw BDC file is generated by
+code/cleaning/generate_synthetic_bdc.py, then every step runs on it in
+order, each in a fresh Python process so its peak memory is its own. Wall time, peak RSS and throughput per step are written to JSON
+and compared against benchmarks/baseline.json.
+
+    python benchmarks/run_benchmarks.py                      # 100k, 1m, 10m rows
+    python benchmarks/run_benchmarks.py --sizes 100k,1m
+    python benchmarks/run_benchmarks.py --sizes 100k --update-baseline
+
+Exits with status 1 when a step is slower or heavier than the baseline by
+more than the tolerance. Runs offline; Linux (or any OS with `resource`).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from importlib import metadata
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_DIR.parent
+CLEANING_DIR = PROJECT_ROOT / "code" / "cleaning"
+ANALYSIS_DIR = PROJECT_ROOT / "analysis"
+
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+RESULTS_DIR = BENCH_DIR / "results"
+
+CENSUS_DIR = PROJECT_ROOT / "datasets" / "Cleaned_Census_data"
+EDU_PATH = CENSUS_DIR / "Cleaned_EDU_Attainments_CountyWise.csv"
+INC_PATH = CENSUS_DIR / "Median_Household_Income_KY_Countywise.csv"
+POP_PATH = CENSUS_DIR / "Population&Poverty_KY_Countywise.csv"
+DEVICE_PATH = CENSUS_DIR / "ky_computer_smartphone_estimates_with_fips.csv"
+AREA_PATH = PROJECT_ROOT / "datasets" / "bdc_data_1" / "final" / "ky_county_area_wikipedia.csv"
+
+DEFAULT_SIZES = "100k,1m,10m"
+
+# allowed slowdown / growth over the baseline before a step is flagged
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.20
+
+# query repetitions for the dashboard benchmark (timings are per query)
+QUERY_REPEATS = 5
+
+
+# ==================================================
+# STEPS
+# ==================================================
+# Each step takes the work dir and returns the number of input rows it
+# processed. Files are named after the pipeline's own outputs.
+def _files(work: Path) -> dict:
+    return {
+        "raw": work / "bdc_all_raw.csv",
+        "step2": work / "bdc_clean_step2.csv",
+        "step3": work / "bdc_step3_with_flags.csv",
+        "step4": work / "bdc_step4_provider_agg.csv",
+        "step5": work / "bdc_step5_county_agg.csv",
+        "final": work / "ky_bdc_demographics_final_dataset.csv",
+        "providers": work / "provider_summary_by_county.csv",
+        "h3": work / "bdc_h3_points.csv",
+        "hex_provider": work / "bdc_hex_provider.csv",
+        "db": work / "broadband_ky.db",
+    }
+
+
+def run_clean_bdc(work):
+    import clean_bdc
+    f = _files(work)
+    return clean_bdc.main(f["raw"], f["step2"])
+
+
+def run_step3(work):
+    import step3_add_flags
+    f = _files(work)
+    return step3_add_flags.main(f["step2"], f["step3"])
+
+
+def run_step4(work):
+    import step4_provider_agg
+    f = _files(work)
+    return step4_provider_agg.main(f["step3"], f["step4"])
+
+
+def run_step5(work):
+    import step5_county_agg
+    f = _files(work)
+    return step5_county_agg.main(f["step4"], f["step3"], f["step5"])
+
+
+def run_step6(work):
+    import step6_merge_final
+    f = _files(work)
+    return step6_merge_final.main(
+        f["step5"], EDU_PATH, INC_PATH, POP_PATH, AREA_PATH, DEVICE_PATH, f["final"]
+    )
+
+
+def run_step7(work):
+    import step7_provider_summary
+    f = _files(work)
+    return step7_provider_summary.main(f["step4"], POP_PATH, f["providers"])
+
+
+def run_step_h3_points(work):
+    import step_h3_points
+    f = _files(work)
+    return step_h3_points.main(f["raw"], f["h3"], out_provider_path=f["hex_provider"])
+
+
+def run_build_broadband_db(work):
+    import build_broadband_db
+    f = _files(work)
+    return build_broadband_db.main(f["providers"], f["final"], f["h3"], f["db"])
+
+
+def run_dashboard_queries(work):
+    """Filter/KPI paths of analysis/app.py on the hex and provider tables."""
+    from dashboard_queries import filter_hex, filter_providers, scope_kpis
+    from shared_dataset import count_multi_values, load_shared_table
+    from startup_snapshot import build_snapshot, snapshot_county_df
+
+    db = _files(work)["db"]
+    hex_df = load_shared_table(db, "hex_coverage")
+    provider_df = load_shared_table(db, "provider_summary_by_county")
+    county_df = snapshot_county_df(build_snapshot(db))
+
+    fips = hex_df["county_fips"].value_counts().index[0]
+    provider = provider_df["provider_name"].value_counts().index[0]
+    tech = "Fiber"
+    queries = [
+        dict(),
+        dict(county_fips=fips),
+        dict(service="Unserved"),
+        dict(provider=provider),
+        dict(tech=tech),
+        dict(county_fips=fips, service="Underserved", provider=provider, tech=tech),
+    ]
+
+    for _ in range(QUERY_REPEATS):
+        for q in queries:
+            rows = filter_hex(hex_df, **q)
+            count_multi_values(rows["tech_types"])
+            filter_providers(provider_df, q.get("county_fips"), q.get("provider", "All providers"))
+        scope_kpis(county_df)
+        scope_kpis(county_df[county_df["county_fips"] == fips])
+    return len(hex_df) * len(queries) * QUERY_REPEATS
+
+
+# name -> runner, in pipeline order
+STEPS = {
+    "clean_bdc": run_clean_bdc,
+    "step3_add_flags": run_step3,
+    "step4_provider_agg": run_step4,
+    "step5_county_agg": run_step5,
+    "step6_merge_final": run_step6,
+    "step7_provider_summary": run_step7,
+    "step_h3_points": run_step_h3_points,
+    "build_broadband_db": run_build_broadband_db,
+    "dashboard_queries": run_dashboard_queries,
+}
+
+
+# ==================================================
+# CHILD PROCESS (one step)
+# ==================================================
+def run_child(step: str, work: Path, result_path: Path):
+    sys.path[:0] = [str(CLEANING_DIR), str(ANALYSIS_DIR)]
+    import pandas  # noqa: F401  (import cost is not part of the step)
+    from pipeline_trace import peak_rss_mb, process_rss_mb
+
+    start_rss = process_rss_mb()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = STEPS[step](work)
+    wall = time.perf_counter() - t0
+    peak = peak_rss_mb()  # None where RSS can't be read (Windows)
+
+    with open(result_path, "w") as f:
+        json.dump({
+            "wall_s": round(wall, 4),
+            "rows": int(rows),
+            "rows_per_s": round(rows / wall, 1) if wall > 0 else None,
+            "peak_rss_mb": round(peak, 1) if peak is not None else None,
+            "step_rss_mb": round(peak - start_rss, 1) if peak is not None and start_rss is not None else None,
+        }, f)
+
+
+def run_step(step: str, work: Path) -> dict:
+    result_path = work / f"{step}.result.json"
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", step, str(work), str(result_path)],
+        capture_output=True,
+        text=True,
+        # the steps' own run reports are not wanted here
+        env={**os.environ, "KY_TRACE_DIR": "off"},
+    )
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["killed"])[-1]}
+    with open(result_path) as f:
+        return json.load(f)
+
+
+# ==================================================
+# BASELINE COMPARISON
+# ==================================================
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * mult)
+
+
+def compare(results: dict, baseline: dict, time_tol: float, mem_tol: float) -> list:
+    """Return a list of regression messages for keys present in both runs."""
+    problems = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if not base or "error" in res or "error" in base:
+            continue
+        if res["wall_s"] > base["wall_s"] * (1 + time_tol):
+            problems.append(
+                f"{key}: wall {res['wall_s']:.2f}s vs baseline {base['wall_s']:.2f}s"
+            )
+        if None in (res["peak_rss_mb"], base["peak_rss_mb"]):
+            continue
+        if res["peak_rss_mb"] > base["peak_rss_mb"] * (1 + mem_tol):
+            problems.append(
+                f"{key}: peak RSS {res['peak_rss_mb']:.0f}MB vs baseline {base['peak_rss_mb']:.0f}MB"
+            )
+    return problems
+
+
+def machine_info() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": metadata.version("pandas"),
+        "numpy": metadata.version("numpy"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma list, e.g. 100k,1m,10m")
+    parser.add_argument("--steps", default=",".join(STEPS), help="comma list of step names")
+    parser.add_argument("--out", type=Path, help="results JSON (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="merge this run into the baseline")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument("--keep", action="store_true", help="keep the generated work dirs")
+    args = parser.parse_args()
+
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+    steps = [s for s in args.steps.split(",") if s]
+    results = {}
+
+    for n_rows in sizes:
+        work = Path(tempfile.mkdtemp(prefix=f"ky_bench_{n_rows}_"))
+        print(f"\n== {n_rows:,} raw rows ({work})")
+        t0 = time.perf_counter()
+        # generated in its own process too: peak RSS is inherited by child
+        # processes, so this one stays free of pandas/numpy
+        subprocess.run(
+            [sys.executable, str(CLEANING_DIR / "generate_synthetic_bdc.py"),
+             "--rows", str(n_rows), "--out", str(_files(work)["raw"])],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        print(f"  input written in {time.perf_counter() - t0:.1f}s")
+
+        for step in steps:
+            res = run_step(step, work)
+            results[f"{step}@{n_rows}"] = res
+            if "error" in res:
+                print(f"  {step:<24} FAILED: {res['error']}")
+                # later steps depend on this one's output
+                break
+            print(
+                f"  {step:<24} {res['wall_s']:>8.2f}s  {res['peak_rss_mb'] or 0:>7.0f}MB peak  "
+                f"{res['rows_per_s'] or 0:>12,.0f} rows/s"
+            )
+
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    run = {"machine": machine_info(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+    out_path = args.out or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(run, f, indent=2)
+    print("\nResults written to:", out_path)
+
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    problems = compare(results, baseline.get("results", {}), args.time_tolerance, args.memory_tolerance)
+    for p in problems:
+        print("REGRESSION", p)
+    if not problems and baseline:
+        print("No regressions against", args.baseline)
+
+    if args.update_baseline:
+        merged = dict(baseline.get("results", {}))
+        merged.update({k: v for k, v in results.items() if "error" not in v})
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": run["machine"], "created": run["created"], "results": merged}, f, indent=2)
+        print("Baseline updated:", args.baseline)
+        return 0
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], Path(sys.argv[3]), Path(sys.argv[4]))
+    else:
+        sys.exit(main())
@@ -1,33 +1,113 @@
 import sqlite3
+from pathlib import Path
+
 import pandas as pd
 
+from pipeline_trace import NULL_TRACE, PipelineTrace
+from step_hex_pyramid import PYRAMID_INDEXES, hex_pyramid
+
 # -----------------------------
 # FILE PATHS (update if needed)
 # -----------------------------
 PATH_PROVIDER = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\Provider_summary_by_county.csv"
 PATH_COUNTY   = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\ky_bdc_demographics_final_dataset.csv"
 PATH_H3       = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
+PATH_HEX_COUNTY = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\hex_county_weights.csv"  # step_hex_county.py
+PATH_SKETCHES   = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\location_sketches.parquet"  # step_location_sketches.py
+PATH_SPEED_SKETCHES = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\speed_sketches.parquet"  # step_speed_sketches.py
+PATH_PARTIALS   = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\agg_partials.csv"  # step_aggregate_partials.py
+PATH_HEX_PROVIDER = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_hex_provider.csv"  # step_h3_points.py
+PATH_OVERLAP    = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\provider_overlap.csv"  # step_provider_competition.py
+PATH_COMPETITION = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\county_competition.csv"  # step_provider_competition.py
+PATH_CLUSTERS   = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\unserved_clusters.csv"  # step_unserved_clusters.py
 
 DB_PATH       = r"H:\Broadband_Project_1\analysis\broadband_ky.db"
 
 
-def main():
-    # -----------------------------
-    # LOAD DATAFRAMES
-    # -----------------------------
-    provider_df = pd.read_csv(
-        PATH_PROVIDER,
-        dtype={"county_fips": str, "provider_id": str}
-    )
-    county_df = pd.read_csv(
-        PATH_COUNTY,
-        dtype={"county_fips": str}
-    )
-    h3_df = pd.read_csv(
-        PATH_H3,
-        dtype={"county_fips": str, "h3_res8_id": str}
-    )
+def build_db(path_provider, path_county, path_h3, db_path, trace=NULL_TRACE, path_hex_county=None,
+             path_sketches=None, path_speed_sketches=None, path_partials=None, path_hex_provider=None,
+             path_overlap=None, path_competition=None, path_clusters=None):
+    with trace.stage("load") as s:
+        # -----------------------------
+        # LOAD DATAFRAMES
+        # -----------------------------
+        provider_df = pd.read_csv(
+            path_provider,
+            dtype={"county_fips": str, "provider_id": str}
+        )
+        county_df = pd.read_csv(
+            path_county,
+            dtype={"county_fips": str}
+        )
+        h3_df = pd.read_csv(
+            path_h3,
+            dtype={"county_fips": str, "h3_res8_id": str}
+        )
+        # optional: area-weighted hex -> county shares
+        hex_county_df = None
+        if path_hex_county and Path(path_hex_county).exists():
+            hex_county_df = pd.read_csv(
+                path_hex_county,
+                dtype={"county_fips": str, "h3_res8_id": str}
+            )
+
+        # optional: distinct-location sketches
+        sketch_df = None
+        if path_sketches and Path(path_sketches).exists():
+            sketch_df = pd.read_parquet(path_sketches)
+
+        # optional: speed-distribution sketches
+        speed_df = None
+        if path_speed_sketches and Path(path_speed_sketches).exists():
+            speed_df = pd.read_parquet(path_speed_sketches)
+
+        # optional: algebraic aggregate partials
+        partials_df = None
+        if path_partials and Path(path_partials).exists():
+            partials_df = pd.read_csv(
+                path_partials,
+                dtype={"county_fips": str, "provider_id": str, "technology": str}
+            )
 
+        # optional: per-provider speeds in each hex
+        hex_provider_df = None
+        if path_hex_provider and Path(path_hex_provider).exists():
+            hex_provider_df = pd.read_csv(
+                path_hex_provider,
+                dtype={"county_fips": str, "h3_res8_id": str, "provider_id": str}
+            )
+
+        # optional: provider overlap and county competition counts
+        overlap_df = None
+        if path_overlap and Path(path_overlap).exists():
+            overlap_df = pd.read_csv(
+                path_overlap,
+                dtype={"county_fips": str, "provider_a": str, "provider_b": str}
+            )
+        competition_df = None
+        if path_competition and Path(path_competition).exists():
+            competition_df = pd.read_csv(path_competition, dtype={"county_fips": str})
+
+        # optional: contiguous unserved areas
+        cluster_df = None
+        if path_clusters and Path(path_clusters).exists():
+            cluster_df = pd.read_csv(path_clusters, dtype={"county_fips": str, "counties": str})
+
+        s.rows_out = len(h3_df)
+
+    return write_db(provider_df, county_df, h3_df, db_path, trace, hex_county_df, sketch_df, speed_df,
+                    partials_df, hex_provider_df, overlap_df, competition_df, cluster_df)
+
+
+def write_db(provider_df, county_df, h3_df, db_path, trace=NULL_TRACE, hex_county_df=None,
+             sketch_df=None, speed_df=None, partials_df=None, hex_provider_df=None, overlap_df=None,
+             competition_df=None, cluster_df=None):
+    """
+    Create the dashboard tables in `db_path` from the three final datasets
+    (plus the hex_county shares, location/speed sketches, aggregate
+    partials, hex x provider speeds and provider competition when given),
+    and the res 7 / 6 / 5 hex pyramid rolled up from the hex rows.
+    """
     # Ensure 5-digit county_fips
     provider_df["county_fips"] = provider_df["county_fips"].astype(str).str.zfill(5)
     county_df["county_fips"]   = county_df["county_fips"].astype(str).str.zfill(5)
@@ -37,229 +117,582 @@ def main():
     print("County rows:", len(county_df))
     print("H3 rows (raw):", len(h3_df))
 
-    # -----------------------------
-    # CONNECT TO SQLITE
-    # -----------------------------
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    # Enforce foreign keys
-    cur.execute("PRAGMA foreign_keys = ON;")
-
-    # -----------------------------
-    # DROP TABLES IF THEY EXIST
-    # -----------------------------
-    cur.execute("DROP TABLE IF EXISTS hex_coverage;")
-    cur.execute("DROP TABLE IF EXISTS provider_summary_by_county;")
-    cur.execute("DROP TABLE IF EXISTS county_summary;")
-
-    # -----------------------------
-    # CREATE TABLES
-    # -----------------------------
-
-    # 1) COUNTY_SUMMARY
-    cur.execute(
-        """
-        CREATE TABLE county_summary (
-            county_fips TEXT PRIMARY KEY,
-            county_name TEXT,
-
-            county_avg_down          REAL,
-            county_min_provider_down REAL,
-            county_max_provider_down REAL,
-            total_locations          INTEGER,
-            underserved_locations    INTEGER,
-            pct_underserved          REAL,
-            provider_count           INTEGER,
-            providers_below100       INTEGER,
-
-            Less_Than_9th_grade      INTEGER,
-            Less_Than_HighSchool     INTEGER,
-            Atleast_Bachelors        INTEGER,
-            Median_Household_Income  REAL,
-            Population               INTEGER,
-            total_est_poverty        INTEGER,
-
-            area_sq_mi               REAL,
-            desktop_laptop_estimate  INTEGER,
-            smartphone_estimate      INTEGER
-        );
-        """
-    )
-
-    # 2) PROVIDER_SUMMARY_BY_COUNTY
-    cur.execute(
-        """
-        CREATE TABLE provider_summary_by_county (
-            provider_county_id    INTEGER PRIMARY KEY AUTOINCREMENT,
-            county_fips           TEXT NOT NULL,
-            county_name           TEXT,
-            provider_id           TEXT NOT NULL,
-            provider_name         TEXT,
-
-            avg_down              REAL,
-            avg_up                REAL,
-            locations             INTEGER,
-            underserved_locations INTEGER,
-            locations_below100    INTEGER,
-
-            FOREIGN KEY (county_fips) REFERENCES county_summary(county_fips),
-            UNIQUE (county_fips, provider_id)
-        );
-        """
-    )
-
-    # 3) HEX_COVERAGE
-    cur.execute(
-        """
-        CREATE TABLE hex_coverage (
-            hex_id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            h3_res8_id      TEXT NOT NULL,
-            county_fips     TEXT NOT NULL,
-
-            lat             REAL,
-            lon             REAL,
-            max_down        REAL,
-            max_up          REAL,
-            provider_count  INTEGER,
-            provider_names  TEXT,
-            tech_types      TEXT,
-            service_category TEXT,
-
-            FOREIGN KEY (county_fips) REFERENCES county_summary(county_fips),
-            UNIQUE (h3_res8_id)
-        );
-        """
-    )
-
-    conn.commit()
-
-    # -----------------------------
-    # INSERT INTO county_summary
-    # -----------------------------
-    county_cols = [
-        "county_fips",
-        "county_name",
-        "county_avg_down",
-        "county_min_provider_down",
-        "county_max_provider_down",
-        "total_locations",
-        "underserved_locations",
-        "pct_underserved",
-        "provider_count",
-        "providers_below100",
-        "Less_Than_9th_grade",
-        "Less_Than_HighSchool",
-        "Atleast_Bachelors",
-        "Median_Household_Income",
-        "Population",
-        "total_est_poverty",
-        "area_sq_mi",
-        "desktop_laptop_estimate",
-        "smartphone_estimate",
-    ]
-
-    # Clean numeric-like columns that might have commas
-    numeric_like_cols = [
-        "Median_Household_Income",
-        "Population",
-        "total_est_poverty",
-        "desktop_laptop_estimate",
-        "smartphone_estimate",
-        "total_locations",
-        "underserved_locations",
-        "providers_below100",
-        "Less_Than_9th_grade",
-        "Less_Than_HighSchool",
-        "Atleast_Bachelors",
-    ]
-    for col in numeric_like_cols:
-        if col in county_df.columns:
-            county_df[col] = (
-                county_df[col]
-                .astype(str)
-                .str.replace(",", "", regex=False)
-                .replace("nan", None)
+    with trace.stage("schema"):
+        # -----------------------------
+        # CONNECT TO SQLITE
+        # -----------------------------
+        conn = sqlite3.connect(str(db_path))
+        cur = conn.cursor()
+
+        # Enforce foreign keys
+        cur.execute("PRAGMA foreign_keys = ON;")
+
+        # -----------------------------
+        # DROP TABLES IF THEY EXIST
+        # -----------------------------
+        cur.execute("DROP TABLE IF EXISTS hex_pyramid;")
+        cur.execute("DROP TABLE IF EXISTS unserved_cluster;")
+        cur.execute("DROP TABLE IF EXISTS county_competition;")
+        cur.execute("DROP TABLE IF EXISTS provider_overlap;")
+        cur.execute("DROP TABLE IF EXISTS hex_provider;")
+        cur.execute("DROP TABLE IF EXISTS agg_partials;")
+        cur.execute("DROP TABLE IF EXISTS speed_sketch;")
+        cur.execute("DROP TABLE IF EXISTS location_sketch;")
+        cur.execute("DROP TABLE IF EXISTS hex_county;")
+        cur.execute("DROP TABLE IF EXISTS hex_coverage;")
+        cur.execute("DROP TABLE IF EXISTS provider_summary_by_county;")
+        cur.execute("DROP TABLE IF EXISTS county_summary;")
+        cur.execute("DROP TABLE IF EXISTS state_partition;")
+
+        # -----------------------------
+        # CREATE TABLES
+        # -----------------------------
+
+        # 1) COUNTY_SUMMARY
+        cur.execute(
+            """
+            CREATE TABLE county_summary (
+                county_fips TEXT PRIMARY KEY,
+                county_name TEXT,
+
+                county_avg_down          REAL,
+                county_min_provider_down REAL,
+                county_max_provider_down REAL,
+                total_locations          INTEGER,
+                distinct_locations       INTEGER,
+                underserved_locations    INTEGER,
+                pct_underserved          REAL,
+                provider_count           INTEGER,
+                providers_below100       INTEGER,
+
+                Less_Than_9th_grade      INTEGER,
+                Less_Than_HighSchool     INTEGER,
+                Atleast_Bachelors        INTEGER,
+                Median_Household_Income  REAL,
+                Population               INTEGER,
+                total_est_poverty        INTEGER,
+
+                area_sq_mi               REAL,
+                desktop_laptop_estimate  INTEGER,
+                smartphone_estimate      INTEGER
+            );
+            """
+        )
+
+        # 2) PROVIDER_SUMMARY_BY_COUNTY
+        cur.execute(
+            """
+            CREATE TABLE provider_summary_by_county (
+                provider_county_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+                county_fips           TEXT NOT NULL,
+                county_name           TEXT,
+                provider_id           TEXT NOT NULL,
+                provider_name         TEXT,
+
+                avg_down              REAL,
+                avg_up                REAL,
+                locations             INTEGER,
+                distinct_locations    INTEGER,
+                underserved_locations INTEGER,
+                locations_below100    INTEGER,
+
+                FOREIGN KEY (county_fips) REFERENCES county_summary(county_fips),
+                UNIQUE (county_fips, provider_id)
+            );
+            """
+        )
+
+        # 3) HEX_COVERAGE
+        cur.execute(
+            """
+            CREATE TABLE hex_coverage (
+                hex_id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                h3_res8_id      TEXT NOT NULL,
+                county_fips     TEXT NOT NULL,
+
+                lat             REAL,
+                lon             REAL,
+                max_down        REAL,
+                max_up          REAL,
+                provider_count  INTEGER,
+                provider_names  TEXT,
+                tech_types      TEXT,
+                service_category TEXT,
+                providers_25_3   INTEGER,
+                providers_100_20 INTEGER,
+                distance_to_served INTEGER,
+                cluster_id       TEXT,
+                cluster_id_underserved TEXT,
+                population       REAL,
+                housing_units    REAL,
+
+                FOREIGN KEY (county_fips) REFERENCES county_summary(county_fips),
+                UNIQUE (h3_res8_id)
+            );
+            """
+        )
+
+        # 4) HEX_COUNTY (share of each hex's area in each county it touches)
+        cur.execute(
+            """
+            CREATE TABLE hex_county (
+                h3_res8_id   TEXT NOT NULL,
+                county_fips  TEXT NOT NULL,
+                weight       REAL NOT NULL,
+
+                FOREIGN KEY (h3_res8_id) REFERENCES hex_coverage(h3_res8_id),
+                PRIMARY KEY (h3_res8_id, county_fips)
+            );
+            """
+        )
+
+        # 5) LOCATION_SKETCH (mergeable distinct-location sketches; see
+        #    step_location_sketches.py). level = county | provider | hex
+        cur.execute(
+            """
+            CREATE TABLE location_sketch (
+                level              TEXT NOT NULL,
+                county_fips        TEXT NOT NULL,
+                provider_id        TEXT,
+                h3_res8_id         TEXT,
+                distinct_locations INTEGER,
+                sketch             BLOB NOT NULL
+            );
+            """
+        )
+        cur.execute("CREATE INDEX idx_location_sketch_level ON location_sketch(level, county_fips);")
+
+        # 6) SPEED_SKETCH (mergeable speed histograms; see
+        #    step_speed_sketches.py). level = county | provider
+        cur.execute(
+            """
+            CREATE TABLE speed_sketch (
+                level        TEXT NOT NULL,
+                county_fips  TEXT NOT NULL,
+                provider_id  TEXT,
+                units        TEXT,
+                down_sketch  BLOB NOT NULL,
+                up_sketch    BLOB NOT NULL
+            );
+            """
+        )
+
+        # 7) AGG_PARTIALS (sums / sums of squares / min / max per county x
+        #    provider x technology x service flag; see step_aggregate_partials.py)
+        cur.execute(
+            """
+            CREATE TABLE agg_partials (
+                county_fips     TEXT NOT NULL,
+                provider_id     TEXT NOT NULL,
+                provider_name   TEXT,
+                technology      TEXT,
+                tech_group      TEXT,
+                is_underserved  INTEGER NOT NULL,
+
+                records         INTEGER NOT NULL,
+                down_sum        REAL,
+                down_sumsq      REAL,
+                down_min        REAL,
+                down_max        REAL,
+                up_sum          REAL,
+                up_sumsq        REAL,
+                up_min          REAL,
+                up_max          REAL,
+
+                PRIMARY KEY (county_fips, provider_id, provider_name, technology, is_underserved)
+            );
+            """
+        )
+
+        # 8) HEX_PROVIDER (each provider's best speeds in each hex: the
+        #    sparse hex x provider matrix behind hex_coverage.max_down/max_up)
+        cur.execute(
+            """
+            CREATE TABLE hex_provider (
+                h3_res8_id   TEXT NOT NULL,
+                county_fips  TEXT NOT NULL,
+                provider_id  TEXT NOT NULL,
+                max_down     REAL,
+                max_up       REAL,
+
+                FOREIGN KEY (h3_res8_id) REFERENCES hex_coverage(h3_res8_id),
+                PRIMARY KEY (h3_res8_id, provider_id)
+            );
+            """
+        )
+
+        # 9) PROVIDER_OVERLAP (hexes shared by each provider pair; see
+        #    step_provider_competition.py). level = county | state, a <= b
+        cur.execute(
+            """
+            CREATE TABLE provider_overlap (
+                level                TEXT NOT NULL,
+                county_fips          TEXT NOT NULL,
+                provider_a           TEXT NOT NULL,
+                provider_b           TEXT NOT NULL,
+                shared_hexes         INTEGER,
+                shared_hexes_100_20  INTEGER,
+
+                PRIMARY KEY (level, county_fips, provider_a, provider_b)
+            );
+            """
+        )
+
+        # 10) COUNTY_COMPETITION (hexes by number of providers at 100/20)
+        cur.execute(
+            """
+            CREATE TABLE county_competition (
+                county_fips               TEXT PRIMARY KEY,
+                hexes                     INTEGER,
+                avg_providers             REAL,
+                avg_providers_100_20      REAL,
+                hexes_no_100_20           INTEGER,
+                monopoly_hexes_100_20     INTEGER,
+                competitive_hexes_100_20  INTEGER,
+
+                FOREIGN KEY (county_fips) REFERENCES county_summary(county_fips)
+            );
+            """
+        )
+
+        # 11) UNSERVED_CLUSTER (contiguous Unserved / Unserved+Underserved
+        #     hexes; see step_unserved_clusters.py). county_fips = the
+        #     county holding most of the cluster
+        cur.execute(
+            """
+            CREATE TABLE unserved_cluster (
+                cluster_id           TEXT PRIMARY KEY,
+                level                TEXT NOT NULL,
+                hexes                INTEGER,
+                lat                  REAL,
+                lon                  REAL,
+                min_lat              REAL,
+                min_lon              REAL,
+                max_lat              REAL,
+                max_lon              REAL,
+                county_fips          TEXT,
+                counties             TEXT,
+                county_count         INTEGER,
+                candidate_providers  TEXT,
+                population           REAL,
+                housing_units        REAL
+            );
+            """
+        )
+
+        # 12) HEX_PYRAMID (hex_coverage rolled up to H3 res 7 / 6 / 5 per
+        #     county; see step_hex_pyramid.py)
+        cur.execute(
+            """
+            CREATE TABLE hex_pyramid (
+                resolution          INTEGER NOT NULL,
+                county_fips         TEXT NOT NULL,
+                h3_cell             TEXT NOT NULL,
+                lat                 REAL,
+                lon                 REAL,
+                hex_count           INTEGER,
+                hex_unserved        INTEGER,
+                hex_underserved     INTEGER,
+                hex_unknown         INTEGER,
+                hex_served          INTEGER,
+                service_category    TEXT,
+                min_down            REAL,
+                best_down           REAL,
+                min_up              REAL,
+                best_up             REAL,
+                max_provider_count  INTEGER,
+                providers           INTEGER,
+                locations           INTEGER,
+                population          REAL,
+                housing_units       REAL,
+                distance_to_served  INTEGER,
+
+                PRIMARY KEY (resolution, county_fips, h3_cell)
+            );
+            """
+        )
+
+        conn.commit()
+
+    with trace.stage("insert_county", rows_in=len(county_df)):
+        # -----------------------------
+        # INSERT INTO county_summary
+        # -----------------------------
+        county_cols = [
+            "county_fips",
+            "county_name",
+            "county_avg_down",
+            "county_min_provider_down",
+            "county_max_provider_down",
+            "total_locations",
+            "distinct_locations",
+            "underserved_locations",
+            "pct_underserved",
+            "provider_count",
+            "providers_below100",
+            "Less_Than_9th_grade",
+            "Less_Than_HighSchool",
+            "Atleast_Bachelors",
+            "Median_Household_Income",
+            "Population",
+            "total_est_poverty",
+            "area_sq_mi",
+            "desktop_laptop_estimate",
+            "smartphone_estimate",
+        ]
+
+        # Clean numeric-like columns that might have commas
+        numeric_like_cols = [
+            "Median_Household_Income",
+            "Population",
+            "total_est_poverty",
+            "desktop_laptop_estimate",
+            "smartphone_estimate",
+            "total_locations",
+            "underserved_locations",
+            "providers_below100",
+            "Less_Than_9th_grade",
+            "Less_Than_HighSchool",
+            "Atleast_Bachelors",
+        ]
+        for col in numeric_like_cols:
+            if col in county_df.columns:
+                county_df[col] = (
+                    county_df[col]
+                    .astype(str)
+                    .str.replace(",", "", regex=False)
+                    .replace("nan", None)
+                )
+
+        # states without some census inputs get NULLs in those columns
+        county_df.reindex(columns=county_cols).to_sql(
+            "county_summary", conn, if_exists="append", index=False
+        )
+
+    with trace.stage("insert_provider", rows_in=len(provider_df)):
+        # -----------------------------
+        # INSERT INTO provider_summary_by_county
+        # -----------------------------
+        provider_cols = [
+            "county_fips",
+            "county_name",
+            "provider_id",
+            "provider_name",
+            "avg_down",
+            "avg_up",
+            "locations",
+            "distinct_locations",
+            "underserved_locations",
+            "locations_below100",
+        ]
+
+        for col in ["locations", "distinct_locations", "underserved_locations", "locations_below100"]:
+            if col in provider_df.columns:
+                provider_df[col] = (
+                    provider_df[col]
+                    .astype(str)
+                    .str.replace(",", "", regex=False)
+                    .replace("nan", None)
+                )
+
+        # Deduplicate (county_fips, provider_id) to satisfy UNIQUE constraint
+        provider_df = provider_df.sort_values(["county_fips", "provider_id"])
+        provider_df = provider_df.drop_duplicates(
+            subset=["county_fips", "provider_id"], keep="first"
+        )
+
+        print("Provider rows after dedup:", len(provider_df))
+
+        provider_df.reindex(columns=provider_cols).to_sql(
+            "provider_summary_by_county", conn, if_exists="append", index=False
+        )
+
+    with trace.stage("insert_hex", rows_in=len(h3_df)):
+        # -----------------------------
+        # INSERT INTO hex_coverage
+        # -----------------------------
+        h3_cols = [
+            "h3_res8_id",
+            "county_fips",
+            "lat",
+            "lon",
+            "max_down",
+            "max_up",
+            "provider_count",
+            "provider_names",
+            "tech_types",
+            "service_category",
+            "providers_25_3",
+            "providers_100_20",
+            "distance_to_served",
+            "cluster_id",
+            "cluster_id_underserved",
+            "population",
+            "housing_units",
+        ]
+
+        # a hex split over two counties has a population row in each; the
+        # kept row carries the hex total
+        if "population" in h3_df.columns:
+            h3_df[["population", "housing_units"]] = (
+                h3_df.groupby("h3_res8_id")[["population", "housing_units"]].transform("sum", min_count=1)
             )
 
-    county_df[county_cols].to_sql(
-        "county_summary", conn, if_exists="append", index=False
-    )
-
-    # -----------------------------
-    # INSERT INTO provider_summary_by_county
-    # -----------------------------
-    provider_cols = [
-        "county_fips",
-        "county_name",
-        "provider_id",
-        "provider_name",
-        "avg_down",
-        "avg_up",
-        "locations",
-        "underserved_locations",
-        "locations_below100",
-    ]
-
-    for col in ["locations", "underserved_locations", "locations_below100"]:
-        if col in provider_df.columns:
-            provider_df[col] = (
-                provider_df[col]
-                .astype(str)
-                .str.replace(",", "", regex=False)
-                .replace("nan", None)
+        # Deduplicate by h3_res8_id to satisfy UNIQUE constraint
+        h3_df = h3_df.sort_values(["h3_res8_id", "county_fips"])
+        h3_df = h3_df.drop_duplicates(subset=["h3_res8_id"], keep="first")
+
+        print("H3 rows after dedup:", len(h3_df))
+
+        # competition counts / distances / cluster ids / population are NULL
+        # when step_provider_competition / step_hex_distance /
+        # step_unserved_clusters / step_hex_population haven't run
+        h3_df.reindex(columns=h3_cols).to_sql(
+            "hex_coverage", conn, if_exists="append", index=False
+        )
+        # members of one cluster (zooming the map to it)
+        conn.execute("CREATE INDEX idx_hex_coverage_cluster ON hex_coverage(cluster_id);")
+
+        conn.commit()
+
+    if hex_county_df is not None:
+        with trace.stage("insert_hex_county", rows_in=len(hex_county_df)):
+            # -----------------------------
+            # INSERT INTO hex_county
+            # -----------------------------
+            hex_county_df["county_fips"] = hex_county_df["county_fips"].astype(str).str.zfill(5)
+
+            # a hex near a state line can come from two states' runs; keep
+            # the shares of the state whose row landed in hex_coverage
+            hex_home = h3_df.set_index("h3_res8_id")["county_fips"].str[:2]
+            state_of_hex = hex_county_df["h3_res8_id"].map(hex_home)
+            hex_county_df = hex_county_df[state_of_hex == hex_county_df["county_fips"].str[:2]]
+            hex_county_df = hex_county_df.drop_duplicates(subset=["h3_res8_id", "county_fips"])
+
+            hex_county_df[["h3_res8_id", "county_fips", "weight"]].to_sql(
+                "hex_county", conn, if_exists="append", index=False
             )
-
-    # Deduplicate (county_fips, provider_id) to satisfy UNIQUE constraint
-    provider_df = provider_df.sort_values(["county_fips", "provider_id"])
-    provider_df = provider_df.drop_duplicates(
-        subset=["county_fips", "provider_id"], keep="first"
-    )
-
-    print("Provider rows after dedup:", len(provider_df))
-
-    provider_df[provider_cols].to_sql(
-        "provider_summary_by_county", conn, if_exists="append", index=False
-    )
+            conn.commit()
+
+    if sketch_df is not None:
+        with trace.stage("insert_sketches", rows_in=len(sketch_df)):
+            # -----------------------------
+            # INSERT INTO location_sketch
+            # -----------------------------
+            sketch_df["county_fips"] = sketch_df["county_fips"].astype(str).str.zfill(5)
+            sketch_df.to_sql("location_sketch", conn, if_exists="append", index=False)
+            conn.commit()
+
+    if speed_df is not None:
+        with trace.stage("insert_speed", rows_in=len(speed_df)):
+            # -----------------------------
+            # INSERT INTO speed_sketch
+            # -----------------------------
+            speed_df["county_fips"] = speed_df["county_fips"].astype(str).str.zfill(5)
+            speed_df.to_sql("speed_sketch", conn, if_exists="append", index=False)
+            conn.commit()
+
+    if partials_df is not None:
+        with trace.stage("insert_partials", rows_in=len(partials_df)):
+            # -----------------------------
+            # INSERT INTO agg_partials
+            # -----------------------------
+            partials_df["county_fips"] = partials_df["county_fips"].astype(str).str.zfill(5)
+            partials_df.to_sql("agg_partials", conn, if_exists="append", index=False)
+            conn.commit()
+
+    if hex_provider_df is not None:
+        with trace.stage("insert_hex_provider", rows_in=len(hex_provider_df)):
+            # -----------------------------
+            # INSERT INTO hex_provider
+            # -----------------------------
+            hex_provider_df["county_fips"] = hex_provider_df["county_fips"].astype(str).str.zfill(5)
+
+            # keep the entries of the (hex, county) row that landed in
+            # hex_coverage, so row maxima match max_down / max_up
+            hex_home = h3_df.set_index("h3_res8_id")["county_fips"]
+            hex_provider_df = hex_provider_df[
+                hex_provider_df["h3_res8_id"].map(hex_home) == hex_provider_df["county_fips"]
+            ]
+
+            hex_provider_df[["h3_res8_id", "county_fips", "provider_id", "max_down", "max_up"]].to_sql(
+                "hex_provider", conn, if_exists="append", index=False
+            )
+            conn.execute("CREATE INDEX idx_hex_provider_county ON hex_provider(county_fips);")
+            conn.commit()
+
+    if overlap_df is not None:
+        with trace.stage("insert_overlap", rows_in=len(overlap_df)):
+            # -----------------------------
+            # INSERT INTO provider_overlap
+            # -----------------------------
+            overlap_df.to_sql("provider_overlap", conn, if_exists="append", index=False)
+            conn.commit()
+
+    if competition_df is not None:
+        with trace.stage("insert_competition", rows_in=len(competition_df)):
+            # -----------------------------
+            # INSERT INTO county_competition
+            # -----------------------------
+            competition_df["county_fips"] = competition_df["county_fips"].astype(str).str.zfill(5)
+            competition_df.to_sql("county_competition", conn, if_exists="append", index=False)
+            conn.commit()
+
+    if cluster_df is not None:
+        with trace.stage("insert_clusters", rows_in=len(cluster_df)):
+            # -----------------------------
+            # INSERT INTO unserved_cluster
+            # -----------------------------
+            cluster_df.to_sql("unserved_cluster", conn, if_exists="append", index=False)
+            # largest-first listing per level, and lookups by main county
+            conn.execute("CREATE INDEX idx_unserved_cluster_size ON unserved_cluster(level, hexes DESC);")
+            conn.execute("CREATE INDEX idx_unserved_cluster_county ON unserved_cluster(county_fips);")
+            conn.commit()
 
     # -----------------------------
-    # INSERT INTO hex_coverage
+    # INSERT INTO hex_pyramid (from the deduplicated hex rows, so every
+    # hex counts once, under its hex_coverage county)
     # -----------------------------
-    h3_cols = [
-        "h3_res8_id",
-        "county_fips",
-        "lat",
-        "lon",
-        "max_down",
-        "max_up",
-        "provider_count",
-        "provider_names",
-        "tech_types",
-        "service_category",
-    ]
-
-    # Deduplicate by h3_res8_id to satisfy UNIQUE constraint
-    h3_df = h3_df.sort_values(["h3_res8_id", "county_fips"])
-    h3_df = h3_df.drop_duplicates(subset=["h3_res8_id"], keep="first")
-
-    print("H3 rows after dedup:", len(h3_df))
-
-    h3_df[h3_cols].to_sql(
-        "hex_coverage", conn, if_exists="append", index=False
-    )
-
-    conn.commit()
+    pyramid = hex_pyramid(h3_df, hex_provider_df, sketch_df, trace)
+    with trace.stage("insert_pyramid", rows_in=len(pyramid)):
+        pyramid.to_sql("hex_pyramid", conn, if_exists="append", index=False)
+        for sql in PYRAMID_INDEXES:
+            conn.execute(sql)
+        conn.commit()
 
     # -----------------------------
     # SANITY CHECK COUNTS
     # -----------------------------
     print("\nRow counts in SQLite:")
-    for table in ["county_summary", "provider_summary_by_county", "hex_coverage"]:
+    for table in ["county_summary", "provider_summary_by_county", "hex_coverage", "hex_county",
+                  "location_sketch", "speed_sketch", "agg_partials", "hex_provider", "provider_overlap", "county_competition",
+                  "unserved_cluster", "hex_pyramid"]:
         cnt = conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
         print(f"  {table}: {cnt}")
 
     conn.close()
-    print("\nSQLite database created at:", DB_PATH)
+    print("\nSQLite database created at:", db_path)
+    return len(h3_df)
+
+
+def main(
+    path_provider=PATH_PROVIDER,
+    path_county=PATH_COUNTY,
+    path_h3=PATH_H3,
+    db_path=DB_PATH,
+    path_hex_county=PATH_HEX_COUNTY,
+    path_sketches=PATH_SKETCHES,
+    path_speed_sketches=PATH_SPEED_SKETCHES,
+    path_partials=PATH_PARTIALS,
+    path_hex_provider=PATH_HEX_PROVIDER,
+    path_overlap=PATH_OVERLAP,
+    path_competition=PATH_COMPETITION,
+    path_clusters=PATH_CLUSTERS,
+):
+    with PipelineTrace("build_broadband_db") as trace:
+        return build_db(path_provider, path_county, path_h3, db_path, trace, path_hex_county,
+                        path_sketches, path_speed_sketches, path_partials, path_hex_provider,
+                        path_overlap, path_competition, path_clusters)
 
 
 if __name__ == "__main__":
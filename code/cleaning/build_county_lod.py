@@ -0,0 +1,192 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+# -----------------------------
+# FILE PATHS (update if needed)
+# -----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+IN_PATH = PROJECT_ROOT / "datasets" / "counties-10m.json"   # national TopoJSON (us-atlas)
+OUT_DIR = PROJECT_ROOT / "data" / "boundaries"               # -> {STATEFP}/counties_lod{n}.topo.json
+
+# -----------------------------
+# LEVELS OF DETAIL
+# -----------------------------
+# level -> (Douglas-Peucker tolerance in degrees, quantization grid size)
+# Level 0 keeps every source vertex; higher levels are coarser and lighter.
+LOD_LEVELS = {
+    0: (0.0, 100_000),
+    1: (0.01, 20_000),
+    2: (0.03, 5_000),
+}
+
+
+# ==================================================
+# TOPOJSON DECODING
+# ==================================================
+def decode_arcs(topo: dict) -> list:
+    """Return every arc as an (n, 2) float array of lon/lat."""
+    tf = topo.get("transform")
+    arcs = []
+    for arc in topo["arcs"]:
+        a = np.asarray(arc, dtype=np.float64)
+        if tf:
+            a = np.cumsum(a, axis=0) * tf["scale"] + tf["translate"]
+        arcs.append(a)
+    return arcs
+
+
+def geometry_arc_ids(geom: dict) -> list:
+    """Flat list of (non-negative) arc indices used by a Polygon/MultiPolygon."""
+    polys = geom["arcs"] if geom["type"] == "MultiPolygon" else [geom["arcs"]]
+    return [a if a >= 0 else ~a for poly in polys for ring in poly for a in ring]
+
+
+# ==================================================
+# SIMPLIFICATION
+# ==================================================
+def douglas_peucker(points: np.ndarray, tol: float) -> np.ndarray:
+    """Boolean keep-mask for Douglas-Peucker; both endpoints are always kept."""
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    if n <= 2 or tol <= 0:
+        keep[:] = True
+        return keep
+
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        seg = points[j] - points[i]
+        rel = points[i + 1:j] - points[i]
+        seg_len = np.hypot(seg[0], seg[1])
+        if seg_len == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / seg_len
+        k = int(np.argmax(dist))
+        if dist[k] > tol:
+            k += i + 1
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+    return keep
+
+
+def simplify_arc(points: np.ndarray, tol: float) -> np.ndarray:
+    """
+    Simplify one arc. Endpoints are fixed, so arcs shared by two counties
+    stay identical and borders stay shared. Closed arcs (islands, counties
+    bounded by a single arc) keep at least four vertices.
+    """
+    if tol <= 0 or len(points) <= 2:
+        return points
+    closed = np.array_equal(points[0], points[-1])
+    if not closed:
+        return points[douglas_peucker(points, tol)]
+
+    far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    far = min(max(far, 1), len(points) - 2)
+    head = douglas_peucker(points[: far + 1], tol)
+    tail = douglas_peucker(points[far:], tol)
+    keep = np.concatenate([head, tail[1:]])
+    if keep.sum() < 4:
+        keep[len(points) // 4] = keep[(3 * len(points)) // 4] = True
+    return points[keep]
+
+
+# ==================================================
+# STATE TOPOLOGY OUTPUT
+# ==================================================
+def quantize_arcs(arcs: list, bbox, grid: int):
+    """Quantize arcs to a grid over bbox and delta-encode (TopoJSON spec)."""
+    x0, y0, x1, y1 = bbox
+    kx = (x1 - x0) / (grid - 1) if x1 > x0 else 1.0
+    ky = (y1 - y0) / (grid - 1) if y1 > y0 else 1.0
+    out = []
+    for a in arcs:
+        q = np.rint((a - [x0, y0]) / [kx, ky]).astype(np.int64)
+        # drop repeated points created by quantization (keep endpoints)
+        if len(q) > 2:
+            moved = np.any(np.diff(q, axis=0) != 0, axis=1)
+            q = q[np.concatenate([[True], moved[:-1], [True]])]
+        delta = np.vstack([q[:1], np.diff(q, axis=0)])
+        out.append(delta.tolist())
+    return out, {"scale": [kx, ky], "translate": [x0, y0]}
+
+
+def build_state_topology(state_geoms: list, arcs: list, tol: float, grid: int) -> dict:
+    """TopoJSON for one state's counties with arcs re-indexed and simplified."""
+    used = sorted({i for g in state_geoms for i in geometry_arc_ids(g)})
+    remap = {old: new for new, old in enumerate(used)}
+    state_arcs = [simplify_arc(arcs[i], tol) for i in used]
+
+    stacked = np.vstack(state_arcs)
+    bbox = [*stacked.min(axis=0).tolist(), *stacked.max(axis=0).tolist()]
+    q_arcs, transform = quantize_arcs(state_arcs, bbox, grid)
+
+    def reindex(ring):
+        return [remap[a] if a >= 0 else ~remap[~a] for a in ring]
+
+    geometries = []
+    for g in state_geoms:
+        if g["type"] == "MultiPolygon":
+            g_arcs = [[reindex(r) for r in poly] for poly in g["arcs"]]
+        else:
+            g_arcs = [reindex(r) for r in g["arcs"]]
+        geometries.append({
+            "type": g["type"],
+            "arcs": g_arcs,
+            "id": g["id"],
+            "properties": {"GEOID": g["id"], "NAME": g.get("properties", {}).get("name")},
+        })
+
+    return {
+        "type": "Topology",
+        "bbox": bbox,
+        "transform": transform,
+        "objects": {"counties": {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": q_arcs,
+    }
+
+
+def main(in_path=IN_PATH, out_dir=OUT_DIR, states=None):
+    """
+    Write every level of detail for every state (or just `states`, a list
+    of 2-digit state FIPS codes) from one read of the national TopoJSON.
+    """
+    with open(in_path, "r") as f:
+        topo = json.load(f)
+
+    arcs = decode_arcs(topo)
+    counties = topo["objects"]["counties"]["geometries"]
+
+    by_state = {}
+    for g in counties:
+        by_state.setdefault(g["id"][:2], []).append(g)
+    if states is not None:
+        by_state = {s: by_state[s] for s in states if s in by_state}
+
+    print("National arcs:", len(arcs), "| counties:", len(counties), "| states:", len(by_state))
+
+    out_dir = Path(out_dir)
+    for state_fips, geoms in sorted(by_state.items()):
+        state_dir = out_dir / state_fips
+        state_dir.mkdir(parents=True, exist_ok=True)
+        sizes = []
+        for level, (tol, grid) in LOD_LEVELS.items():
+            state_topo = build_state_topology(geoms, arcs, tol, grid)
+            path = state_dir / f"counties_lod{level}.topo.json"
+            with open(path, "w") as out:
+                json.dump(state_topo, out, separators=(",", ":"))
+            sizes.append(f"lod{level}={path.stat().st_size / 1024:.0f}KB")
+        print(f"  {state_fips}: {len(geoms)} counties, " + ", ".join(sizes))
+
+    print("\nCounty boundary levels written to:", out_dir)
+
+
+if __name__ == "__main__":
+    main()
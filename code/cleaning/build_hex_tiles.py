@@ -0,0 +1,366 @@
+import gzip
+import json
+import math
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from h3_compat import h3_boundary, h3_parent
+
+# -----------------------------
+# FILE PATHS (update if needed)
+# -----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DB_PATH    = PROJECT_ROOT / "db" / "broadband_ky.db"
+
+
+def tiles_path_for(db_path, state_fips=None) -> Path:
+    """
+    Tile store next to a DB: <db>_hex.mbtiles, or <db>_<state fips>_hex.mbtiles
+    for one state of a partitioned DB (the dashboard looks them up the same way).
+    """
+    db_path = Path(db_path)
+    suffix = f"_{state_fips}" if state_fips else ""
+    return db_path.with_name(f"{db_path.stem}{suffix}_hex.mbtiles")
+
+
+TILES_PATH = tiles_path_for(DB_PATH)
+
+# -----------------------------
+# TILE PYRAMID SETTINGS
+# -----------------------------
+TILE_EXTENT = 4096
+TILE_MIN_ZOOM = 5
+TILE_MAX_ZOOM = 13
+
+# H3 resolution drawn at each zoom. Coarser zooms draw parent cells so a tile
+# holds a roughly constant number of features at every level.
+ZOOM_RESOLUTION = {5: 5, 6: 6, 7: 6, 8: 7, 9: 7}
+HEX_RESOLUTION = 8
+
+# Worst -> best; a parent cell takes the worst category among its hexes.
+CATEGORY_SEVERITY = ["Unserved", "Underserved", "Unknown", "Served"]
+
+# One vector layer per category so the map can style layers by color
+TILE_LAYERS = {cat: f"hex_{cat.lower()}" for cat in CATEGORY_SEVERITY}
+
+
+def zoom_resolution(z: int) -> int:
+    return ZOOM_RESOLUTION.get(z, HEX_RESOLUTION)
+
+
+# ==================================================
+# MINIMAL MAPBOX VECTOR TILE (MVT v2) ENCODER
+# ==================================================
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _zigzag(n: int) -> int:
+    return (n << 1) ^ (n >> 31)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _len_field(field: int, payload: bytes) -> bytes:
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _packed(field: int, values) -> bytes:
+    return _len_field(field, b"".join(_varint(v) for v in values))
+
+
+def _value(v) -> bytes:
+    """Encode a Layer.Value message (strings and non-negative ints only)."""
+    if isinstance(v, str):
+        return _len_field(1, v.encode("utf-8"))
+    return _key(5, 0) + _varint(int(v))
+
+
+def _polygon_commands(xs: list, ys: list) -> list:
+    """
+    Geometry commands for a single-ring polygon in tile coordinates.
+
+    MVT exterior rings must have positive area in tile space (y down),
+    so the ring is reversed when needed.
+    """
+    # drop consecutive duplicate vertices introduced by rounding
+    ring = [(xs[0], ys[0])]
+    for pt in zip(xs[1:], ys[1:]):
+        if pt != ring[-1]:
+            ring.append(pt)
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+    if len(ring) < 3:
+        return []
+
+    area2 = 0
+    for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+        area2 += x0 * y1 - x1 * y0
+    if area2 < 0:
+        ring.reverse()
+
+    x_prev, y_prev = ring[0]
+    cmds = [(1 << 3) | 1, _zigzag(x_prev), _zigzag(y_prev), ((len(ring) - 1) << 3) | 2]
+    for x, y in ring[1:]:
+        cmds.append(_zigzag(x - x_prev))
+        cmds.append(_zigzag(y - y_prev))
+        x_prev, y_prev = x, y
+    cmds.append((1 << 3) | 7)
+    return cmds
+
+
+def encode_layer(name: str, features: list) -> bytes:
+    """
+    Encode one MVT layer. `features` is a list of (id, xs, ys, properties)
+    with vertex coordinates already in tile space.
+    """
+    keys, key_idx = [], {}
+    values, value_idx = [], {}
+    body = bytearray()
+
+    for fid, xs, ys, props in features:
+        cmds = _polygon_commands(xs, ys)
+        if not cmds:
+            continue
+        tags = []
+        for k, v in props.items():
+            if k not in key_idx:
+                key_idx[k] = len(keys)
+                keys.append(k)
+            vk = (type(v).__name__, v)
+            if vk not in value_idx:
+                value_idx[vk] = len(values)
+                values.append(v)
+            tags += [key_idx[k], value_idx[vk]]
+
+        feat = _key(1, 0) + _varint(fid)
+        feat += _packed(2, tags)
+        feat += _key(3, 0) + _varint(3)  # POLYGON
+        feat += _packed(4, cmds)
+        body += _len_field(2, feat)
+
+    layer = _key(15, 0) + _varint(2)
+    layer += _len_field(1, name.encode("utf-8"))
+    layer += bytes(body)
+    for k in keys:
+        layer += _len_field(3, k.encode("utf-8"))
+    for v in values:
+        layer += _len_field(4, _value(v))
+    layer += _key(5, 0) + _varint(TILE_EXTENT)
+    return layer
+
+
+# ==================================================
+# HEX CELLS PER RESOLUTION
+# ==================================================
+def cells_at_resolution(hex_df: pd.DataFrame, res: int) -> pd.DataFrame:
+    """Roll res-8 hexes up to `res`: one row per cell with worst category and hex count."""
+    severity = (
+        pd.Categorical(hex_df["service_category"].fillna("Unknown"), categories=CATEGORY_SEVERITY)
+        .codes
+    )
+    severity = np.where(severity < 0, CATEGORY_SEVERITY.index("Unknown"), severity)
+
+    cells = hex_df["h3_res8_id"]
+    if res != HEX_RESOLUTION:
+        lookup = {h: h3_parent(h, res) for h in cells.unique()}
+        cells = cells.map(lookup)
+
+    out = (
+        pd.DataFrame({"cell": cells.values, "severity": severity})
+        .groupby("cell")
+        .agg(severity=("severity", "min"), hex_count=("severity", "size"))
+        .reset_index()
+    )
+    out["service_category"] = np.array(CATEGORY_SEVERITY)[out["severity"]]
+    return out
+
+
+def cell_rings(cells) -> tuple:
+    """Return (lat, lon, offsets) arrays with all boundary vertices concatenated."""
+    rings = [h3_boundary(h) for h in cells]
+    sizes = np.array([len(r) for r in rings])
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    verts = np.array([v for r in rings for v in r], dtype=np.float64)
+    return verts[:, 0], verts[:, 1], offsets
+
+
+def world_pixels(lat: np.ndarray, lon: np.ndarray, z: int):
+    """Web-mercator pixel coordinates at zoom z (TILE_EXTENT units per tile)."""
+    scale = TILE_EXTENT * (1 << z)
+    x = (lon + 180.0) / 360.0 * scale
+    lat_r = np.radians(np.clip(lat, -85.0511, 85.0511))
+    y = (1.0 - np.log(np.tan(lat_r) + 1.0 / np.cos(lat_r)) / math.pi) / 2.0 * scale
+    return x, y
+
+
+# ==================================================
+# BUILD TILES
+# ==================================================
+def build_zoom(cells_df: pd.DataFrame, lat, lon, offsets, z: int):
+    """Yield (tile_x, tile_y, tile_bytes) for every non-empty tile at zoom z."""
+    px_x, px_y = world_pixels(lat, lon, z)
+    starts, ends = offsets[:-1], offsets[1:]
+
+    # tile range covered by each cell's bounding box
+    tx0 = (np.minimum.reduceat(px_x, starts) // TILE_EXTENT).astype(np.int64)
+    tx1 = (np.maximum.reduceat(px_x, starts) // TILE_EXTENT).astype(np.int64)
+    ty0 = (np.minimum.reduceat(px_y, starts) // TILE_EXTENT).astype(np.int64)
+    ty1 = (np.maximum.reduceat(px_y, starts) // TILE_EXTENT).astype(np.int64)
+
+    # (cell, tile) pairs; a border cell goes into every tile it touches
+    pairs = []
+    for dx in range(int((tx1 - tx0).max()) + 1):
+        for dy in range(int((ty1 - ty0).max()) + 1):
+            m = (tx0 + dx <= tx1) & (ty0 + dy <= ty1)
+            idx = np.flatnonzero(m)
+            pairs.append(np.column_stack([idx, tx0[idx] + dx, ty0[idx] + dy]))
+    pairs = np.concatenate(pairs)
+    pairs = pairs[np.lexsort((pairs[:, 0], pairs[:, 2], pairs[:, 1]))]
+
+    categories = cells_df["service_category"].tolist()
+    hex_counts = cells_df["hex_count"].tolist()
+    res = zoom_resolution(z)
+
+    # round once globally; subtracting whole-tile offsets keeps them integral
+    ix = np.rint(px_x).astype(np.int64).tolist()
+    iy = np.rint(px_y).astype(np.int64).tolist()
+    starts, ends = starts.tolist(), ends.tolist()
+
+    tile_keys = pairs[:, 1:]
+    breaks = np.flatnonzero(np.any(np.diff(tile_keys, axis=0) != 0, axis=1)) + 1
+    for chunk in np.split(pairs, breaks):
+        tile_x, tile_y = int(chunk[0, 1]), int(chunk[0, 2])
+        by_layer = {cat: [] for cat in CATEGORY_SEVERITY}
+        x_off, y_off = tile_x * TILE_EXTENT, tile_y * TILE_EXTENT
+        for cell_i in chunk[:, 0].tolist():
+            s, e = starts[cell_i], ends[cell_i]
+            cat = categories[cell_i]
+            by_layer[cat].append((
+                cell_i + 1,
+                [x - x_off for x in ix[s:e]],
+                [y - y_off for y in iy[s:e]],
+                {"service_category": cat, "hex_count": hex_counts[cell_i], "resolution": res},
+            ))
+
+        tile = b"".join(
+            _len_field(3, encode_layer(TILE_LAYERS[cat], feats))
+            for cat, feats in by_layer.items()
+            if feats
+        )
+        yield tile_x, tile_y, gzip.compress(tile)
+
+
+def write_metadata(conn, lat, lon, name="KY"):
+    bounds = [float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max())]
+    center = [(bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2, 7]
+    vector_layers = [
+        {
+            "id": layer,
+            "fields": {"service_category": "String", "hex_count": "Number", "resolution": "Number"},
+            "minzoom": TILE_MIN_ZOOM,
+            "maxzoom": TILE_MAX_ZOOM,
+        }
+        for layer in TILE_LAYERS.values()
+    ]
+    meta = {
+        "name": f"{name} broadband hex coverage",
+        "format": "pbf",
+        "type": "overlay",
+        "minzoom": str(TILE_MIN_ZOOM),
+        "maxzoom": str(TILE_MAX_ZOOM),
+        "bounds": ",".join(f"{b:.6f}" for b in bounds),
+        "center": ",".join(f"{c:.6f}" for c in center),
+        "json": json.dumps({"vector_layers": vector_layers}),
+    }
+    conn.executemany("INSERT INTO metadata (name, value) VALUES (?, ?);", meta.items())
+
+
+def main(db_path=DB_PATH, tiles_path=None, state_fips=None, name="KY"):
+    """Render the hexes of `db_path` (one state's if state_fips is given) into an MBTiles store."""
+    if tiles_path is None:
+        tiles_path = tiles_path_for(db_path, state_fips)
+    conn = sqlite3.connect(str(db_path))
+    sql = "SELECT h3_res8_id, service_category FROM hex_coverage"
+    params = ()
+    if state_fips is not None:
+        sql += " WHERE county_fips LIKE ?"
+        params = (f"{state_fips}%",)
+    hex_df = pd.read_sql(sql, conn, params=params)
+    conn.close()
+    print("Hex rows:", len(hex_df))
+    if hex_df.empty:
+        print("No hexes; tile store not written.")
+        return None
+
+    # -----------------------------
+    # CREATE MBTILES STORE
+    # -----------------------------
+    tiles_path = Path(tiles_path)
+    tmp_path = tiles_path.with_suffix(".mbtiles.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    out = sqlite3.connect(str(tmp_path))
+    out.execute("CREATE TABLE metadata (name TEXT, value TEXT);")
+    out.execute(
+        """
+        CREATE TABLE tiles (
+            zoom_level  INTEGER,
+            tile_column INTEGER,
+            tile_row    INTEGER,
+            tile_data   BLOB
+        );
+        """
+    )
+
+    # -----------------------------
+    # RENDER EACH ZOOM LEVEL
+    # -----------------------------
+    geometry = {}
+    for z in range(TILE_MIN_ZOOM, TILE_MAX_ZOOM + 1):
+        res = zoom_resolution(z)
+        if res not in geometry:
+            cells_df = cells_at_resolution(hex_df, res)
+            geometry[res] = (cells_df,) + cell_rings(cells_df["cell"])
+        cells_df, lat, lon, offsets = geometry[res]
+
+        n_tiles = 0
+        n_bytes = 0
+        rows = []
+        for tile_x, tile_y, data in build_zoom(cells_df, lat, lon, offsets, z):
+            # MBTiles uses TMS row numbering (y flipped)
+            rows.append((z, tile_x, (1 << z) - 1 - tile_y, data))
+            n_tiles += 1
+            n_bytes += len(data)
+        out.executemany("INSERT INTO tiles VALUES (?, ?, ?, ?);", rows)
+        print(f"  z{z}: res {res}, {len(cells_df):,} cells, {n_tiles:,} tiles, {n_bytes / 1e6:.1f} MB")
+
+    res8 = geometry[HEX_RESOLUTION]
+    write_metadata(out, res8[1], res8[2], name)
+    out.execute(
+        "CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);"
+    )
+    out.commit()
+    out.close()
+
+    tmp_path.replace(tiles_path)
+    print("\nHex tile store written to:", tiles_path)
+    return tiles_path
+
+
+if __name__ == "__main__":
+    main()
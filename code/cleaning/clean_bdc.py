@@ -1,16 +1,11 @@
 import pandas as pd
 
-in_path  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_all_raw.csv"
-out_path = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_clean_step2.csv"
+from pipeline_trace import PipelineTrace
 
-df = pd.read_csv(in_path, dtype=str)
+IN_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_all_raw.csv"
+OUT_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_clean_step2.csv"
 
-print("Initial rows:", len(df))
-
-# ------------------------------------------------
-# 1. KEEP ONLY NECESSARY COLUMNS
-# ------------------------------------------------
-keep_cols = [
+KEEP_COLS = [
     "provider_id",
     "brand_name",
     "technology",
@@ -18,40 +13,69 @@ keep_cols = [
     "max_advertised_upload_speed",
     "block_geoid"
 ]
-df = df[keep_cols]
 
-# ------------------------------------------------
-# 2. REMOVE MISSING GEOID OR SPEED INFO
-# ------------------------------------------------
-df = df.dropna(subset=[
-    "block_geoid",
-    "max_advertised_download_speed",
-    "max_advertised_upload_speed"
-])
-
-# ------------------------------------------------
-# 3. CONVERT SPEEDS TO NUMERIC
-# ------------------------------------------------
-df["maxDown"] = pd.to_numeric(df["max_advertised_download_speed"], errors="coerce")
-df["maxUp"]   = pd.to_numeric(df["max_advertised_upload_speed"], errors="coerce")
-
-# drop rows where conversion failed
-df = df.dropna(subset=["maxDown", "maxUp"])
-
-# ------------------------------------------------
-# 4. ADD COUNTY FIPS (first 5 digits of block_geoid)
-# ------------------------------------------------
-df["county_fips"] = df["block_geoid"].str[:5]
-
-# ------------------------------------------------
-# 5. KEEP ONLY KENTUCKY (FIPS starts with '21')
-# ------------------------------------------------
-df = df[df["county_fips"].str.startswith("21")]
-
-print("Rows after KY filter:", len(df))
-
-# ------------------------------------------------
-# 6. SAVE CLEANED FILE
-# ------------------------------------------------
-df.to_csv(out_path, index=False)
-print("Cleaned file saved to:", out_path)
+# kept when the raw file has them (distinct-location sketches need them)
+OPTIONAL_COLS = ["location_id", "h3_res8_id"]
+
+
+def clean_bdc(df: pd.DataFrame, state_fips: str = "21") -> pd.DataFrame:
+    """Steps 1-5 below on a raw BDC frame read with dtype=str."""
+    # ------------------------------------------------
+    # 1. KEEP ONLY NECESSARY COLUMNS
+    # ------------------------------------------------
+    df = df[KEEP_COLS + [c for c in OPTIONAL_COLS if c in df.columns]]
+
+    # ------------------------------------------------
+    # 2. REMOVE MISSING GEOID OR SPEED INFO
+    # ------------------------------------------------
+    df = df.dropna(subset=[
+        "block_geoid",
+        "max_advertised_download_speed",
+        "max_advertised_upload_speed"
+    ])
+
+    # ------------------------------------------------
+    # 3. CONVERT SPEEDS TO NUMERIC
+    # ------------------------------------------------
+    df["maxDown"] = pd.to_numeric(df["max_advertised_download_speed"], errors="coerce")
+    df["maxUp"]   = pd.to_numeric(df["max_advertised_upload_speed"], errors="coerce")
+
+    # drop rows where conversion failed
+    df = df.dropna(subset=["maxDown", "maxUp"])
+
+    # ------------------------------------------------
+    # 4. ADD COUNTY FIPS (first 5 digits of block_geoid)
+    # ------------------------------------------------
+    df["county_fips"] = df["block_geoid"].str[:5]
+
+    # ------------------------------------------------
+    # 5. KEEP ONLY ONE STATE (FIPS starts with state_fips, '21' = Kentucky)
+    # ------------------------------------------------
+    return df[df["county_fips"].str.startswith(state_fips)]
+
+
+def main(in_path=IN_PATH, out_path=OUT_PATH, state_fips="21"):
+    with PipelineTrace("clean_bdc") as trace:
+        with trace.stage("load") as s:
+            df = pd.read_csv(in_path, dtype=str)
+            n_rows = s.rows_out = len(df)
+
+        print("Initial rows:", n_rows)
+
+        with trace.stage("filter", rows_in=n_rows) as s:
+            df = clean_bdc(df, state_fips)
+            s.rows_out = len(df)
+
+        print(f"Rows after state {state_fips} filter:", len(df))
+
+        # ------------------------------------------------
+        # 6. SAVE CLEANED FILE
+        # ------------------------------------------------
+        with trace.stage("write", rows_in=len(df)):
+            df.to_csv(out_path, index=False)
+        print("Cleaned file saved to:", out_path)
+    return n_rows
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,42 @@
 import json
+import sys
+
+from states import STATE_NAMES, resolve_state
 
 IN_PATH = r"H:\Broadband_Project_1\data\counties.geojson"   # your downloaded file
 OUT_PATH = r"H:\Broadband_Project_1\data\ky_counties.geojson"
 
-with open(IN_PATH, "r") as f:
-    data = json.load(f)
 
-features = data["features"]
+def filter_state_features(data: dict, state_fips: str = "21") -> dict:
+    """FeatureCollection with only the counties of one state (STATEFP)."""
+    features = [f for f in data["features"] if f["properties"].get("STATEFP") == state_fips]
+
+    # Ensure GEOID exists (STATEFP + COUNTYFP)
+    for f in features:
+        props = f["properties"]
+        if "GEOID" not in props:
+            props["GEOID"] = props["STATEFP"] + props["COUNTYFP"]
+
+    return {"type": "FeatureCollection", "features": features}
+
+
+def main(in_path=IN_PATH, out_path=OUT_PATH, state="21"):
+    state_fips = resolve_state(state)
+    with open(in_path, "r") as f:
+        data = json.load(f)
 
-# Keep only Kentucky (STATEFP = "21")
-ky_features = [f for f in features if f["properties"].get("STATEFP") == "21"]
+    state_geo = filter_state_features(data, state_fips)
 
-# Ensure GEOID exists (STATEFP + COUNTYFP)
-for f in ky_features:
-    props = f["properties"]
-    if "GEOID" not in props:
-        props["GEOID"] = props["STATEFP"] + props["COUNTYFP"]
+    with open(out_path, "w") as out:
+        json.dump(state_geo, out)
 
-# Build final GeoJSON
-ky_geo = {
-    "type": "FeatureCollection",
-    "features": ky_features
-}
+    print("Saved:", out_path)
+    print(f"{STATE_NAMES[state_fips]} counties:", len(state_geo["features"]))
 
-with open(OUT_PATH, "w") as out:
-    json.dump(ky_geo, out)
 
-print("Saved:", OUT_PATH)
-print("Kentucky counties:", len(ky_features))
+if __name__ == "__main__":
+    # python filter_ky_geojson.py [STATE] [OUT_PATH]   (default: Kentucky)
+    if len(sys.argv) > 1:
+        main(out_path=sys.argv[2] if len(sys.argv) > 2 else OUT_PATH, state=sys.argv[1])
+    else:
+        main()
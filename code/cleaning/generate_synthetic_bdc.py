@@ -0,0 +1,366 @@
+"""
+Synthetic FCC BDC availability file for offline pipeline and dashboard load tests.
+
+Writes rows with the raw BDC columns clean_bdc.py and step_h3_points.py read.
+Kentucky counties take their provider mix, location counts and speed
+distributions from datasets/bdc_data_1/final/provider_summary_by_county.csv;
+counties in other states borrow a Kentucky county's profile. Hex cells come
+from the county polygons in data/counties.geojson, so every row's H3 cell,
+block GEOID and state agree.
+
+Output is deterministic for a given seed and row count, and is written in
+chunks so tens of millions of rows fit in a small, fixed amount of memory.
+
+    python code/cleaning/generate_synthetic_bdc.py --rows 1000000
+    python code/cleaning/generate_synthetic_bdc.py --scale county --county 21195 --rows 50000
+    python code/cleaning/generate_synthetic_bdc.py --scale national --rows 30000000 --out bdc.csv.gz
+"""
+import argparse
+import gzip
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from h3_compat import polygon_to_cells
+from states import STATE_USPS, resolve_state
+
+# -----------------------------
+# FILE PATHS (update if needed)
+# -----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PROVIDER_PATH = PROJECT_ROOT / "datasets" / "bdc_data_1" / "final" / "provider_summary_by_county.csv"
+COUNTIES_PATH = PROJECT_ROOT / "data" / "counties.geojson"
+OUT_PATH = PROJECT_ROOT / "datasets" / "bdc_data_1" / "processed" / "bdc_synthetic_raw.csv"
+
+# -----------------------------
+# GENERATOR SETTINGS
+# -----------------------------
+# counties are filled with res-7 cells; each location then lands in one
+# of the cell's res-8 children
+FILL_RES = 7
+HEX_RES = 8
+
+ROWS_PER_LOCATION = 3.0      # provider/technology rows per location
+CHUNK_ROWS = 1_000_000
+
+DEFAULT_ROWS = {"county": 50_000, "state": 1_000_000, "national": 10_000_000}
+
+DOWN_TIERS = np.array([10, 25, 50, 75, 100, 200, 300, 500, 1000, 2000, 5000, 8000, 10000], dtype=np.int32)
+UP_TIERS = np.array([1, 3, 5, 10, 20, 35, 50, 100, 500, 1000, 2000, 5000, 8000, 10000], dtype=np.int32)
+
+RAW_COLUMNS = [
+    "frn",
+    "provider_id",
+    "brand_name",
+    "location_id",
+    "technology",
+    "max_advertised_download_speed",
+    "max_advertised_upload_speed",
+    "low_latency",
+    "business_residential_code",
+    "state_usps",
+    "block_geoid",
+    "h3_res8_id",
+]
+
+# technology codes by provider name (step_h3_points.TECH_MAP)
+CABLE_NAMES = ["spectrum", "xfinity", "mediacom", "optimum", "zito", "cable", "tv service", "w a t c h"]
+LICENSED_FW_NAMES = ["t-mobile", "verizon"]
+UNLICENSED_FW_NAMES = ["wimax", "fwa", "wireless", "kentucky fi", "duobroadband"]
+
+
+# ==================================================
+# PROFILES (what a county's rows look like)
+# ==================================================
+def provider_tech(name: str):
+    """(technology code for >=100 Mbps rows, code for slower rows) for a provider."""
+    lower = str(name).lower()
+    if any(w in lower for w in LICENSED_FW_NAMES):
+        return "71", "71"
+    if any(w in lower for w in UNLICENSED_FW_NAMES):
+        return "70", "70"
+    if any(w in lower for w in CABLE_NAMES):
+        return "40", "40"
+    return "50", "10"       # telco: fiber where fast, copper otherwise
+
+
+def tier_weights(avg: float, tiers: np.ndarray) -> np.ndarray:
+    """Weights over `tiers` peaked at the tier nearest `avg` (log scale)."""
+    avg = max(float(avg), 1.0)
+    w = np.exp(-2.0 * np.abs(np.log(tiers / avg)))
+    return w / w.sum()
+
+
+def load_profiles(provider_path=PROVIDER_PATH) -> pd.DataFrame:
+    """
+    One row per (county, provider): row share within the county, download
+    tier probabilities, upload ratio and the share of slow uploads.
+    """
+    prov = pd.read_csv(provider_path, dtype={"county_fips": str, "provider_id": str})
+    prov["county_fips"] = prov["county_fips"].str.zfill(5)
+    for col in ["avg_down", "avg_up", "locations", "underserved_locations", "locations_below100"]:
+        prov[col] = pd.to_numeric(prov[col], errors="coerce").fillna(0)
+    prov = prov[prov["locations"] > 0].reset_index(drop=True)
+
+    prov["share"] = prov["locations"] / prov.groupby("county_fips")["locations"].transform("sum")
+    p_below = (prov["locations_below100"] / prov["locations"]).clip(0, 1)
+    p_under = (prov["underserved_locations"] / prov["locations"]).clip(0, 1)
+    prov["p_below100"] = p_below
+    # rows >= 100 Mbps down that still miss the 20 Mbps upload bar
+    prov["p_slow_up"] = ((p_under - p_below) / (1 - p_below).replace(0, np.nan)).clip(0, 1).fillna(0)
+    prov["up_ratio"] = (prov["avg_up"] / prov["avg_down"].replace(0, np.nan)).fillna(0.1).clip(0.01, 1.0)
+
+    techs = prov["provider_name"].map(provider_tech)
+    prov["tech_fast"] = [t[0] for t in techs]
+    prov["tech_slow"] = [t[1] for t in techs]
+    return prov
+
+
+def down_tier_probs(prof: pd.DataFrame) -> np.ndarray:
+    """
+    (n_profiles, n_tiers) download tier probabilities. The <100 Mbps share
+    matches the profile; the fast tiers are centred so the overall mean
+    lands near the profile's avg_down.
+    """
+    slow = DOWN_TIERS < 100
+    probs = np.zeros((len(prof), len(DOWN_TIERS)))
+    for i, (avg, p_below) in enumerate(zip(prof["avg_down"], prof["p_below100"])):
+        w_slow = tier_weights(min(avg, 75), DOWN_TIERS) * slow
+        w_slow /= w_slow.sum()
+        slow_mean = (w_slow * DOWN_TIERS).sum()
+        fast_mean = (avg - p_below * slow_mean) / max(1 - p_below, 1e-9)
+        w_fast = tier_weights(np.clip(fast_mean, 100, DOWN_TIERS.max()), DOWN_TIERS) * ~slow
+        w_fast /= w_fast.sum()
+        probs[i] = p_below * w_slow + (1 - p_below) * w_fast
+    return probs
+
+
+# ==================================================
+# GEOGRAPHY
+# ==================================================
+def read_county_features(counties_path=COUNTIES_PATH) -> list:
+    with open(counties_path, "r") as f:
+        return json.load(f)["features"]
+
+
+def select_counties(features: list, scale: str, state_fips: str, county_fips=None) -> list:
+    """County features in scope, sorted by GEOID."""
+    out = []
+    for feat in features:
+        props = feat["properties"]
+        if props["STATEFP"] not in STATE_USPS:
+            continue
+        if scale == "county" and props["GEOID"] != county_fips:
+            continue
+        if scale == "state" and props["STATEFP"] != state_fips:
+            continue
+        out.append(feat)
+    return sorted(out, key=lambda f: f["properties"]["GEOID"])
+
+
+def county_cells(feature) -> np.ndarray:
+    """Res-FILL_RES cells covering a county, as sorted uint64."""
+    cells = polygon_to_cells(feature["geometry"], FILL_RES)
+    return np.sort(np.array([int(c, 16) for c in cells], dtype=np.uint64))
+
+
+def splitmix64(x: np.ndarray) -> np.ndarray:
+    """Cheap, well-mixed 64-bit hash (vectorized)."""
+    x = x.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def child_cell(parent: np.ndarray, digit: np.ndarray) -> np.ndarray:
+    """Res-(FILL_RES+1) child of each parent cell picked by `digit` (0-6)."""
+    res_mask = np.uint64(0xF) << np.uint64(52)
+    shift = np.uint64((15 - HEX_RES) * 3)
+    out = (parent & ~res_mask) | (np.uint64(HEX_RES) << np.uint64(52))
+    out = out & ~(np.uint64(7) << shift)
+    return out | (digit.astype(np.uint64) << shift)
+
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_NIBBLE_SHIFTS = np.arange(56, -1, -4, dtype=np.uint64)
+
+
+def cells_to_hex(cells: np.ndarray) -> np.ndarray:
+    """uint64 H3 cells -> 15-char lowercase hex strings (vectorized)."""
+    nibbles = (cells[:, None] >> _NIBBLE_SHIFTS) & np.uint64(0xF)
+    chars = _HEX_DIGITS[nibbles.astype(np.intp)]
+    return np.ascontiguousarray(chars).view("S15").ravel().astype(str)
+
+
+# ==================================================
+# GENERATOR
+# ==================================================
+class SyntheticBDC:
+    def __init__(self, scale="state", state_fips="21", county_fips=None, n_rows=None, seed=0,
+                 provider_path=PROVIDER_PATH, counties_path=COUNTIES_PATH):
+        self.seed = seed
+        self.n_rows = int(n_rows or DEFAULT_ROWS[scale])
+
+        profiles = load_profiles(provider_path)
+        all_features = read_county_features(counties_path)
+        features = select_counties(all_features, scale, state_fips, county_fips)
+        if not features:
+            raise ValueError(f"No counties found for scale={scale} state={state_fips} county={county_fips}")
+
+        # KY profile rows grouped by county; other counties borrow one
+        by_county = {k: idx.to_numpy() for k, idx in profiles.groupby("county_fips").groups.items()}
+        ky_counties = sorted(by_county)
+        ky_rows = profiles.groupby("county_fips")["locations"].sum()
+
+        # each county in scope -> the profile county it borrows rows from
+        self.geoids, self.source, weights, cells = [], [], [], []
+        for feat in features:
+            geoid = feat["properties"]["GEOID"]
+            c = county_cells(feat)
+            if len(c) == 0:
+                continue
+            if geoid in by_county:
+                src = geoid
+            else:
+                src = ky_counties[int(splitmix64(np.array([int(geoid)]))[0] % np.uint64(len(ky_counties)))]
+            self.geoids.append(geoid)
+            self.source.append(src)
+            weights.append(ky_rows[src])
+            cells.append(c)
+
+        self.county_p = np.asarray(weights, dtype=float) / np.sum(weights)
+        self.cell_offsets = np.concatenate([[0], np.cumsum([len(c) for c in cells])])
+        self.cells = np.concatenate(cells)
+
+        # locations per county and a global id offset for each
+        n_locations = np.maximum(1, np.round(self.county_p * self.n_rows / ROWS_PER_LOCATION)).astype(np.int64)
+        self.loc_counts = n_locations
+        self.loc_offsets = np.concatenate([[0], np.cumsum(n_locations)])
+
+        # profile rows in county order; a flat cumulative-share table lets
+        # one searchsorted pick a provider for every row at once
+        prof_idx = [by_county[src] for src in self.source]
+        share = profiles["share"].to_numpy()
+        prof_cum = []
+        for i, idx in enumerate(prof_idx):
+            cum = np.cumsum(share[idx])
+            prof_cum.append(i + cum / cum[-1])
+        prof_idx = np.concatenate(prof_idx)
+        self.prof = profiles.iloc[prof_idx].reset_index(drop=True)
+        self.prof_cum = np.concatenate(prof_cum)
+
+        # per-profile download tier table, flattened the same way
+        probs = down_tier_probs(profiles)[prof_idx]
+        self.tier_cum = (np.arange(len(self.prof))[:, None] + np.cumsum(probs, axis=1)).ravel()
+        self.tier_cum[len(DOWN_TIERS) - 1::len(DOWN_TIERS)] = np.arange(1, len(self.prof) + 1)
+
+        self.state_of = np.array([STATE_USPS[g[:2]] for g in self.geoids])
+        self.geoid_arr = np.array(self.geoids)
+
+    def chunk(self, index: int, n: int) -> pd.DataFrame:
+        """Rows [index*CHUNK_ROWS, +n): a pure function of (seed, index)."""
+        rng = np.random.default_rng([self.seed, index])
+
+        county = rng.choice(len(self.geoids), size=n, p=self.county_p)
+        loc_in_county = (rng.random(n) * self.loc_counts[county]).astype(np.int64)
+        location_id = 1_000_000_000 + self.loc_offsets[county] + loc_in_county
+
+        # a location always maps to the same cell and block
+        h = splitmix64(location_id)
+        n_cells = (self.cell_offsets[county + 1] - self.cell_offsets[county]).astype(np.uint64)
+        cell_idx = (h % n_cells).astype(np.int64)
+        parent = self.cells[self.cell_offsets[county] + cell_idx]
+        hex_ids = child_cell(parent, (h >> np.uint64(40)) % np.uint64(7))
+        tract = 100 + cell_idx // 25
+        block = 1000 + (h >> np.uint64(20)) % np.uint64(3000)
+
+        prof = np.searchsorted(self.prof_cum, county + rng.random(n), side="right")
+        prof = np.minimum(prof, len(self.prof) - 1)
+        tier = np.searchsorted(self.tier_cum, prof + rng.random(n), side="right") - prof * len(DOWN_TIERS)
+        down = DOWN_TIERS[np.clip(tier, 0, len(DOWN_TIERS) - 1)]
+
+        ratio = self.prof["up_ratio"].to_numpy()[prof]
+        up_idx = np.clip(np.searchsorted(UP_TIERS, down * ratio), 0, len(UP_TIERS) - 1)
+        up = UP_TIERS[up_idx]
+        slow_up = (down >= 100) & (rng.random(n) < self.prof["p_slow_up"].to_numpy()[prof])
+        up = np.where(slow_up, UP_TIERS[rng.integers(0, 4, n)], np.maximum(up, np.where(down >= 100, 20, 1)))
+        up = np.minimum(up, down)
+
+        tech = np.where(
+            down >= 100,
+            self.prof["tech_fast"].to_numpy()[prof],
+            self.prof["tech_slow"].to_numpy()[prof],
+        )
+        provider_id = self.prof["provider_id"].to_numpy()[prof]
+
+        geoid = self.geoid_arr[county]
+        return pd.DataFrame({
+            "frn": np.char.zfill(provider_id.astype(str), 10),
+            "provider_id": provider_id,
+            "brand_name": self.prof["provider_name"].to_numpy()[prof],
+            "location_id": location_id,
+            "technology": tech,
+            "max_advertised_download_speed": down,
+            "max_advertised_upload_speed": up,
+            "low_latency": 1,
+            "business_residential_code": np.where(h % np.uint64(10) == 0, "B", "R"),
+            "state_usps": self.state_of[county],
+            "block_geoid": np.char.add(
+                np.char.add(geoid, np.char.zfill(tract.astype(str), 6)), block.astype(str)
+            ),
+            "h3_res8_id": cells_to_hex(hex_ids),
+        }, columns=RAW_COLUMNS)
+
+    def write(self, out_path) -> int:
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        if out_path.suffix == ".gz":
+            sink = gzip.open(out_path, "wb", compresslevel=1)
+        else:
+            sink = open(out_path, "wb")
+
+        # Arrow's CSV writer is several times faster than DataFrame.to_csv
+        written, index, writer = 0, 0, None
+        with sink:
+            while written < self.n_rows:
+                n = min(CHUNK_ROWS, self.n_rows - written)
+                table = pa.Table.from_pandas(self.chunk(index, n), preserve_index=False)
+                if writer is None:
+                    writer = pacsv.CSVWriter(sink, table.schema)
+                writer.write_table(table)
+                written += n
+                index += 1
+            writer.close()
+        return written
+
+
+def main(out_path=OUT_PATH, n_rows=None, scale="state", state="KY", county=None, seed=0):
+    state_fips = resolve_state(state)
+    if scale == "county" and county is None:
+        raise ValueError("--county is required with --scale county")
+
+    t0 = time.perf_counter()
+    gen = SyntheticBDC(scale, state_fips, county, n_rows, seed)
+    print(f"Counties: {len(gen.geoids)} | res-{FILL_RES} cells: {len(gen.cells):,} "
+          f"| locations: {gen.loc_offsets[-1]:,} | setup {time.perf_counter() - t0:.1f}s")
+
+    n = gen.write(out_path)
+    print(f"Wrote {n:,} rows to {out_path} in {time.perf_counter() - t0:.1f}s")
+    return n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic raw FCC BDC file.")
+    parser.add_argument("--rows", type=int, help="rows to write (default depends on --scale)")
+    parser.add_argument("--scale", choices=["county", "state", "national"], default="state")
+    parser.add_argument("--state", default="KY", help="USPS code or 2-digit FIPS (state scale)")
+    parser.add_argument("--county", help="5-digit county FIPS (county scale)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=OUT_PATH, help=".csv or .csv.gz")
+    args = parser.parse_args()
+    main(args.out, args.rows, args.scale, args.state, args.county, args.seed)
@@ -0,0 +1,80 @@
+"""Small wrappers that work with both the old (v3) and new (v4) h3-py APIs."""
+import numpy as np
+
+# ---- handle both old and new h3-py APIs ----
+try:
+    # older style: from h3 import h3
+    from h3 import h3 as h3lib
+except ImportError:
+    import h3 as h3lib
+
+# what local_ij raises for a cell it can't place on the origin's grid
+# (v4: H3FailedError; v3 raises ValueError)
+LocalIJError = getattr(h3lib, "H3FailedError", ValueError)
+
+
+def h3_to_lat_lon(h):
+    """Return (lat, lon) for an H3 cell, handling both old and new APIs."""
+    try:
+        # old API: h3.h3_to_geo(h)
+        if hasattr(h3lib, "h3_to_geo"):
+            return h3lib.h3_to_geo(h)
+        # new API: h3.cell_to_latlng(h)
+        if hasattr(h3lib, "cell_to_latlng"):
+            return h3lib.cell_to_latlng(h)
+    except Exception:
+        return None, None
+    return None, None
+
+
+def h3_parent(h, res):
+    """Return the parent of an H3 cell at resolution `res`."""
+    if hasattr(h3lib, "cell_to_parent"):
+        return h3lib.cell_to_parent(h, res)
+    return h3lib.h3_to_parent(h, res)
+
+
+def h3_boundary(h):
+    """Return the cell boundary as a tuple of (lat, lon) vertices."""
+    if hasattr(h3lib, "cell_to_boundary"):
+        return h3lib.cell_to_boundary(h)
+    return h3lib.h3_to_geo_boundary(h)
+
+
+def polygon_to_cells(geometry, res):
+    """Cells whose centers fall inside a GeoJSON Polygon/MultiPolygon geometry."""
+    if hasattr(h3lib, "geo_to_cells"):
+        return h3lib.geo_to_cells(geometry, res)
+    # v3: polyfill takes one polygon at a time
+    polys = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+    cells = set()
+    for rings in polys:
+        cells |= h3lib.polyfill({"type": "Polygon", "coordinates": rings}, res, geo_json_conformant=True)
+    return cells
+
+
+def grid_disk(h, k):
+    """Cells within `k` grid steps of an H3 cell (including itself)."""
+    if hasattr(h3lib, "grid_disk"):
+        return h3lib.grid_disk(h, k)
+    return h3lib.k_ring(h, k)
+
+
+def local_ij(origin, h):
+    """(i, j) of an H3 cell in the local IJ grid anchored at `origin` (raises if too far)."""
+    if hasattr(h3lib, "cell_to_local_ij"):
+        return h3lib.cell_to_local_ij(origin, h)
+    return h3lib.experimental_h3_to_local_ij(origin, h)
+
+
+def local_ij_grid(h3_ids):
+    """
+    (n, 2) int64 IJ coordinates of the cells on one local IJ grid, shifted
+    to start at (0, 0); None when the cells are too far apart (or across a
+    pentagon) for one grid. h3_ids must not be empty.
+    """
+    try:
+        ij = np.array([local_ij(h3_ids[0], h) for h in h3_ids], dtype=np.int64)
+    except LocalIJError:
+        return None
+    return ij - ij.min(axis=0)
@@ -1,21 +1,26 @@
 import pandas as pd
 import os
 
+from states import STATE_USPS
+
+STATE_FIPS = "21"                      # state to merge (2-digit FIPS)
+STATE = STATE_USPS[STATE_FIPS]
+
 # --- Paths ---
 df_av_path = "combined_bdc_sample.csv"           # your BDC sample
 df_blocks_path = "datasets/census_data/census_combined.csv"  # census blocks
 output_dir = "datasets/merged_output"
 os.makedirs(output_dir, exist_ok=True)
-output_path = os.path.join(output_dir, "merged_KY_counties.csv")
+output_path = os.path.join(output_dir, f"merged_{STATE}_counties.csv")
 
 # --- Load data ---
 df_av = pd.read_csv(df_av_path)
 df_blocks = pd.read_csv(df_blocks_path)
 
 # -------------------------------------------------
-# STEP 1: Keep only KY rows in BDC
+# STEP 1: Keep only this state's rows in BDC
 # -------------------------------------------------
-df_av = df_av[df_av['state_usps'] == 'KY']
+df_av = df_av[df_av['state_usps'] == STATE]
 
 # -------------------------------------------------
 # STEP 2: Convert block_geoid to string **without losing precision**
@@ -26,11 +31,11 @@ df_av['block_geoid_str'] = df_av['block_geoid'].apply(lambda x: '{:.0f}'.format(
 df_av['county_fips'] = df_av['block_geoid_str'].str[2:5].str.zfill(3)
 
 # -------------------------------------------------
-# STEP 3: Keep only KY census blocks
+# STEP 3: Keep only this state's census blocks
 # -------------------------------------------------
 df_blocks['state_code'] = df_blocks['state_code'].astype(str).str.zfill(2)
-df_blocks['state_usps'] = df_blocks['state_code'].map({'21': 'KY'})
-df_blocks = df_blocks[df_blocks['state_usps'] == 'KY']
+df_blocks['state_usps'] = df_blocks['state_code'].map(STATE_USPS)
+df_blocks = df_blocks[df_blocks['state_usps'] == STATE]
 
 # Standardize census county FIPS
 df_blocks['county'] = df_blocks['county'].astype(str).str.zfill(3)
@@ -82,7 +87,7 @@ merged = pd.merge(
 # STEP 8: Save output
 # -------------------------------------------------
 merged.to_csv(output_path, index=False)
-print(f"✅ KY merge completed. File saved to: {output_path}")
+print(f"✅ {STATE} merge completed. File saved to: {output_path}")
 
 # Preview
 print(
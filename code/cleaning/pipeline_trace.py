@@ -0,0 +1,268 @@
+"""
+Lightweight per-stage instrumentation for the cleaning scripts.
+
+    with PipelineTrace("step4_provider_agg") as trace:
+        with trace.stage("load") as s:
+            df = pd.read_csv(path)
+            s.rows_out = len(df)
+        with trace.stage("groupby", rows_in=len(df)) as s:
+            ...
+
+Every stage records wall time, CPU time, rows in/out and peak RSS during the
+stage. When the run ends (or fails) a JSON report is written to
+logs/pipeline/<name>_<timestamp>.json. Compare two runs stage by stage with
+
+    python code/cleaning/pipeline_trace.py compare old.json new.json
+
+Environment switches:
+    KY_TRACE_DIR=path        where reports go (KY_TRACE_DIR=off disables them)
+    KY_TRACE_TRACEMALLOC=1   also record peak Python allocations per stage
+    KY_TRACE_PROFILE=1       dump a cProfile .prof file per stage next to the report
+"""
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_TRACE_DIR = PROJECT_ROOT / "logs" / "pipeline"
+
+# a stage this much slower than in the old report is flagged by `compare`
+SLOWDOWN_FLAG = 1.5
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes", "on")
+
+
+# ==================================================
+# MEMORY PROBES
+# ==================================================
+def _status_mb(field: str):
+    """A VmRSS/VmHWM line from /proc/self/status in MB, or None off Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS counter (Linux); False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak RSS of this process in MB, or None where neither /proc nor resource exists (Windows)."""
+    hwm = _status_mb("VmHWM")
+    if hwm is not None:
+        return hwm
+    if resource is None:
+        return None
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def process_rss_mb():
+    """Current RSS of this process in MB (the peak off Linux), or None where it can't be read."""
+    rss = _status_mb("VmRSS")
+    return rss if rss is not None else peak_rss_mb()
+
+
+def _round(value, digits: int = 1):
+    return round(value, digits) if value is not None else None
+
+
+# ==================================================
+# TRACE
+# ==================================================
+class Stage:
+    def __init__(self, name: str, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in vars(self).items() if not k.startswith("_")}
+
+
+class PipelineTrace:
+    """Collects stage records for one pipeline run and writes the JSON report."""
+
+    def __init__(self, name: str, trace_dir=None, use_tracemalloc=None, profile=None):
+        self.name = name
+        env_dir = os.environ.get("KY_TRACE_DIR")
+        if trace_dir is None:
+            trace_dir = None if env_dir == "off" else Path(env_dir or DEFAULT_TRACE_DIR)
+        self.trace_dir = Path(trace_dir) if trace_dir else None
+        self.use_tracemalloc = _env_flag("KY_TRACE_TRACEMALLOC") if use_tracemalloc is None else use_tracemalloc
+        self.profile = _env_flag("KY_TRACE_PROFILE") if profile is None else profile
+
+        self.stages = []
+        self.started = time.strftime("%Y%m%d-%H%M%S")
+        self.report_path = None
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+    def __enter__(self):
+        if self.use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(error=None if exc is None else f"{exc_type.__name__}: {exc}")
+        return False
+
+    @contextmanager
+    def stage(self, name: str, rows_in=None):
+        rec = Stage(name, rows_in)
+        rec.rss_start_mb = _round(_status_mb("VmRSS"))
+        rss_reset = _reset_peak_rss()
+        if self.use_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        prof = cProfile.Profile() if self.profile else None
+
+        t0, cpu0 = time.perf_counter(), time.process_time()
+        if prof:
+            prof.enable()
+        try:
+            yield rec
+        except BaseException as exc:
+            rec.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            if prof:
+                prof.disable()
+            rec.wall_s = round(time.perf_counter() - t0, 4)
+            rec.cpu_s = round(time.process_time() - cpu0, 4)
+            # without a reset this is the process-lifetime peak
+            rec.peak_rss_mb = _round(peak_rss_mb())
+            rec.peak_rss_scope = "stage" if rss_reset else "process"
+            if self.use_tracemalloc and tracemalloc.is_tracing():
+                rec.py_alloc_peak_mb = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+            if rec.rows_out and rec.wall_s > 0:
+                rec.rows_per_s = round((rec.rows_in or rec.rows_out) / rec.wall_s, 1)
+            if prof and self.trace_dir:
+                self.trace_dir.mkdir(parents=True, exist_ok=True)
+                prof_path = self.trace_dir / f"{self.name}_{self.started}_{len(self.stages)}_{name}.prof"
+                prof.dump_stats(str(prof_path))
+                rec.profile = str(prof_path)
+            self.stages.append(rec)
+
+    def report(self, error=None) -> dict:
+        # stages reset the kernel's peak counter, so the run's peak is the largest stage peak
+        peaks = [p for p in [s.peak_rss_mb for s in self.stages] + [peak_rss_mb()] if p is not None]
+        return {
+            "pipeline": self.name,
+            "started": self.started,
+            "ok": error is None,
+            "error": error,
+            "total_wall_s": round(time.perf_counter() - self._t0, 4),
+            "total_cpu_s": round(time.process_time() - self._cpu0, 4),
+            "peak_rss_mb": _round(max(peaks, default=None)),
+            "machine": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "stages": [s.to_dict() for s in self.stages],
+        }
+
+    def summary(self) -> str:
+        lines = [f"[trace] {self.name}"]
+        for s in self.stages:
+            rows = f"{s.rows_in if s.rows_in is not None else '-'} -> {s.rows_out if s.rows_out is not None else '-'}"
+            peak = f"{s.peak_rss_mb:>8.0f}MB" if s.peak_rss_mb is not None else f"{'-':>8}  "
+            lines.append(
+                f"  {s.name:<18} {s.wall_s:>8.2f}s wall {s.cpu_s:>8.2f}s cpu "
+                f"{peak} peak  rows {rows}"
+            )
+        return "\n".join(lines)
+
+    def finish(self, error=None):
+        """Print the stage table and write the report (once)."""
+        if self.report_path is not None:
+            return self.report_path
+        if self.use_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        print(self.summary())
+        if self.trace_dir is None:
+            self.report_path = ""
+            return None
+        self.trace_dir.mkdir(parents=True, exist_ok=True)
+        self.report_path = self.trace_dir / f"{self.name}_{self.started}.json"
+        with open(self.report_path, "w") as f:
+            json.dump(self.report(error), f, indent=2)
+        print("[trace] report:", self.report_path)
+        return self.report_path
+
+
+class _NullTrace:
+    """Stand-in when a transform is called without a trace."""
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        yield Stage(name, rows_in)
+
+
+NULL_TRACE = _NullTrace()
+
+
+# ==================================================
+# COMPARE TWO REPORTS
+# ==================================================
+def compare_reports(old: dict, new: dict) -> list:
+    """Per-stage (name, old wall, new wall, ratio) rows, matched by stage name and order."""
+    old_stages = {}
+    for s in old["stages"]:
+        old_stages.setdefault(s["name"], []).append(s)
+    rows = []
+    for s in new["stages"]:
+        prev = old_stages.get(s["name"])
+        base = prev.pop(0) if prev else None
+        ratio = s["wall_s"] / base["wall_s"] if base and base["wall_s"] > 0 else None
+        rows.append((s["name"], base["wall_s"] if base else None, s["wall_s"], ratio))
+    return rows
+
+
+def main(argv):
+    if len(argv) != 3 or argv[0] != "compare":
+        print("usage: pipeline_trace.py compare OLD.json NEW.json")
+        return 2
+    with open(argv[1]) as f:
+        old = json.load(f)
+    with open(argv[2]) as f:
+        new = json.load(f)
+
+    print(f"{'stage':<18} {'old s':>9} {'new s':>9} {'ratio':>7}")
+    for name, old_s, new_s, ratio in compare_reports(old, new):
+        flag = "  <-- slower" if ratio and ratio >= SLOWDOWN_FLAG else ""
+        old_txt = f"{old_s:9.2f}" if old_s is not None else f"{'-':>9}"
+        ratio_txt = f"{ratio:7.2f}" if ratio is not None else f"{'-':>7}"
+        print(f"{name:<18} {old_txt} {new_s:9.2f} {ratio_txt}{flag}")
+    print(f"{'total':<18} {old['total_wall_s']:9.2f} {new['total_wall_s']:9.2f} "
+          f"{new['total_wall_s'] / max(old['total_wall_s'], 1e-9):7.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
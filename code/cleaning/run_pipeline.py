@@ -0,0 +1,540 @@
+"""
+State-partitioned pipeline runner.
+
+Runs the cleaning steps (clean_bdc -> step3 -> step4 -> step5 -> step6 ->
+step7, plus step_h3_points, step_hex_distance, step_hex_population,
+step_hex_county, the location/speed sketches, the aggregate partials,
+provider competition and unserved clusters)
+for each selected state in its own worker process and writes the dashboard
+DB for each state, or one partitioned DB for all of them. Each state's hex
+vector tiles (build_hex_tiles.py) are then rendered next to its DB
+(--skip-tiles leaves them out).
+
+    python code/cleaning/run_pipeline.py --states KY
+    python code/cleaning/run_pipeline.py --states KY,TN,OH --raw raw_dir/ --workers 3
+    python code/cleaning/run_pipeline.py --states region --raw bdc_national.csv.gz --db-mode partitioned
+
+--raw may be:
+  * a folder of FCC BDC downloads. Files named like the FCC's
+    per-state files (bdc_21_Cable_fixed_broadband_...csv) are used as-is
+    for their state, so unselected states are never read.
+  * a single combined or national CSV (.csv or .csv.gz). It is streamed
+    once and split into per-state files under the work dir. A split is
+    reused until the source changes, so later runs only read the selected
+    states.
+
+Census inputs: Kentucky uses datasets/Cleaned_Census_data. Other states
+look in datasets/Cleaned_Census_data/<USPS>/ for edu.csv, income.csv,
+population.csv, area.csv and devices.csv (same columns as the Kentucky
+files). When a file is missing, county names and land area come from
+data/counties.geojson and the other census columns are left empty.
+
+Hex population / housing units are apportioned from the census block
+(group) file merge_data.py reads, datasets/census_data/census_combined.csv,
+or datasets/census_data/<USPS>/census_blocks.csv for one state. Without
+either the hex columns are left empty.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from build_broadband_db import write_db
+from clean_bdc import clean_bdc
+from pipeline_trace import PipelineTrace
+from states import STATE_NAMES, STATE_USPS, parse_states
+from step3_add_flags import add_flags
+from step4_provider_agg import provider_agg
+from step5_county_agg import county_agg
+from step6_merge_final import load_with_fips, merge_final
+from step7_provider_summary import provider_summary
+from step_h3_points import aggregate_hexes, hex_provider_speeds, prepare_rows
+from step_hex_county import hex_county_weights
+from step_hex_distance import add_distance_to_served
+from step_hex_population import add_hex_population, census_units, hex_population
+from step_provider_competition import add_competition_counts, county_competition, home_hex_provider, provider_overlap
+from step_unserved_clusters import unserved_clusters
+from step_aggregate_partials import aggregate_partials
+from step_location_sketches import location_sketches
+from step_speed_sketches import speed_sketches
+
+# -----------------------------
+# FILE PATHS (update if needed)
+# -----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+RAW_PATH = PROJECT_ROOT / "datasets" / "bdc_data_1" / "processed" / "bdc_all_raw.csv"
+WORK_DIR = PROJECT_ROOT / "datasets" / "bdc_data_1" / "processed" / "states"
+DB_DIR = PROJECT_ROOT / "db"
+PARTITIONED_DB = DB_DIR / "broadband_states.db"
+
+CENSUS_DIR = PROJECT_ROOT / "datasets" / "Cleaned_Census_data"
+CENSUS_BLOCKS_DIR = PROJECT_ROOT / "datasets" / "census_data"
+COUNTIES_PATH = PROJECT_ROOT / "data" / "counties.geojson"
+BOUNDARY_DIR = PROJECT_ROOT / "data" / "boundaries"
+
+# Kentucky's census inputs (the files step6/step7 were written against)
+KY_CENSUS_FILES = {
+    "edu": CENSUS_DIR / "Cleaned_EDU_Attainments_CountyWise.csv",
+    "income": CENSUS_DIR / "Median_Household_Income_KY_Countywise.csv",
+    "population": CENSUS_DIR / "Population&Poverty_KY_Countywise.csv",
+    "area": PROJECT_ROOT / "datasets" / "bdc_data_1" / "final" / "ky_county_area_wikipedia.csv",
+    "devices": CENSUS_DIR / "ky_computer_smartphone_estimates_with_fips.csv",
+}
+
+# FCC per-state download names: bdc_<state fips>_<technology>_...
+FCC_FILE_STATE = re.compile(r"bdc_(\d{2})_", re.IGNORECASE)
+
+SQ_METERS_PER_SQ_MILE = 2_589_988.11
+
+
+def state_db_path(state_fips: str, db_dir=DB_DIR) -> Path:
+    """Per-state dashboard DB (Kentucky keeps db/broadband_ky.db)."""
+    return Path(db_dir) / f"broadband_{STATE_USPS[state_fips].lower()}.db"
+
+
+# ==================================================
+# PARTITION RAW INPUT BY STATE
+# ==================================================
+def raw_files(raw) -> list:
+    raw = Path(raw)
+    if raw.is_dir():
+        return sorted(p for p in raw.iterdir() if p.name.endswith((".csv", ".csv.gz")))
+    return [raw]
+
+
+def split_by_state(sources: list, states: list, work_dir: Path) -> dict:
+    """
+    Stream `sources` once and write each selected state's rows to
+    work_dir/<USPS>/bdc_raw.csv. Rows are assigned by state_usps, or by
+    the first two digits of block_geoid when that column is missing.
+    """
+    out = {s: work_dir / STATE_USPS[s] / "bdc_raw.csv" for s in states}
+    writers, sinks = {}, {}
+    usps_of = {STATE_USPS[s]: s for s in states}
+    try:
+        for src in sources:
+            columns = pd.read_csv(src, nrows=0).columns.tolist()
+            reader = pacsv.open_csv(
+                str(src),
+                read_options=pacsv.ReadOptions(block_size=1 << 26),
+                convert_options=pacsv.ConvertOptions(column_types={c: pa.string() for c in columns}),
+            )
+            for batch in reader:
+                if "state_usps" in columns:
+                    key, lookup = batch.column("state_usps"), usps_of
+                else:
+                    key = pc.utf8_slice_codeunits(batch.column("block_geoid"), 0, 2)
+                    lookup = {s: s for s in states}
+                for code, state_fips in lookup.items():
+                    part = batch.filter(pc.equal(key, code))
+                    if part.num_rows == 0:
+                        continue
+                    if state_fips not in writers:
+                        out[state_fips].parent.mkdir(parents=True, exist_ok=True)
+                        sinks[state_fips] = open(out[state_fips], "wb")
+                        writers[state_fips] = pacsv.CSVWriter(sinks[state_fips], part.schema)
+                    writers[state_fips].write_batch(part)
+    finally:
+        for w in writers.values():
+            w.close()
+        for f in sinks.values():
+            f.close()
+
+    return {s: path for s, path in out.items() if s in writers}
+
+
+def partition_raw(raw, states: list, work_dir: Path = WORK_DIR, force: bool = False) -> dict:
+    """state FIPS -> list of raw CSV files holding that state's rows."""
+    files = raw_files(raw)
+    if not files:
+        raise FileNotFoundError(f"No raw BDC files found at {raw}")
+
+    parts = {s: [] for s in states}
+    unnamed = []
+    for f in files:
+        m = FCC_FILE_STATE.search(f.name)
+        if m and m.group(1) in STATE_USPS:
+            if m.group(1) in parts:
+                parts[m.group(1)].append(f)
+        else:
+            unnamed.append(f)
+
+    if unnamed:
+        newest = max(f.stat().st_mtime for f in unnamed)
+        need = []
+        for s in states:
+            cached = work_dir / STATE_USPS[s] / "bdc_raw.csv"
+            if not force and cached.exists() and cached.stat().st_mtime >= newest:
+                parts[s].append(cached)
+            else:
+                need.append(s)
+        if need:
+            t0 = time.perf_counter()
+            print(f"Splitting {len(unnamed)} raw file(s) for: {', '.join(STATE_USPS[s] for s in need)}")
+            for s, path in split_by_state(unnamed, need, work_dir).items():
+                parts[s].append(path)
+            print(f"  split in {time.perf_counter() - t0:.1f}s")
+
+    for s, p in parts.items():
+        if not p:
+            print(f"  {STATE_USPS[s]}: no raw BDC rows found, skipped")
+    return {s: p for s, p in parts.items() if p}
+
+
+# ==================================================
+# CENSUS INPUTS
+# ==================================================
+def county_reference(state_fips: str, counties_path=COUNTIES_PATH) -> pd.DataFrame:
+    """county_fips, county name and land area for one state from the county polygons."""
+    with open(counties_path) as f:
+        features = json.load(f)["features"]
+    rows = [
+        {
+            "county_fips": p["GEOID"],
+            "county": p["NAME"],
+            "area_sq_mi": round(p.get("ALAND", 0) / SQ_METERS_PER_SQ_MILE, 1),
+        }
+        for p in (feat["properties"] for feat in features)
+        if p.get("STATEFP") == state_fips
+    ]
+    return pd.DataFrame(rows, columns=["county_fips", "county", "area_sq_mi"])
+
+
+def census_files(state_fips: str) -> dict:
+    if state_fips == "21":
+        return KY_CENSUS_FILES
+    state_dir = CENSUS_DIR / STATE_USPS[state_fips]
+    return {
+        name: state_dir / f"{name}.csv"
+        for name in ["edu", "income", "population", "area", "devices"]
+    }
+
+
+def load_census(state_fips: str) -> dict:
+    """The five step6 census frames for one state, with fallbacks for missing files."""
+    ref = None
+    frames = {}
+    for name, path in census_files(state_fips).items():
+        if Path(path).exists():
+            df = load_with_fips(path)
+            frames[name] = df[df["county_fips"].str.startswith(state_fips)]
+            continue
+
+        print(f"  {STATE_USPS[state_fips]}: no {name} census file ({path})")
+        if name in ("population", "area"):
+            if ref is None:
+                ref = county_reference(state_fips)
+            cols = ["county_fips", "county"] if name == "population" else ["county_fips", "area_sq_mi"]
+            frames[name] = ref[cols].copy()
+        else:
+            frames[name] = pd.DataFrame({"county_fips": pd.Series(dtype=str)})
+    return frames
+
+
+def load_census_units(state_fips: str):
+    """One state's census block (group) counts for hex apportionment, or None."""
+    for path in [
+        CENSUS_BLOCKS_DIR / STATE_USPS[state_fips] / "census_blocks.csv",
+        CENSUS_BLOCKS_DIR / "census_combined.csv",
+    ]:
+        if path.exists():
+            return census_units(pd.read_csv(path, dtype=str), state_fips)
+    print(f"  {STATE_USPS[state_fips]}: no census block file, hex population left empty")
+    return None
+
+
+# ==================================================
+# ONE STATE
+# ==================================================
+def run_state(state_fips: str, raw_paths: list, work_dir: Path = WORK_DIR, db_path=None) -> dict:
+    """
+    Run every cleaning step for one state in memory and write its final
+    CSVs (and its own DB when `db_path` is given). Runs in a worker process.
+    """
+    usps = STATE_USPS[state_fips]
+    state_dir = Path(work_dir) / usps
+    state_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+
+    with PipelineTrace(f"state_{usps}") as trace:
+        with trace.stage("load") as s:
+            raw = pd.concat([pd.read_csv(p, dtype=str) for p in raw_paths], ignore_index=True)
+            s.rows_out = len(raw)
+
+        with trace.stage("clean_flags", rows_in=len(raw)) as s:
+            flagged = add_flags(clean_bdc(raw, state_fips))
+            s.rows_out = len(flagged)
+
+        with trace.stage("provider_agg", rows_in=len(flagged)) as s:
+            prov = provider_agg(flagged)
+            s.rows_out = len(prov)
+
+        with trace.stage("county_agg", rows_in=len(flagged)) as s:
+            county = county_agg(prov.copy(), flagged)
+            s.rows_out = len(county)
+
+        sketches = location_sketches(flagged, trace) if "location_id" in flagged.columns else None
+        speeds = speed_sketches(flagged, trace)
+        partials = aggregate_partials(flagged, trace)
+        del flagged
+
+        with trace.stage("census_merge", rows_in=len(county)) as s:
+            census = load_census(state_fips)
+            county_final = merge_final(
+                county, census["edu"], census["income"], census["population"],
+                census["area"], census["devices"],
+            )
+            summary = provider_summary(prov, census["population"])
+            s.rows_out = len(county_final)
+
+        rows = prepare_rows(raw, usps, trace)
+        h3_points = add_distance_to_served(aggregate_hexes(rows, trace), trace)
+        hex_provider = hex_provider_speeds(rows, trace)
+        units = load_census_units(state_fips)
+        h3_points = add_hex_population(h3_points, hex_population(rows, units, trace) if units is not None else None)
+        n_raw = len(raw)
+        del raw, rows
+
+        h3_points = add_competition_counts(h3_points, hex_provider)
+        overlap = provider_overlap(home_hex_provider(h3_points, hex_provider), state_fips, trace)
+        competition = county_competition(h3_points)
+        h3_points, clusters = unserved_clusters(h3_points, state_fips, trace)
+
+        hex_county = None
+        if Path(COUNTIES_PATH).exists():
+            with open(COUNTIES_PATH) as f:
+                counties_geojson = json.load(f)
+            hex_county = hex_county_weights(h3_points, counties_geojson, state_fips, trace)
+        else:
+            print(f"  {usps}: {COUNTIES_PATH} missing, county rollups count each hex once")
+
+        with trace.stage("write", rows_in=len(h3_points)):
+            summary.to_csv(state_dir / "provider_summary_by_county.csv", index=False)
+            county_final.to_csv(state_dir / f"{usps.lower()}_bdc_demographics_final_dataset.csv", index=False)
+            h3_points.to_csv(state_dir / "bdc_h3_points.csv", index=False)
+            if hex_county is not None:
+                hex_county.to_csv(state_dir / "hex_county_weights.csv", index=False)
+            if sketches is not None:
+                sketches.to_parquet(state_dir / "location_sketches.parquet", index=False)
+            speeds.to_parquet(state_dir / "speed_sketches.parquet", index=False)
+            partials.to_csv(state_dir / "agg_partials.csv", index=False)
+            hex_provider.to_csv(state_dir / "bdc_hex_provider.csv", index=False)
+            overlap.to_csv(state_dir / "provider_overlap.csv", index=False)
+            competition.to_csv(state_dir / "county_competition.csv", index=False)
+            clusters.to_csv(state_dir / "unserved_clusters.csv", index=False)
+
+        result = {
+            "state_fips": state_fips,
+            "state_usps": usps,
+            "state_name": STATE_NAMES[state_fips],
+            "raw_rows": n_raw,
+            "counties": len(county_final),
+            "providers": int(summary["provider_id"].nunique()),
+            "hexes": len(h3_points),
+        }
+        if db_path is not None:
+            write_db(summary, county_final, h3_points, db_path, trace, hex_county, sketches, speeds,
+                     partials, hex_provider, overlap, competition, clusters)
+            write_state_partition(db_path, [result])
+
+    result["seconds"] = round(time.perf_counter() - t0, 1)
+    return result
+
+
+# ==================================================
+# DATABASES
+# ==================================================
+def write_state_partition(db_path, rows: list):
+    """Record which states a dashboard DB holds (read by the state selector)."""
+    df = pd.DataFrame(rows)[
+        ["state_fips", "state_usps", "state_name", "raw_rows", "counties", "providers", "hexes"]
+    ]
+    df["built_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    with sqlite3.connect(str(db_path)) as conn:
+        df.to_sql("state_partition", conn, if_exists="replace", index=False)
+
+
+def build_partitioned_db(results: list, work_dir: Path, db_path: Path):
+    """One DB holding every state's rows; county_fips carries the state prefix."""
+    frames = {
+        "provider": [], "county": [], "h3": [], "hex_county": [], "sketches": [], "speeds": [],
+        "partials": [], "hex_provider": [], "overlap": [], "competition": [],
+        "clusters": [],
+    }
+    for r in results:
+        state_dir = Path(work_dir) / r["state_usps"]
+        frames["provider"].append(pd.read_csv(
+            state_dir / "provider_summary_by_county.csv", dtype={"county_fips": str, "provider_id": str}
+        ))
+        frames["county"].append(pd.read_csv(
+            state_dir / f"{r['state_usps'].lower()}_bdc_demographics_final_dataset.csv",
+            dtype={"county_fips": str},
+        ))
+        frames["h3"].append(pd.read_csv(
+            state_dir / "bdc_h3_points.csv", dtype={"county_fips": str, "h3_res8_id": str}
+        ))
+        if (state_dir / "hex_county_weights.csv").exists():
+            frames["hex_county"].append(pd.read_csv(
+                state_dir / "hex_county_weights.csv", dtype={"county_fips": str, "h3_res8_id": str}
+            ))
+        if (state_dir / "location_sketches.parquet").exists():
+            frames["sketches"].append(pd.read_parquet(state_dir / "location_sketches.parquet"))
+        if (state_dir / "speed_sketches.parquet").exists():
+            frames["speeds"].append(pd.read_parquet(state_dir / "speed_sketches.parquet"))
+        if (state_dir / "agg_partials.csv").exists():
+            frames["partials"].append(pd.read_csv(
+                state_dir / "agg_partials.csv",
+                dtype={"county_fips": str, "provider_id": str, "technology": str},
+            ))
+        if (state_dir / "bdc_hex_provider.csv").exists():
+            frames["hex_provider"].append(pd.read_csv(
+                state_dir / "bdc_hex_provider.csv",
+                dtype={"county_fips": str, "h3_res8_id": str, "provider_id": str},
+            ))
+        if (state_dir / "provider_overlap.csv").exists():
+            frames["overlap"].append(pd.read_csv(
+                state_dir / "provider_overlap.csv",
+                dtype={"county_fips": str, "provider_a": str, "provider_b": str},
+            ))
+        if (state_dir / "county_competition.csv").exists():
+            frames["competition"].append(pd.read_csv(
+                state_dir / "county_competition.csv", dtype={"county_fips": str}
+            ))
+        if (state_dir / "unserved_clusters.csv").exists():
+            frames["clusters"].append(pd.read_csv(
+                state_dir / "unserved_clusters.csv", dtype={"county_fips": str, "counties": str}
+            ))
+
+    with PipelineTrace("partitioned_db") as trace:
+        write_db(
+            pd.concat(frames["provider"], ignore_index=True),
+            pd.concat(frames["county"], ignore_index=True),
+            pd.concat(frames["h3"], ignore_index=True),
+            db_path,
+            trace,
+            pd.concat(frames["hex_county"], ignore_index=True) if frames["hex_county"] else None,
+            pd.concat(frames["sketches"], ignore_index=True) if frames["sketches"] else None,
+            pd.concat(frames["speeds"], ignore_index=True) if frames["speeds"] else None,
+            pd.concat(frames["partials"], ignore_index=True) if frames["partials"] else None,
+            pd.concat(frames["hex_provider"], ignore_index=True) if frames["hex_provider"] else None,
+            pd.concat(frames["overlap"], ignore_index=True) if frames["overlap"] else None,
+            pd.concat(frames["competition"], ignore_index=True) if frames["competition"] else None,
+            pd.concat(frames["clusters"], ignore_index=True) if frames["clusters"] else None,
+        )
+    write_state_partition(db_path, results)
+
+
+def ensure_boundaries(states: list):
+    """Build county boundary levels of detail for states that don't have them yet."""
+    missing = [s for s in states if not (BOUNDARY_DIR / s / "counties_lod0.topo.json").exists()]
+    if not missing:
+        return
+    import build_county_lod
+
+    if not Path(build_county_lod.IN_PATH).exists():
+        print("No county boundaries for", ", ".join(STATE_USPS[s] for s in missing),
+              f"and {build_county_lod.IN_PATH} is missing; maps will be empty for them.")
+        return
+    build_county_lod.main(states=missing)
+
+
+def build_tiles(results: list, db_mode: str, db_path, db_dir):
+    """Render each state's hex vector tiles next to its DB (what the dashboard's tile overlay reads)."""
+    import build_hex_tiles
+
+    for r in results:
+        print(f"\nHex tiles for {r['state_usps']}:")
+        if db_mode == "partitioned":
+            build_hex_tiles.main(db_path, state_fips=r["state_fips"], name=r["state_usps"])
+        else:
+            build_hex_tiles.main(state_db_path(r["state_fips"], db_dir), name=r["state_usps"])
+
+
+# ==================================================
+# MAIN
+# ==================================================
+def main(states, raw=RAW_PATH, work_dir=WORK_DIR, db_mode="per-state", db_path=PARTITIONED_DB,
+         db_dir=DB_DIR, workers=None, force_split=False, tiles=True):
+    t0 = time.perf_counter()
+    work_dir = Path(work_dir)
+    print("States:", ", ".join(STATE_USPS[s] for s in states))
+
+    parts = partition_raw(raw, states, work_dir, force_split)
+    Path(db_dir if db_mode == "per-state" else Path(db_path).parent).mkdir(parents=True, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(parts)))
+
+    results, failed = [], {}
+    jobs = {
+        s: (s, paths, work_dir, state_db_path(s, db_dir) if db_mode == "per-state" else None)
+        for s, paths in parts.items()
+    }
+    if workers == 1:
+        for s, args in jobs.items():
+            try:
+                results.append(run_state(*args))
+            except Exception as exc:
+                # a single state has nothing else to finish: fail with its traceback
+                if len(jobs) == 1:
+                    raise
+                print(f"\n{STATE_USPS[s]} failed:\n{traceback.format_exc()}")
+                failed[s] = exc
+    else:
+        # one process per state at a time; memory scales with `workers`
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_state, *args): s for s, args in jobs.items()}
+            for fut in as_completed(futures):
+                try:
+                    results.append(fut.result())
+                except Exception as exc:
+                    # includes the worker's traceback (chained by concurrent.futures)
+                    print(f"\n{STATE_USPS[futures[fut]]} failed:\n{traceback.format_exc()}")
+                    failed[futures[fut]] = exc
+    results.sort(key=lambda r: r["state_fips"])
+
+    if db_mode == "partitioned" and results:
+        build_partitioned_db(results, work_dir, Path(db_path))
+    ensure_boundaries([r["state_fips"] for r in results])
+    if tiles:
+        build_tiles(results, db_mode, db_path, db_dir)
+
+    print(f"\n{'state':<6} {'raw rows':>12} {'counties':>9} {'hexes':>10} {'seconds':>8}")
+    for r in results:
+        print(f"{r['state_usps']:<6} {r['raw_rows']:>12,} {r['counties']:>9,} {r['hexes']:>10,} {r['seconds']:>8.1f}")
+    for s, exc in failed.items():
+        print(f"{STATE_USPS[s]:<6} FAILED: {type(exc).__name__}: {exc} (traceback above)")
+    if db_mode == "partitioned":
+        print("Partitioned DB:", db_path)
+    else:
+        for r in results:
+            print(f"{r['state_usps']} DB:", state_db_path(r["state_fips"], db_dir))
+    print(f"Total {time.perf_counter() - t0:.1f}s with {workers} worker(s)")
+    return results, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the broadband pipeline for one or more states.")
+    parser.add_argument("--states", default="KY",
+                        help="comma list of USPS codes/FIPS, 'region' (KY + neighbors) or 'all'")
+    parser.add_argument("--raw", type=Path, default=RAW_PATH, help="raw BDC CSV or folder of FCC downloads")
+    parser.add_argument("--work-dir", type=Path, default=WORK_DIR)
+    parser.add_argument("--db-mode", choices=["per-state", "partitioned"], default="per-state")
+    parser.add_argument("--db", type=Path, default=PARTITIONED_DB, help="DB path for --db-mode partitioned")
+    parser.add_argument("--db-dir", type=Path, default=DB_DIR, help="folder for per-state DBs")
+    parser.add_argument("--workers", type=int, help="parallel state workers (default: CPU count)")
+    parser.add_argument("--force-split", action="store_true", help="re-split a combined raw file")
+    parser.add_argument("--skip-tiles", action="store_true", help="don't render the hex vector tiles")
+    args = parser.parse_args()
+
+    _, failed = main(parse_states(args.states), args.raw, args.work_dir, args.db_mode, args.db,
+                     args.db_dir, args.workers, args.force_split, not args.skip_tiles)
+    raise SystemExit(1 if failed else 0)
@@ -1,24 +1,47 @@
 import pandas as pd
 
-in_path  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_clean_step2.csv"
-out_path = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step3_with_flags.csv"
+from pipeline_trace import PipelineTrace
+from step_h3_points import UNDERSERVED_BELOW
 
-df = pd.read_csv(in_path, dtype={"county_fips": str})
+IN_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_clean_step2.csv"
+OUT_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step3_with_flags.csv"
 
-# --------------------------------------------------------
-# 1. UNDERSERVED = TRUE (1) if <100 Mbps download OR <20 Mbps upload
-# --------------------------------------------------------
-df["is_underserved"] = ((df["maxDown"] < 100) | (df["maxUp"] < 20)).astype(int)
 
-# --------------------------------------------------------
-# 2. BELOW100 FLAG (Download < 100 Mbps Only)
-# --------------------------------------------------------
-df["is_below100"] = (df["maxDown"] < 100).astype(int)
+def add_flags(df: pd.DataFrame) -> pd.DataFrame:
+    # --------------------------------------------------------
+    # 1. UNDERSERVED = TRUE (1) if <100 Mbps download OR <20 Mbps upload
+    # --------------------------------------------------------
+    df["is_underserved"] = (
+        (df["maxDown"] < UNDERSERVED_BELOW[0]) | (df["maxUp"] < UNDERSERVED_BELOW[1])
+    ).astype(int)
 
-# --------------------------------------------------------
-# 3. SAVE THE FILE
-# --------------------------------------------------------
-df.to_csv(out_path, index=False)
+    # --------------------------------------------------------
+    # 2. BELOW100 FLAG (Download < 100 Mbps Only)
+    # --------------------------------------------------------
+    df["is_below100"] = (df["maxDown"] < 100).astype(int)
+    return df
 
-print("Step 3 completed. Flags added.")
-print("Output:", out_path)
+
+def main(in_path=IN_PATH, out_path=OUT_PATH):
+    with PipelineTrace("step3_add_flags") as trace:
+        with trace.stage("load") as s:
+            df = pd.read_csv(in_path, dtype={"county_fips": str})
+            s.rows_out = len(df)
+
+        with trace.stage("flags", rows_in=len(df)) as s:
+            df = add_flags(df)
+            s.rows_out = len(df)
+
+        # --------------------------------------------------------
+        # 3. SAVE THE FILE
+        # --------------------------------------------------------
+        with trace.stage("write", rows_in=len(df)):
+            df.to_csv(out_path, index=False)
+
+        print("Step 3 completed. Flags added.")
+        print("Output:", out_path)
+    return len(df)
+
+
+if __name__ == "__main__":
+    main()
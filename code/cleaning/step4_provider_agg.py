@@ -1,25 +1,48 @@
 import pandas as pd
 
-in_path  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step3_with_flags.csv"
-out_path = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step4_provider_agg.csv"
-
-df = pd.read_csv(in_path, dtype={"county_fips": str})
-
-# --------------------------------------------------------------------
-# GROUP BY county + provider (because providers repeat across locations)
-# --------------------------------------------------------------------
-provider_agg = df.groupby(["county_fips", "provider_id", "brand_name"]).agg(
-    provider_avg_down=("maxDown", "mean"),
-    provider_avg_up=("maxUp", "mean"),
-    provider_location_count=("block_geoid", "count"),
-    provider_underserved_count=("is_underserved", "sum"),
-    provider_below100_count=("is_below100", "sum")
-).reset_index()
-
-# --------------------------------------------------------------------
-# SAVE OUTPUT
-# --------------------------------------------------------------------
-provider_agg.to_csv(out_path, index=False)
-
-print("Step 4 completed. Provider-level aggregation saved to:")
-print(out_path)
+from pipeline_trace import PipelineTrace
+
+IN_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step3_with_flags.csv"
+OUT_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step4_provider_agg.csv"
+
+
+def provider_agg(df: pd.DataFrame) -> pd.DataFrame:
+    # --------------------------------------------------------------------
+    # GROUP BY county + provider (because providers repeat across locations)
+    # --------------------------------------------------------------------
+    aggs = dict(
+        provider_avg_down=("maxDown", "mean"),
+        provider_avg_up=("maxUp", "mean"),
+        provider_location_count=("block_geoid", "count"),
+        provider_underserved_count=("is_underserved", "sum"),
+        provider_below100_count=("is_below100", "sum")
+    )
+    # location_count counts records (one per technology); this counts locations
+    if "location_id" in df.columns:
+        aggs["provider_distinct_locations"] = ("location_id", "nunique")
+    return df.groupby(["county_fips", "provider_id", "brand_name"]).agg(**aggs).reset_index()
+
+
+def main(in_path=IN_PATH, out_path=OUT_PATH):
+    with PipelineTrace("step4_provider_agg") as trace:
+        with trace.stage("load") as s:
+            df = pd.read_csv(in_path, dtype={"county_fips": str})
+            s.rows_out = len(df)
+
+        with trace.stage("groupby", rows_in=len(df)) as s:
+            agg = provider_agg(df)
+            s.rows_out = len(agg)
+
+        # --------------------------------------------------------------------
+        # SAVE OUTPUT
+        # --------------------------------------------------------------------
+        with trace.stage("write", rows_in=len(agg)):
+            agg.to_csv(out_path, index=False)
+
+        print("Step 4 completed. Provider-level aggregation saved to:")
+        print(out_path)
+    return len(df)
+
+
+if __name__ == "__main__":
+    main()
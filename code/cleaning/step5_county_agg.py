@@ -1,82 +1,106 @@
 import pandas as pd
 
+from pipeline_trace import PipelineTrace
+
 # INPUT FILES
-prov_path = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step4_provider_agg.csv"
-raw_path  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step3_with_flags.csv"
+PROV_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step4_provider_agg.csv"
+RAW_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step3_with_flags.csv"
 
 # OUTPUT FILE
-out_path = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step5_county_agg.csv"
-
-# ----------------------------------------------------------
-# LOAD DATA
-# ----------------------------------------------------------
-prov = pd.read_csv(prov_path, dtype={"county_fips": str})
-raw  = pd.read_csv(raw_path,  dtype={"county_fips": str})
-
-prov["county_fips"] = prov["county_fips"].str[:5]
-raw["county_fips"]  = raw["county_fips"].str[:5]
-
-# ----------------------------------------------------------
-# 1) COUNTY AVERAGE DOWNLOAD SPEED (ALL PROVIDERS)
-#    -> average of provider_avg_down across providers in the county
-# ----------------------------------------------------------
-county_avg = (
-    prov.groupby("county_fips")["provider_avg_down"]
-        .mean()
-        .reset_index()
-)
-county_avg.columns = ["county_fips", "county_avg_down"]
-
-# (optional but useful) min & max provider avg download per county
-county_min_max = (
-    prov.groupby("county_fips")["provider_avg_down"]
-        .agg(["min", "max"])
-        .reset_index()
-)
-county_min_max.columns = [
-    "county_fips",
-    "county_min_provider_down",
-    "county_max_provider_down"
-]
-
-# ----------------------------------------------------------
-# 2) COUNTY UNDERSERVED METRICS (100/20 RULE, FROM RAW)
-# ----------------------------------------------------------
-county_underserved = raw.groupby("county_fips").agg(
-    total_locations=("block_geoid", "count"),
-    underserved_locations=("is_underserved", "sum")
-).reset_index()
-
-county_underserved["pct_underserved"] = (
-    county_underserved["underserved_locations"]
-    / county_underserved["total_locations"]
-    * 100
-)
-
-# ----------------------------------------------------------
-# 3) PROVIDER COUNTS PER COUNTY
-#    - provider_count: how many unique providers
-#    - providers_below100: how many providers have at least one <100 Mbps location
-# ----------------------------------------------------------
-county_providers = prov.groupby("county_fips").agg(
-    provider_count=("provider_id", "nunique"),
-    providers_below100=("provider_below100_count", lambda x: (x > 0).sum())
-).reset_index()
-
-# ----------------------------------------------------------
-# 4) MERGE ALL COUNTY-LEVEL METRICS
-# ----------------------------------------------------------
-county_final = (
-    county_avg
-    .merge(county_min_max,      on="county_fips", how="left")
-    .merge(county_underserved,  on="county_fips", how="left")
-    .merge(county_providers,    on="county_fips", how="left")
-)
-
-# ----------------------------------------------------------
-# 5) SAVE RESULT
-# ----------------------------------------------------------
-county_final.to_csv(out_path, index=False)
-
-print("Step 5 completed. County-level metrics saved to:")
-print(out_path)
+OUT_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step5_county_agg.csv"
+
+
+def county_agg(prov: pd.DataFrame, raw: pd.DataFrame) -> pd.DataFrame:
+    prov["county_fips"] = prov["county_fips"].str[:5]
+    raw["county_fips"]  = raw["county_fips"].str[:5]
+
+    # ----------------------------------------------------------
+    # 1) COUNTY AVERAGE DOWNLOAD SPEED (ALL PROVIDERS)
+    #    -> average of provider_avg_down across providers in the county
+    # ----------------------------------------------------------
+    county_avg = (
+        prov.groupby("county_fips")["provider_avg_down"]
+            .mean()
+            .reset_index()
+    )
+    county_avg.columns = ["county_fips", "county_avg_down"]
+
+    # (optional but useful) min & max provider avg download per county
+    county_min_max = (
+        prov.groupby("county_fips")["provider_avg_down"]
+            .agg(["min", "max"])
+            .reset_index()
+    )
+    county_min_max.columns = [
+        "county_fips",
+        "county_min_provider_down",
+        "county_max_provider_down"
+    ]
+
+    # ----------------------------------------------------------
+    # 2) COUNTY UNDERSERVED METRICS (100/20 RULE, FROM RAW)
+    # ----------------------------------------------------------
+    aggs = dict(
+        total_locations=("block_geoid", "count"),
+        underserved_locations=("is_underserved", "sum")
+    )
+    # total_locations counts BDC records; a location with three providers
+    # is in it three times
+    if "location_id" in raw.columns:
+        aggs["distinct_locations"] = ("location_id", "nunique")
+    county_underserved = raw.groupby("county_fips").agg(**aggs).reset_index()
+
+    county_underserved["pct_underserved"] = (
+        county_underserved["underserved_locations"]
+        / county_underserved["total_locations"]
+        * 100
+    )
+
+    # ----------------------------------------------------------
+    # 3) PROVIDER COUNTS PER COUNTY
+    #    - provider_count: how many unique providers
+    #    - providers_below100: how many providers have at least one <100 Mbps location
+    # ----------------------------------------------------------
+    county_providers = prov.groupby("county_fips").agg(
+        provider_count=("provider_id", "nunique"),
+        providers_below100=("provider_below100_count", lambda x: (x > 0).sum())
+    ).reset_index()
+
+    # ----------------------------------------------------------
+    # 4) MERGE ALL COUNTY-LEVEL METRICS
+    # ----------------------------------------------------------
+    return (
+        county_avg
+        .merge(county_min_max,      on="county_fips", how="left")
+        .merge(county_underserved,  on="county_fips", how="left")
+        .merge(county_providers,    on="county_fips", how="left")
+    )
+
+
+def main(prov_path=PROV_PATH, raw_path=RAW_PATH, out_path=OUT_PATH):
+    with PipelineTrace("step5_county_agg") as trace:
+        # ----------------------------------------------------------
+        # LOAD DATA
+        # ----------------------------------------------------------
+        with trace.stage("load") as s:
+            prov = pd.read_csv(prov_path, dtype={"county_fips": str})
+            raw  = pd.read_csv(raw_path,  dtype={"county_fips": str})
+            s.rows_out = len(prov) + len(raw)
+
+        with trace.stage("groupby_merge", rows_in=len(prov) + len(raw)) as s:
+            county_final = county_agg(prov, raw)
+            s.rows_out = len(county_final)
+
+        # ----------------------------------------------------------
+        # 5) SAVE RESULT
+        # ----------------------------------------------------------
+        with trace.stage("write", rows_in=len(county_final)):
+            county_final.to_csv(out_path, index=False)
+
+        print("Step 5 completed. County-level metrics saved to:")
+        print(out_path)
+    return len(raw)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Algebraic aggregate partials keyed by county x provider x technology x
+service flag.
+
+Finished statistics (step4's provider means, step5's mean of provider
+means) can't be combined again. This step stores the pieces instead,
+one row per (county_fips, provider_id, technology, is_underserved):
+
+    records, down_sum, down_sumsq, down_min, down_max,
+             up_sum,   up_sumsq,   up_min,   up_max
+
+Any roll-up (a multi-county region, a group of providers, a technology
+slice) is then a plain sum/min/max over this small table, with means and
+standard deviations weighted correctly by records
+(analysis/partials.py does the roll-ups).
+"""
+import pandas as pd
+
+from pipeline_trace import NULL_TRACE, PipelineTrace
+from step_h3_points import TECH_MAP
+
+IN_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step3_with_flags.csv"
+OUT_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\agg_partials.csv"
+
+PARTIAL_KEYS = ["county_fips", "provider_id", "provider_name", "technology", "tech_group", "is_underserved"]
+
+
+def aggregate_partials(df: pd.DataFrame, trace=NULL_TRACE) -> pd.DataFrame:
+    """Flagged BDC rows -> one row of sums/min/max per partial key."""
+    with trace.stage("partials", rows_in=len(df)) as s:
+        df = df.assign(
+            county_fips=df["county_fips"].astype(str).str[:5],
+            provider_name=df["brand_name"],
+            technology=df["technology"].astype(str),
+            tech_group=df["technology"].astype(str).map(TECH_MAP).fillna("Other / Unknown"),
+            down_sq=df["maxDown"] ** 2,
+            up_sq=df["maxUp"] ** 2,
+        )
+        partials = df.groupby(PARTIAL_KEYS, observed=True, dropna=False).agg(
+            records=("maxDown", "size"),
+            down_sum=("maxDown", "sum"),
+            down_sumsq=("down_sq", "sum"),
+            down_min=("maxDown", "min"),
+            down_max=("maxDown", "max"),
+            up_sum=("maxUp", "sum"),
+            up_sumsq=("up_sq", "sum"),
+            up_min=("maxUp", "min"),
+            up_max=("maxUp", "max"),
+        ).reset_index()
+        s.rows_out = len(partials)
+
+    print(f"Aggregate partials: {len(df):,} rows -> {len(partials):,} partials")
+    return partials
+
+
+def main(in_path=IN_PATH, out_path=OUT_PATH):
+    with PipelineTrace("step_aggregate_partials") as trace:
+        with trace.stage("load") as s:
+            df = pd.read_csv(in_path, dtype={"county_fips": str, "provider_id": str, "technology": str})
+            s.rows_out = len(df)
+
+        partials = aggregate_partials(df, trace)
+
+        with trace.stage("write", rows_in=len(partials)):
+            partials.to_csv(out_path, index=False)
+
+        print("\nAggregate partials saved to:")
+        print(out_path)
+    return len(partials)
+
+
+if __name__ == "__main__":
+    main()
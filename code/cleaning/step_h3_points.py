@@ -1,44 +1,13 @@
+import numpy as np
 import pandas as pd
 
-# ---- handle both old and new h3-py APIs ----
-try:
-    # older style: from h3 import h3
-    from h3 import h3 as h3lib
-except ImportError:
-    import h3 as h3lib
+from h3_compat import h3_to_lat_lon
+from pipeline_trace import NULL_TRACE, PipelineTrace
 
 # ------------ INPUT & OUTPUT PATHS ------------
-in_path  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_all_raw.csv"
-out_path = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
-
-# ------------ LOAD RAW BDC DATA ------------
-df = pd.read_csv(in_path, dtype=str)
-print("Loaded rows:", len(df))
-print("Columns:", df.columns.tolist())
-
-# Keep only Kentucky
-if "state_usps" in df.columns:
-    df = df[df["state_usps"] == "KY"]
-print("Rows after KY filter:", len(df))
-
-# Drop rows missing key fields
-df = df.dropna(subset=[
-    "h3_res8_id",
-    "block_geoid",
-    "max_advertised_download_speed",
-    "max_advertised_upload_speed"
-])
-print("Rows after dropping missing key fields:", len(df))
-
-# Convert speeds to numeric
-df["maxDown"] = pd.to_numeric(df["max_advertised_download_speed"], errors="coerce")
-df["maxUp"]   = pd.to_numeric(df["max_advertised_upload_speed"], errors="coerce")
-
-df = df.dropna(subset=["maxDown", "maxUp"])
-print("Rows after dropping invalid speeds:", len(df))
-
-# Add county_fips
-df["county_fips"] = df["block_geoid"].str[:5]
+IN_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_all_raw.csv"
+OUT_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
+OUT_PROVIDER_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_hex_provider.csv"
 
 # ------------ TECHNOLOGY MAPPING ------------
 # Technology codes (from your note):
@@ -56,11 +25,6 @@ TECH_MAP = {
     "70": "Unlicensed fixed wireless",
 }
 
-# df["technology"] is string because we loaded dtype=str
-if "technology" in df.columns:
-    df["tech_group"] = df["technology"].map(TECH_MAP).fillna("Other / Unknown")
-else:
-    df["tech_group"] = "Other / Unknown"
 
 # ------------ AGGREGATE TO H3-HEX LEVEL ------------
 def agg_providers(s: pd.Series) -> str:
@@ -73,84 +37,177 @@ def agg_tech(s: pd.Series) -> str:
     vals = s.dropna().unique().tolist()
     return "; ".join(sorted(vals))
 
-h3_grouped = df.groupby(["county_fips", "h3_res8_id"]).agg(
-    max_down=("maxDown", "max"),
-    max_up=("maxUp", "max"),
-    provider_count=("provider_id", "nunique"),
-    provider_names=("brand_name", agg_providers),
-    tech_types=("tech_group", agg_tech),
-).reset_index()
-
-print("Grouped rows (unique hex cells):", len(h3_grouped))
 
 # ------------ CLASSIFY SERVICE CATEGORY ------------
 # Unserved:    <25/3
 # Underserved: <100/20 (but not unserved)
 # Served:      >=100 and >=20
-
-def classify_row(row):
-    down = row["max_down"]
-    up   = row["max_up"]
-    if pd.isna(down) or pd.isna(up):
-        return "Unknown"
-    if down < 25 or up < 3:
-        return "Unserved"
-    if down < 100 or up < 20:
-        return "Underserved"
-    return "Served"
-
-h3_grouped["service_category"] = h3_grouped.apply(classify_row, axis=1)
-
-print("Service category counts:")
-print(h3_grouped["service_category"].value_counts())
-
-# ------------ COMPUTE H3 CENTROID COORDINATES ------------
-def h3_to_lat_lon(h):
-    """Return (lat, lon) for an H3 cell, handling both old and new APIs."""
-    try:
-        # old API: h3.h3_to_geo(h)
-        if hasattr(h3lib, "h3_to_geo"):
-            return h3lib.h3_to_geo(h)
-        # new API: h3.cell_to_latlng(h)
-        if hasattr(h3lib, "cell_to_latlng"):
-            return h3lib.cell_to_latlng(h)
-    except Exception as e:
-        # uncomment for debugging if needed
-        # print("Error converting", h, "->", e)
-        return None, None
-    return None, None
-
-# Apply conversion
-lat_list = []
-lon_list = []
-
-for h in h3_grouped["h3_res8_id"]:
-    lat, lon = h3_to_lat_lon(h)
-    lat_list.append(lat)
-    lon_list.append(lon)
-
-h3_grouped["lat"] = lat_list
-h3_grouped["lon"] = lon_list
-
-# Drop any rows where we couldn't get coordinates
-h3_grouped = h3_grouped.dropna(subset=["lat", "lon"])
-print("Rows after H3 coordinate conversion:", len(h3_grouped))
-
-# ------------ REORDER & SAVE ------------
-h3_points = h3_grouped[[
-    "county_fips",
-    "h3_res8_id",
-    "lat",
-    "lon",
-    "max_down",
-    "max_up",
-    "provider_count",
-    "provider_names",
-    "tech_types",        # <- NEW COLUMN with aggregated technology types
-    "service_category",
-]]
-
-h3_points.to_csv(out_path, index=False)
-
-print("\nH3 point dataset saved to:")
-print(out_path)
+# (the dashboard's threshold what-if calls classify_speeds with other values)
+UNSERVED_BELOW    = (25, 3)     # (download, upload) Mbps
+UNDERSERVED_BELOW = (100, 20)
+SERVICE_CATEGORIES = ["Unserved", "Underserved", "Served", "Unknown"]
+
+
+def classify_speeds(max_down, max_up, unserved_below=UNSERVED_BELOW,
+                    underserved_below=UNDERSERVED_BELOW) -> pd.Categorical:
+    """
+    Service category of every hex from its best speeds under the given
+    (download, upload) thresholds, as a Categorical over SERVICE_CATEGORIES.
+    Float columns are compared as they are (the dashboard's float32 speeds
+    reclassify a whole state in a few milliseconds).
+    """
+    down = np.asarray(max_down)
+    up = np.asarray(max_up)
+    down = down if down.dtype.kind == "f" else down.astype(float)
+    up = up if up.dtype.kind == "f" else up.astype(float)
+    codes = np.full(len(down), 2, dtype=np.int8)  # Served
+    codes[(down < underserved_below[0]) | (up < underserved_below[1])] = 1
+    codes[(down < unserved_below[0]) | (up < unserved_below[1])] = 0
+    codes[np.isnan(down) | np.isnan(up)] = 3
+    return pd.Categorical.from_codes(codes, SERVICE_CATEGORIES)
+
+
+def prepare_rows(df: pd.DataFrame, state_usps: str = "KY", trace=NULL_TRACE) -> pd.DataFrame:
+    """Raw BDC rows (read with dtype=str) -> one state's rows with numeric speeds and county_fips."""
+    with trace.stage("filter", rows_in=len(df)) as s:
+        # Keep only one state (Kentucky by default)
+        if "state_usps" in df.columns:
+            df = df[df["state_usps"] == state_usps]
+        print(f"Rows after {state_usps} filter:", len(df))
+
+        # Drop rows missing key fields
+        df = df.dropna(subset=[
+            "h3_res8_id",
+            "block_geoid",
+            "max_advertised_download_speed",
+            "max_advertised_upload_speed"
+        ])
+        print("Rows after dropping missing key fields:", len(df))
+
+        # Convert speeds to numeric
+        df["maxDown"] = pd.to_numeric(df["max_advertised_download_speed"], errors="coerce")
+        df["maxUp"]   = pd.to_numeric(df["max_advertised_upload_speed"], errors="coerce")
+
+        df = df.dropna(subset=["maxDown", "maxUp"])
+        print("Rows after dropping invalid speeds:", len(df))
+
+        # Add county_fips
+        df["county_fips"] = df["block_geoid"].str[:5]
+
+        # df["technology"] is string because we loaded dtype=str
+        if "technology" in df.columns:
+            df["tech_group"] = df["technology"].map(TECH_MAP).fillna("Other / Unknown")
+        else:
+            df["tech_group"] = "Other / Unknown"
+        s.rows_out = len(df)
+    return df
+
+
+def build_h3_points(df: pd.DataFrame, state_usps: str = "KY", trace=NULL_TRACE) -> pd.DataFrame:
+    """Raw BDC rows (read with dtype=str) -> one classified row per H3 hex."""
+    return aggregate_hexes(prepare_rows(df, state_usps, trace), trace)
+
+
+def aggregate_hexes(df: pd.DataFrame, trace=NULL_TRACE) -> pd.DataFrame:
+    """prepare_rows() output -> one classified row per H3 hex."""
+    with trace.stage("groupby", rows_in=len(df)) as s:
+        h3_grouped = df.groupby(["county_fips", "h3_res8_id"]).agg(
+            max_down=("maxDown", "max"),
+            max_up=("maxUp", "max"),
+            provider_count=("provider_id", "nunique"),
+            provider_names=("brand_name", agg_providers),
+            tech_types=("tech_group", agg_tech),
+        ).reset_index()
+        s.rows_out = len(h3_grouped)
+
+    print("Grouped rows (unique hex cells):", len(h3_grouped))
+
+    with trace.stage("classify", rows_in=len(h3_grouped)) as s:
+        h3_grouped["service_category"] = np.asarray(
+            classify_speeds(h3_grouped["max_down"], h3_grouped["max_up"]), dtype=object
+        )
+        s.rows_out = len(h3_grouped)
+
+    print("Service category counts:")
+    print(h3_grouped["service_category"].value_counts())
+
+    # ------------ COMPUTE H3 CENTROID COORDINATES ------------
+    with trace.stage("h3_coords", rows_in=len(h3_grouped)) as s:
+        # Apply conversion
+        lat_list = []
+        lon_list = []
+
+        for h in h3_grouped["h3_res8_id"]:
+            lat, lon = h3_to_lat_lon(h)
+            lat_list.append(lat)
+            lon_list.append(lon)
+
+        h3_grouped["lat"] = lat_list
+        h3_grouped["lon"] = lon_list
+
+        # Drop any rows where we couldn't get coordinates
+        h3_grouped = h3_grouped.dropna(subset=["lat", "lon"])
+        s.rows_out = len(h3_grouped)
+    print("Rows after H3 coordinate conversion:", len(h3_grouped))
+
+    # ------------ REORDER ------------
+    return h3_grouped[[
+        "county_fips",
+        "h3_res8_id",
+        "lat",
+        "lon",
+        "max_down",
+        "max_up",
+        "provider_count",
+        "provider_names",
+        "tech_types",        # <- NEW COLUMN with aggregated technology types
+        "service_category",
+    ]]
+
+
+# ------------ HEX x PROVIDER SPEEDS ------------
+def hex_provider_speeds(df: pd.DataFrame, trace=NULL_TRACE) -> pd.DataFrame:
+    """
+    prepare_rows() output -> one row per (hex, provider) with that
+    provider's best advertised speeds in the hex: the non-zero entries of a
+    sparse hex x provider speed matrix. hex_coverage.max_down / max_up are
+    the row maxima, so provider exit/upgrade scenarios can recompute them
+    (analysis/provider_scenarios.py).
+    """
+    with trace.stage("hex_provider", rows_in=len(df)) as s:
+        hp = df.groupby(["county_fips", "h3_res8_id", "provider_id"], sort=False).agg(
+            max_down=("maxDown", "max"),
+            max_up=("maxUp", "max"),
+        ).reset_index()
+        s.rows_out = len(hp)
+
+    print("Hex x provider entries:", len(hp))
+    return hp
+
+
+def main(in_path=IN_PATH, out_path=OUT_PATH, state_usps="KY", out_provider_path=OUT_PROVIDER_PATH):
+    with PipelineTrace("step_h3_points") as trace:
+        # ------------ LOAD RAW BDC DATA ------------
+        with trace.stage("load") as s:
+            df = pd.read_csv(in_path, dtype=str)
+            s.rows_out = len(df)
+        print("Loaded rows:", len(df))
+        print("Columns:", df.columns.tolist())
+
+        rows = prepare_rows(df, state_usps, trace)
+        h3_points = aggregate_hexes(rows, trace)
+        hex_provider = hex_provider_speeds(rows, trace)
+
+        # ------------ SAVE ------------
+        with trace.stage("write", rows_in=len(h3_points)):
+            h3_points.to_csv(out_path, index=False)
+            hex_provider.to_csv(out_provider_path, index=False)
+
+        print("\nH3 point dataset saved to:")
+        print(out_path)
+        print(out_provider_path)
+    return len(df)
+
+
+if __name__ == "__main__":
+    main()
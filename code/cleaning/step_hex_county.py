@@ -0,0 +1,148 @@
+"""
+Area-weighted hex -> county shares.
+
+An H3 res-8 cell (~0.74 km²) on a county line belongs partly to each
+county it touches. This step intersects every hex polygon with the county
+boundaries and writes one row per (hex, county) with the fraction of the
+hex's in-state area that lies in that county:
+
+    h3_res8_id, county_fips, weight      (weights of a hex sum to 1)
+
+Most hexes sit inside one county and get weight 1 straight from the
+spatial index; exact intersections are only computed for the few that
+cross a line. Hexes that fall outside every county polygon (the boundary
+file is generalized) keep the county of their BDC block with weight 1.
+Areas are planar in lon/lat, which is fine for ratios inside one hex.
+
+County rollups (county_scores.enrich_county_with_hex) sum these weights
+instead of counting each hex once for whichever county it was listed under.
+"""
+import json
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import shape
+
+from filter_ky_geojson import filter_state_features
+from h3_compat import h3_boundary
+from pipeline_trace import NULL_TRACE, PipelineTrace
+
+# ------------ INPUT & OUTPUT PATHS ------------
+IN_PATH       = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
+COUNTIES_PATH = r"H:\Broadband_Project_1\data\ky_counties.geojson"
+OUT_PATH      = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\hex_county_weights.csv"
+
+# shares below this are boundary slivers from generalized county lines
+MIN_WEIGHT = 0.001
+
+
+# ------------ GEOMETRY ------------
+def county_shapes(geojson: dict, state_fips: str = None):
+    """(county_fips array, shapely polygon array) for the counties in a FeatureCollection."""
+    if state_fips is not None:
+        geojson = filter_state_features(geojson, state_fips)
+    features = geojson["features"]
+    fips = np.array([f["properties"]["GEOID"] for f in features], dtype=object)
+    geoms = np.array([shape(f["geometry"]) for f in features], dtype=object)
+    # repair self-intersections so intersection() can't fail
+    geoms = shapely.make_valid(geoms)
+    shapely.prepare(geoms)
+    return fips, geoms
+
+
+def hex_polygons(h3_ids) -> np.ndarray:
+    """Shapely polygons (lon, lat) for H3 cells, built in one vectorized call."""
+    rings = [h3_boundary(h) for h in h3_ids]
+    sizes = np.fromiter((len(r) for r in rings), dtype=np.int64, count=len(rings))
+    coords = np.fromiter(chain.from_iterable(chain.from_iterable(rings)), dtype=float)
+    coords = coords.reshape(-1, 2)[:, ::-1]
+    ring_index = np.repeat(np.arange(len(rings)), sizes)
+    return shapely.polygons(shapely.linearrings(coords, indices=ring_index))
+
+
+# ------------ WEIGHTS ------------
+def hex_county_weights(hex_df: pd.DataFrame, counties_geojson: dict, state_fips: str = None,
+                       trace=NULL_TRACE) -> pd.DataFrame:
+    """
+    hex_df needs h3_res8_id and county_fips (the block county, used as the
+    fallback). Returns h3_res8_id, county_fips, weight.
+    """
+    hexes = (
+        hex_df[["h3_res8_id", "county_fips"]]
+        .astype(str)
+        .sort_values(["h3_res8_id", "county_fips"])
+        .drop_duplicates("h3_res8_id")
+        .reset_index(drop=True)
+    )
+    hexes["county_fips"] = hexes["county_fips"].str.zfill(5)
+
+    with trace.stage("hex_polygons", rows_in=len(hexes)) as s:
+        fips, counties = county_shapes(counties_geojson, state_fips)
+        polys = hex_polygons(hexes["h3_res8_id"])
+        s.rows_out = len(polys)
+
+    with trace.stage("index_query", rows_in=len(polys)) as s:
+        tree = shapely.STRtree(counties)
+        hex_idx, county_idx = tree.query(polys, predicate="intersects")
+        s.rows_out = len(hex_idx)
+
+    with trace.stage("intersect", rows_in=len(hex_idx)) as s:
+        n_counties = np.bincount(hex_idx, minlength=len(polys))
+        weight = np.ones(len(hex_idx))
+        border = n_counties[hex_idx] > 1
+        weight[border] = shapely.area(
+            shapely.intersection(polys[hex_idx[border]], counties[county_idx[border]])
+        )
+
+        pairs = pd.DataFrame({"hex": hex_idx, "county_fips": fips[county_idx], "weight": weight})
+        pairs = pairs[pairs["weight"] > 0]
+        pairs["weight"] /= pairs.groupby("hex")["weight"].transform("sum")
+        # drop slivers and renormalize so each hex still sums to 1
+        pairs = pairs[pairs["weight"] >= MIN_WEIGHT]
+        pairs["weight"] /= pairs.groupby("hex")["weight"].transform("sum")
+
+        # hexes outside every county polygon keep their block county
+        missing = np.setdiff1d(np.arange(len(polys)), pairs["hex"].unique())
+        fallback = pd.DataFrame(
+            {"hex": missing, "county_fips": hexes["county_fips"].to_numpy()[missing], "weight": 1.0}
+        )
+        pairs = pd.concat([pairs, fallback], ignore_index=True)
+
+        out = pd.DataFrame(
+            {
+                "h3_res8_id": hexes["h3_res8_id"].to_numpy()[pairs["hex"].to_numpy()],
+                "county_fips": pairs["county_fips"].astype(str).to_numpy(),
+                "weight": pairs["weight"].round(6).to_numpy(),
+            }
+        ).sort_values(["h3_res8_id", "county_fips"], ignore_index=True)
+        s.rows_out = len(out)
+
+    n_split = int((out.groupby("h3_res8_id").size() > 1).sum())
+    print(f"Hex -> county shares: {len(hexes):,} hexes, {n_split:,} split across county lines, "
+          f"{len(missing):,} outside the county polygons (block county used)")
+    return out
+
+
+def main(in_path=IN_PATH, counties_path=COUNTIES_PATH, out_path=OUT_PATH, state_fips=None):
+    with PipelineTrace("step_hex_county") as trace:
+        with trace.stage("load") as s:
+            hex_df = pd.read_csv(in_path, dtype={"h3_res8_id": str, "county_fips": str},
+                                 usecols=["h3_res8_id", "county_fips"])
+            with open(counties_path) as f:
+                counties_geojson = json.load(f)
+            s.rows_out = len(hex_df)
+
+        weights = hex_county_weights(hex_df, counties_geojson, state_fips, trace)
+
+        with trace.stage("write", rows_in=len(weights)):
+            weights.to_csv(out_path, index=False)
+
+        print("\nHex -> county weights saved to:")
+        print(out_path)
+    return len(weights)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Distance to service: grid steps from every hex to the nearest Served hex.
+
+One multi-source breadth-first search over H3 neighbor rings starts from
+all Served hexes at once; every ring adds the unvisited neighbors of the
+previous ring, so the first ring that reaches a hex is its distance. The
+search walks every res-8 cell (including cells with no BDC locations),
+so the distance is the H3 grid distance, and stops once every hex is
+reached or after MAX_DISTANCE rings.
+
+The cells are laid on H3's local IJ grid, where the six neighbors of
+(i, j) are fixed offsets, so each ring is six shifted ORs over a boolean
+array covering the state. States the IJ grid can't cover in one piece
+(near an icosahedron pentagon) fall back to expanding the rings cell by
+cell with grid_disk.
+
+    distance_to_served   0 for Served hexes, k for hexes k rings away,
+                         empty when no Served hex is within MAX_DISTANCE
+
+Only Served hexes of the same state run are sources (a served hex just
+across a state line is not seen). Res-8 cell centers are about 0.9 km
+apart, so the distance is a rough proxy for how far service would have
+to be extended.
+"""
+import numpy as np
+import pandas as pd
+
+from h3_compat import grid_disk, local_ij_grid
+from pipeline_trace import NULL_TRACE, PipelineTrace
+
+# ------------ INPUT & OUTPUT PATHS ------------
+IN_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
+OUT_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
+
+MAX_DISTANCE = 60  # rings (~55 km at res 8)
+
+# the six neighbors of (i, j) on the local IJ grid
+IJ_NEIGHBORS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1)]
+
+
+def _grid_bfs(ij: np.ndarray, served: np.ndarray, max_distance: int) -> np.ndarray:
+    """Multi-source BFS on a dense IJ grid (from local_ij_grid); -1 where no source is within max_distance."""
+    shape = tuple(ij.max(axis=0) + 1)
+    i, j = ij[:, 0], ij[:, 1]
+
+    dist = np.full(shape, -1, dtype=np.int16)
+    frontier = np.zeros(shape, dtype=bool)
+    frontier[i[served], j[served]] = True
+    dist[frontier] = 0
+    target = np.zeros(shape, dtype=bool)
+    target[i[~served], j[~served]] = True
+    remaining = int((target & ~frontier).sum())
+
+    ni, nj = shape
+    ring = 0
+    while remaining and ring < max_distance:
+        ring += 1
+        nxt = np.zeros(shape, dtype=bool)
+        for di, dj in IJ_NEIGHBORS:
+            nxt[max(di, 0):ni + min(di, 0), max(dj, 0):nj + min(dj, 0)] |= (
+                frontier[max(-di, 0):ni + min(-di, 0), max(-dj, 0):nj + min(-dj, 0)]
+            )
+        nxt &= dist < 0
+        if not nxt.any():
+            break
+        dist[nxt] = ring
+        remaining -= int((nxt & target).sum())
+        frontier = nxt
+    return dist[i, j]
+
+
+def _ring_bfs(h3_ids: np.ndarray, served: np.ndarray, max_distance: int) -> np.ndarray:
+    """The same search expanding rings cell by cell with grid_disk (any cells, slower)."""
+    dist = np.full(len(h3_ids), -1, dtype=np.int16)
+    dist[served] = 0
+    position = {h: i for i, h in enumerate(h3_ids)}
+    remaining = set(h3_ids[~served])
+    frontier = set(h3_ids[served])
+    seen = set(frontier)
+    ring = 0
+    while frontier and remaining and ring < max_distance:
+        ring += 1
+        nxt = set()
+        for cell in frontier:
+            nxt.update(grid_disk(cell, 1))
+        nxt -= seen
+        seen |= nxt
+        for cell in nxt & remaining:
+            dist[position[cell]] = ring
+        remaining -= nxt
+        frontier = nxt
+    return dist
+
+
+def distance_to_served(h3_ids, served, max_distance=MAX_DISTANCE) -> np.ndarray:
+    """Ring distance from each cell in h3_ids to the nearest cell where `served` is True (NaN if none)."""
+    h3_ids = np.asarray(h3_ids, dtype=object)
+    served = np.asarray(served, dtype=bool)
+    if len(h3_ids) == 0 or not served.any():
+        return np.full(len(h3_ids), np.nan)
+
+    ij = local_ij_grid(h3_ids)
+    if ij is not None:
+        dist = _grid_bfs(ij, served, max_distance)
+    else:
+        dist = _ring_bfs(h3_ids, served, max_distance)
+    return np.where(dist >= 0, dist, np.nan)
+
+
+def add_distance_to_served(h3_points: pd.DataFrame, trace=NULL_TRACE) -> pd.DataFrame:
+    """h3_points with distance_to_served (a hex listed under two counties gets one distance)."""
+    with trace.stage("distance_to_served", rows_in=len(h3_points)) as s:
+        hexes = (h3_points["service_category"] == "Served").groupby(h3_points["h3_res8_id"], sort=False).any()
+        dist = pd.Series(distance_to_served(hexes.index, hexes.to_numpy()), index=hexes.index)
+        out = h3_points.assign(distance_to_served=h3_points["h3_res8_id"].map(dist).astype("Int64"))
+        s.rows_out = len(out)
+
+    not_served = out.loc[out["service_category"] != "Served", "distance_to_served"]
+    print(f"Distance to served: {int(not_served.notna().sum()):,} of {len(not_served):,} non-served hexes "
+          f"within {MAX_DISTANCE} rings, median {not_served.median()} rings")
+    return out
+
+
+def main(in_path=IN_PATH, out_path=OUT_PATH):
+    with PipelineTrace("step_hex_distance") as trace:
+        with trace.stage("load") as s:
+            h3_points = pd.read_csv(in_path, dtype={"county_fips": str, "h3_res8_id": str})
+            s.rows_out = len(h3_points)
+
+        h3_points = add_distance_to_served(h3_points, trace)
+
+        with trace.stage("write", rows_in=len(h3_points)):
+            h3_points.to_csv(out_path, index=False)
+
+        print("\nH3 points with distance_to_served saved to:")
+        print(out_path)
+    return len(h3_points)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Population and housing units per H3 hex, apportioned from census units.
+
+Census counts (B01001_001E population, B25001_001E housing units) come
+per block or block group; BDC locations carry their 15-digit block_geoid
+and their hex. Each census unit's counts are split over the hexes its BDC
+locations fall in, by location share:
+
+    hex population = sum over units of unit population
+                     * (unit locations in the hex / unit locations)
+
+The whole join is one groupby over (unit, county, hex) location counts:
+block groups match on the first 12 digits of block_geoid, blocks on all
+15. Units with no BDC location are left out (reported below).
+
+    population, housing_units   per (county_fips, h3_res8_id) row of the
+                                H3 points, NaN when there is no census file
+"""
+import numpy as np
+import pandas as pd
+
+from pipeline_trace import NULL_TRACE, PipelineTrace
+from step_h3_points import prepare_rows
+
+# ------------ INPUT & OUTPUT PATHS ------------
+IN_RAW_PATH    = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_all_raw.csv"
+IN_CENSUS_PATH = r"H:\Broadband_Project_1\datasets\census_data\census_combined.csv"  # same file as merge_data.py
+IN_H3_PATH     = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
+OUT_H3_PATH    = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
+
+CENSUS_COUNTS = {"B01001_001E": "population", "B25001_001E": "housing_units"}
+WEIGHT_COLS = list(CENSUS_COUNTS.values())
+
+
+# ------------ CENSUS UNITS ------------
+def census_units(census: pd.DataFrame, state_fips=None) -> pd.DataFrame:
+    """
+    Census rows (read with dtype=str) -> geoid, population, housing_units.
+
+    The geoid is taken from GEO_ID ("1500000US211110001001"), GEOID or
+    block_geoid when present, otherwise built from the state / county /
+    tract / block group (or block) code columns of a Census API download.
+    """
+    if "GEO_ID" in census.columns:
+        geoid = census["GEO_ID"].str.split("US").str[-1]
+    elif "GEOID" in census.columns:
+        geoid = census["GEOID"]
+    elif "block_geoid" in census.columns:
+        geoid = census["block_geoid"]
+    else:
+        state = census["state_code"] if "state_code" in census.columns else census["state"]
+        geoid = (
+            state.str.zfill(2)
+            + census["county"].str.zfill(3)
+            + census["tract"].str.zfill(6)
+            + (census["block"].str.zfill(4) if "block" in census.columns else census["block group"])
+        )
+    units = pd.DataFrame({"geoid": geoid.str.strip()})
+    for src, name in CENSUS_COUNTS.items():
+        units[name] = pd.to_numeric(census[src], errors="coerce").clip(lower=0).fillna(0)
+    if state_fips is not None:
+        units = units[units["geoid"].str.startswith(state_fips)]
+    return units.groupby("geoid", as_index=False)[WEIGHT_COLS].sum()
+
+
+# ------------ APPORTIONMENT ------------
+def hex_population(rows: pd.DataFrame, units: pd.DataFrame, trace=NULL_TRACE) -> pd.DataFrame:
+    """
+    prepare_rows() output + census_units() -> population and housing_units
+    per (county_fips, h3_res8_id).
+    """
+    with trace.stage("hex_population", rows_in=len(rows)) as s:
+        unit_len = int(units["geoid"].str.len().mode().iloc[0]) if len(units) else 15
+        loc = rows[["block_geoid", "county_fips", "h3_res8_id"]].assign(unit=rows["block_geoid"].str[:unit_len])
+        # distinct locations (a location has one row per provider x technology)
+        if "location_id" in rows.columns:
+            loc["location_id"] = rows["location_id"]
+            loc = loc.drop_duplicates(["unit", "h3_res8_id", "location_id"])
+
+        cells = loc.groupby(["unit", "county_fips", "h3_res8_id"], sort=False).size().rename("n").reset_index()
+        cells["share"] = cells["n"] / cells.groupby("unit")["n"].transform("sum")
+        cells = cells.merge(units.rename(columns={"geoid": "unit"}), on="unit", how="inner")
+        for col in WEIGHT_COLS:
+            cells[col] = cells[col] * cells["share"]
+        out = cells.groupby(["county_fips", "h3_res8_id"], as_index=False)[WEIGHT_COLS].sum()
+        s.rows_out = len(out)
+
+    placed = units["geoid"].isin(cells["unit"].unique())
+    total = units["population"].sum()
+    print(
+        f"Apportioned {out['population'].sum():,.0f} of {total:,.0f} people "
+        f"({placed.sum():,} of {len(units):,} census units have BDC locations)"
+    )
+    return out
+
+
+def add_hex_population(h3_points: pd.DataFrame, hex_pop) -> pd.DataFrame:
+    """h3_points with population / housing_units per (county, hex) row (0 where no unit maps; NaN without census data)."""
+    out = h3_points.drop(columns=WEIGHT_COLS, errors="ignore")
+    if hex_pop is None:
+        for col in WEIGHT_COLS:
+            out[col] = np.nan
+        return out
+    out = out.merge(hex_pop, on=["county_fips", "h3_res8_id"], how="left")
+    out[WEIGHT_COLS] = out[WEIGHT_COLS].fillna(0.0)
+    return out
+
+
+def main(in_raw_path=IN_RAW_PATH, in_census_path=IN_CENSUS_PATH, in_h3_path=IN_H3_PATH,
+         out_h3_path=OUT_H3_PATH, state_usps="KY", state_fips="21"):
+    with PipelineTrace("step_hex_population") as trace:
+        with trace.stage("load") as s:
+            raw = pd.read_csv(in_raw_path, dtype=str)
+            census = pd.read_csv(in_census_path, dtype=str)
+            h3_points = pd.read_csv(in_h3_path, dtype={"county_fips": str, "h3_res8_id": str})
+            s.rows_out = len(raw)
+
+        rows = prepare_rows(raw, state_usps, trace)
+        h3_points = add_hex_population(h3_points, hex_population(rows, census_units(census, state_fips), trace))
+
+        with trace.stage("write", rows_in=len(h3_points)):
+            h3_points.to_csv(out_h3_path, index=False)
+
+        print("\nH3 points with population saved to:")
+        print(out_h3_path)
+    return len(h3_points)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+H3 resolution pyramid: res-8 hexes rolled up to their res-7, 6 and 5
+parents, per county, for maps, exports and region queries that need a
+bounded row count.
+
+Parents come straight from the H3 index bits (set the resolution field,
+blank the finer digits), so every hex gets its three parents in a few
+numpy ops, and all three resolutions are aggregated in one groupby over
+(resolution, county_fips, cell). A parent cell on a county line has one
+row per county, holding that county's hexes (their hex_coverage county).
+
+    resolution, county_fips, h3_cell, lat, lon   cell and its center
+    hex_count, hex_unserved, hex_underserved,    res-8 hexes inside, by
+    hex_unknown, hex_served                      service category
+    service_category                             worst category inside
+    min_down, best_down, min_up, best_up         min / max of the hexes'
+                                                 best speeds (max_down / max_up)
+    max_provider_count                           most providers in one hex
+    providers                                    distinct providers (hex_provider;
+                                                 NULL without it)
+    locations                                    distinct BDC locations (hex
+                                                 location sketches; NULL without them)
+    population, housing_units                    apportioned census counts
+    distance_to_served                           farthest hex from service
+
+Built by build_broadband_db.write_db; main() backfills the table into an
+existing DB.
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from build_hex_tiles import CATEGORY_SEVERITY
+from h3_compat import h3_to_lat_lon
+from pipeline_trace import NULL_TRACE, PipelineTrace
+
+DB_PATH = r"H:\Broadband_Project_1\analysis\broadband_ky.db"
+
+PYRAMID_RESOLUTIONS = [7, 6, 5]
+WEIGHT_COLS = ["population", "housing_units"]
+
+PYRAMID_COLS = [
+    "resolution", "county_fips", "h3_cell", "lat", "lon",
+    "hex_count", "hex_unserved", "hex_underserved", "hex_unknown", "hex_served", "service_category",
+    "min_down", "best_down", "min_up", "best_up", "max_provider_count", "providers", "locations",
+    "population", "housing_units", "distance_to_served",
+]
+PYRAMID_INDEXES = [
+    # whole-state lookups by cell (region queries, statewide maps)
+    "CREATE INDEX idx_hex_pyramid_cell ON hex_pyramid(resolution, h3_cell);",
+]
+
+
+# ------------ H3 INDEX BITS ------------
+def h3_ints(h3_ids) -> np.ndarray:
+    """H3 id strings -> uint64 cell indexes."""
+    return np.array([int(h, 16) for h in h3_ids], dtype=np.uint64)
+
+
+def parent_ints(cells: np.ndarray, res: int) -> np.ndarray:
+    """Parents at `res` of uint64 cell indexes finer than `res`."""
+    # resolution lives in bits 52-55; digit d (1..15) in bits 3*(15-d) .. +2,
+    # and unused digits are all ones
+    res_mask = np.uint64(0xF << 52)
+    unused = sum(7 << (3 * (15 - d)) for d in range(res + 1, 16))
+    return (cells & ~res_mask) | np.uint64((res << 52) | unused)
+
+
+# ------------ PYRAMID ------------
+def hex_pyramid(hexes: pd.DataFrame, hex_provider=None, sketches=None, trace=NULL_TRACE) -> pd.DataFrame:
+    """
+    hex_coverage rows (one per hex) -> PYRAMID_COLS rows for every parent
+    resolution. hex_provider (h3_res8_id, provider_id) and location
+    sketches (level, h3_res8_id, distinct_locations) are optional.
+    """
+    with trace.stage("hex_pyramid", rows_in=len(hexes)) as s:
+        cells = h3_ints(hexes["h3_res8_id"])
+        severity = (
+            pd.Categorical(hexes["service_category"].fillna("Unknown"), categories=CATEGORY_SEVERITY)
+            .codes
+        )
+        severity = np.where(severity < 0, CATEGORY_SEVERITY.index("Unknown"), severity)
+
+        base = pd.DataFrame({
+            "county_fips": hexes["county_fips"].to_numpy(),
+            "severity": severity,
+            "max_down": pd.to_numeric(hexes["max_down"], errors="coerce").to_numpy(),
+            "max_up": pd.to_numeric(hexes["max_up"], errors="coerce").to_numpy(),
+            "provider_count": pd.to_numeric(hexes["provider_count"], errors="coerce").to_numpy(),
+        })
+        for k, cat in enumerate(CATEGORY_SEVERITY):
+            base[f"hex_{cat.lower()}"] = (severity == k).astype(np.int64)
+        for col in WEIGHT_COLS + ["distance_to_served"]:
+            base[col] = (
+                pd.to_numeric(hexes[col], errors="coerce").to_numpy() if col in hexes.columns else np.nan
+            )
+        base["locations"] = np.nan
+        if sketches is not None:
+            # a location sits in one county, so the hex's county sketches add up
+            per_hex = sketches[sketches["level"] == "hex"].groupby("h3_res8_id")["distinct_locations"].sum()
+            base["locations"] = hexes["h3_res8_id"].map(per_hex).to_numpy()
+
+        # every hex once per parent resolution, then one groupby for all of them
+        parents = {res: parent_ints(cells, res) for res in PYRAMID_RESOLUTIONS}
+        stacked = pd.concat(
+            [base.assign(resolution=res, cell=parents[res]) for res in PYRAMID_RESOLUTIONS],
+            ignore_index=True,
+        )
+        keys = ["resolution", "county_fips", "cell"]
+        grouped = stacked.groupby(keys, sort=False)
+        out = grouped.agg(
+            hex_count=("severity", "size"),
+            severity=("severity", "min"),
+            hex_unserved=("hex_unserved", "sum"),
+            hex_underserved=("hex_underserved", "sum"),
+            hex_unknown=("hex_unknown", "sum"),
+            hex_served=("hex_served", "sum"),
+            min_down=("max_down", "min"),
+            best_down=("max_down", "max"),
+            min_up=("max_up", "min"),
+            best_up=("max_up", "max"),
+            max_provider_count=("provider_count", "max"),
+            distance_to_served=("distance_to_served", "max"),
+        )
+        for col in WEIGHT_COLS + ["locations"]:
+            out[col] = grouped[col].sum(min_count=1)
+
+        if hex_provider is not None:
+            # distinct providers per cell: (cell, provider) pairs of the hex's rows
+            position = pd.Series(np.arange(len(hexes)), index=hexes["h3_res8_id"].to_numpy())
+            at = hex_provider["h3_res8_id"].map(position)
+            hp = pd.DataFrame({"hex": at, "provider_id": hex_provider["provider_id"].to_numpy()}).dropna()
+            hp = hp.drop_duplicates()
+            hex_at = hp["hex"].to_numpy(dtype=np.int64)
+            pairs = pd.concat(
+                [
+                    pd.DataFrame({
+                        "resolution": res,
+                        "county_fips": base["county_fips"].to_numpy()[hex_at],
+                        "cell": parents[res][hex_at],
+                        "provider_id": hp["provider_id"].to_numpy(),
+                    })
+                    for res in PYRAMID_RESOLUTIONS
+                ],
+                ignore_index=True,
+            ).drop_duplicates()
+            out["providers"] = pairs.groupby(keys).size()
+            out["providers"] = out["providers"].fillna(0).astype(np.int64)
+        else:
+            out["providers"] = np.nan
+
+        out = out.reset_index()
+        out["service_category"] = np.array(CATEGORY_SEVERITY)[out["severity"]]
+
+        # cell strings and centers, once per distinct cell
+        distinct = pd.unique(out["cell"])
+        names = np.array([format(int(c), "x") for c in distinct], dtype=object)
+        centers = np.array([h3_to_lat_lon(h) for h in names], dtype=float)
+        at = pd.Index(distinct).get_indexer(out["cell"])
+        out["h3_cell"] = names[at]
+        out["lat"] = centers[at, 0]
+        out["lon"] = centers[at, 1]
+
+        out = out.sort_values(["resolution", "county_fips", "h3_cell"], ascending=[False, True, True])
+        out = out.reindex(columns=PYRAMID_COLS).reset_index(drop=True)
+        s.rows_out = len(out)
+
+    sizes = out.groupby("resolution").size()
+    print("Hex pyramid:", ", ".join(f"res {r}: {sizes.get(r, 0):,} cells" for r in PYRAMID_RESOLUTIONS))
+    return out
+
+
+def main(db_path=DB_PATH):
+    """Backfill hex_pyramid into a DB built before the table existed."""
+    with PipelineTrace("step_hex_pyramid") as trace:
+        conn = sqlite3.connect(str(db_path))
+        try:
+            with trace.stage("load") as s:
+                hexes = pd.read_sql("SELECT * FROM hex_coverage", conn)
+                tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+                hex_provider = (
+                    pd.read_sql("SELECT h3_res8_id, provider_id FROM hex_provider", conn)
+                    if "hex_provider" in tables else None
+                )
+                sketches = (
+                    pd.read_sql(
+                        "SELECT level, h3_res8_id, distinct_locations FROM location_sketch WHERE level = 'hex'", conn
+                    )
+                    if "location_sketch" in tables else None
+                )
+                s.rows_out = len(hexes)
+
+            pyramid = hex_pyramid(hexes, hex_provider, sketches, trace)
+
+            with trace.stage("write", rows_in=len(pyramid)):
+                conn.execute("DROP TABLE IF EXISTS hex_pyramid;")
+                pyramid.to_sql("hex_pyramid", conn, index=False)
+                conn.execute(
+                    "CREATE UNIQUE INDEX idx_hex_pyramid_key ON hex_pyramid(resolution, county_fips, h3_cell);"
+                )
+                for sql in PYRAMID_INDEXES:
+                    conn.execute(sql)
+                conn.commit()
+        finally:
+            conn.close()
+
+        print("\nhex_pyramid written to:")
+        print(db_path)
+    return len(pyramid)
+
+
+if __name__ == "__main__":
+    main()
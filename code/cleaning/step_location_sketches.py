@@ -0,0 +1,146 @@
+"""
+Mergeable distinct-location sketches per county, provider-county and hex.
+
+A BDC row is one (location, provider, technology) record, so counting rows
+counts a location once per provider and technology. This step hashes
+location_id and keeps, for every county, provider-county and hex, a sketch
+of the distinct locations that can be merged with any other sketch:
+
+    b"S" + p + sorted unique uint64 hashes        exact, up to SPARSE_MAX hashes
+    b"D" + p + 2**p uint8 HyperLogLog registers   ~1.6% error at p=12
+
+Small groups (almost every hex) stay exact; big ones switch to the
+registers once the hash list would be larger than them. Merging is a set
+union / register max, so a multi-county region or a set of providers gets
+its distinct-location estimate from the sketches alone
+(analysis/location_sketch.py reads this format).
+
+The exact distinct count of each group is stored next to its sketch.
+"""
+import numpy as np
+import pandas as pd
+
+from pipeline_trace import NULL_TRACE, PipelineTrace
+
+IN_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step3_with_flags.csv"
+OUT_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\location_sketches.parquet"
+
+P = 12
+
+
+def sparse_max(p: int = P) -> int:
+    """Most hashes kept exactly: 8-byte hashes, so past this the 2**p registers are smaller."""
+    return 2 ** p // 8
+
+
+SPARSE_MAX = sparse_max(P)
+
+SKETCH_COLS = ["level", "county_fips", "provider_id", "h3_res8_id", "distinct_locations", "sketch"]
+
+
+# ------------ HASHING + REGISTERS ------------
+def location_hashes(location_id: pd.Series) -> np.ndarray:
+    """Stable 64-bit hashes of location ids (same value in every run and process)."""
+    return pd.util.hash_array(location_id.astype(str).to_numpy(dtype=object))
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Bit length of each uint64 (0 for 0), by binary search over the shifts."""
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= (np.uint64(1) << np.uint64(shift))
+        n[big] += shift
+        x[big] >>= np.uint64(shift)
+    return n + (x > 0)
+
+
+def hll_registers(hashes: np.ndarray, p: int = P) -> np.ndarray:
+    """HyperLogLog registers: top p bits pick the register, the rest give the rank."""
+    idx = (hashes >> np.uint64(64 - p)).astype(np.intp)
+    rest = hashes << np.uint64(p)
+    rank = np.minimum(64 - _bit_length(rest) + 1, 64 - p + 1).astype(np.uint8)
+    regs = np.zeros(2 ** p, dtype=np.uint8)
+    np.maximum.at(regs, idx, rank)
+    return regs
+
+
+def encode_sketch(unique_hashes: np.ndarray, p: int = P) -> bytes:
+    if len(unique_hashes) <= sparse_max(p):
+        return b"S" + bytes([p]) + unique_hashes.astype("<u8").tobytes()
+    return b"D" + bytes([p]) + hll_registers(unique_hashes, p).tobytes()
+
+
+# ------------ GROUP SKETCHES ------------
+def group_sketches(df: pd.DataFrame, keys: list, hashes: np.ndarray, p: int = P) -> pd.DataFrame:
+    """One sketch (and exact distinct count) per group of `keys`."""
+    grouped = df.groupby(keys, sort=True, observed=True)
+    codes = grouped.ngroup().to_numpy()
+    out = grouped.size().reset_index()[keys]
+
+    # sort by (group, hash) and drop repeats: each group's distinct hashes
+    # end up in one contiguous, sorted run
+    order = np.lexsort((hashes, codes))
+    codes, h = codes[order], hashes[order]
+    first = np.ones(len(codes), dtype=bool)
+    first[1:] = (codes[1:] != codes[:-1]) | (h[1:] != h[:-1])
+    codes, h = codes[first], h[first]
+    bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1], True])
+
+    out["distinct_locations"] = np.diff(bounds)
+    out["sketch"] = [encode_sketch(h[a:b], p) for a, b in zip(bounds[:-1], bounds[1:])]
+    return out
+
+
+def location_sketches(df: pd.DataFrame, trace=NULL_TRACE) -> pd.DataFrame:
+    """
+    Sketches at the county, provider (county x provider) and hex level
+    (when h3_res8_id is present) from rows with county_fips, provider_id
+    and location_id.
+    """
+    with trace.stage("sketches", rows_in=len(df)) as s:
+        cols = [c for c in ["county_fips", "provider_id", "h3_res8_id", "location_id"] if c in df.columns]
+        df = df[cols].dropna().astype(str)
+        df["county_fips"] = df["county_fips"].str[:5]
+        hashes = location_hashes(df["location_id"])
+
+        levels = {"county": ["county_fips"], "provider": ["county_fips", "provider_id"]}
+        if "h3_res8_id" in df.columns:
+            levels["hex"] = ["county_fips", "h3_res8_id"]
+
+        frames = []
+        for level, keys in levels.items():
+            part = group_sketches(df, keys, hashes)
+            part.insert(0, "level", level)
+            frames.append(part)
+        out = pd.concat(frames, ignore_index=True).reindex(columns=SKETCH_COLS)
+        s.rows_out = len(out)
+
+    dense = out["sketch"].str[:1] == b"D"
+    print(f"Location sketches: {len(out):,} ({int(dense.sum()):,} HyperLogLog, "
+          f"{int((~dense).sum()):,} exact), {out['sketch'].str.len().sum() / 1e6:.1f} MB")
+    return out
+
+
+def main(in_path=IN_PATH, out_path=OUT_PATH):
+    with PipelineTrace("step_location_sketches") as trace:
+        with trace.stage("load") as s:
+            df = pd.read_csv(in_path, dtype=str)
+            s.rows_out = len(df)
+
+        if "location_id" not in df.columns:
+            print("No location_id column in", in_path, "- re-run clean_bdc on a raw file that has it.")
+            return 0
+
+        sketches = location_sketches(df, trace)
+
+        with trace.stage("write", rows_in=len(sketches)):
+            sketches.to_parquet(out_path, index=False)
+
+        print("\nLocation sketches saved to:")
+        print(out_path)
+    return len(sketches)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Provider co-occurrence and competition from hex-level overlap.
+
+Built from the hex x provider speeds (step_h3_points.hex_provider_speeds):
+
+  * provider_overlap: for every pair of providers, the hexes both serve
+    (and the hexes where both meet 100/20), per county and statewide.
+    With B the hex x provider membership matrix, the overlap is B.T @ B.
+    Per county it is one product too: the columns are county x provider,
+    so every hex only fills its own county's block.
+  * hex competition counts: providers_25_3 / providers_100_20 on every
+    hex_coverage row (how many providers meet each rule there).
+  * county_competition: hexes with no, one (monopoly) and two or more
+    providers at 100/20 per county.
+
+Pairs are stored once (provider_a <= provider_b); the diagonal holds each
+provider's own hex count.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from pipeline_trace import NULL_TRACE, PipelineTrace
+from step_h3_points import UNDERSERVED_BELOW, UNSERVED_BELOW
+
+IN_H3_PATH       = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
+IN_PROVIDER_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_hex_provider.csv"
+OUT_OVERLAP_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\provider_overlap.csv"
+OUT_COUNTY_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\county_competition.csv"
+
+OVERLAP_COLS = ["level", "county_fips", "provider_a", "provider_b", "shared_hexes", "shared_hexes_100_20"]
+
+
+def _meets(hp: pd.DataFrame, rule) -> np.ndarray:
+    return ((hp["max_down"] >= rule[0]) & (hp["max_up"] >= rule[1])).to_numpy()
+
+
+def home_hex_provider(h3_points: pd.DataFrame, hex_provider: pd.DataFrame) -> pd.DataFrame:
+    """
+    hex_provider entries of the (hex, county) row that build_broadband_db
+    keeps for each hex (the first county_fips in sort order).
+    """
+    home = h3_points.sort_values(["h3_res8_id", "county_fips"]).drop_duplicates("h3_res8_id")
+    return hex_provider.merge(home[["h3_res8_id", "county_fips"]], on=["h3_res8_id", "county_fips"])
+
+
+# ------------ PER-HEX COUNTS ------------
+def add_competition_counts(h3_points: pd.DataFrame, hex_provider: pd.DataFrame) -> pd.DataFrame:
+    """h3_points with providers_25_3 / providers_100_20 per (county, hex) row."""
+    counts = (
+        hex_provider.assign(
+            providers_25_3=_meets(hex_provider, UNSERVED_BELOW),
+            providers_100_20=_meets(hex_provider, UNDERSERVED_BELOW),
+        )
+        .groupby(["county_fips", "h3_res8_id"], sort=False)[["providers_25_3", "providers_100_20"]]
+        .sum()
+        .reset_index()
+    )
+    out = h3_points.drop(columns=["providers_25_3", "providers_100_20"], errors="ignore").merge(
+        counts, on=["county_fips", "h3_res8_id"], how="left"
+    )
+    out[["providers_25_3", "providers_100_20"]] = out[["providers_25_3", "providers_100_20"]].fillna(0).astype(int)
+    return out
+
+
+def county_competition(h3_points: pd.DataFrame) -> pd.DataFrame:
+    """Hexes per county by how many providers meet 100/20 there (needs add_competition_counts)."""
+    home = h3_points.sort_values(["h3_res8_id", "county_fips"]).drop_duplicates("h3_res8_id")
+    n = home["providers_100_20"]
+    return (
+        home.assign(
+            hexes_no_100_20=n == 0,
+            monopoly_hexes_100_20=n == 1,
+            competitive_hexes_100_20=n >= 2,
+        )
+        .groupby("county_fips")
+        .agg(
+            hexes=("h3_res8_id", "size"),
+            avg_providers=("provider_count", "mean"),
+            avg_providers_100_20=("providers_100_20", "mean"),
+            hexes_no_100_20=("hexes_no_100_20", "sum"),
+            monopoly_hexes_100_20=("monopoly_hexes_100_20", "sum"),
+            competitive_hexes_100_20=("competitive_hexes_100_20", "sum"),
+        )
+        .reset_index()
+    )
+
+
+# ------------ OVERLAP MATRIX ------------
+def _pair_counts(hex_codes, group_codes, n_hex, n_groups, weights) -> sparse.coo_matrix:
+    """Upper triangle of B.T @ B for the hex x group membership B (entries = weights)."""
+    b = sparse.csr_matrix((weights, (hex_codes, group_codes)), shape=(n_hex, n_groups))
+    return sparse.triu(b.T @ b).tocoo()
+
+
+def provider_overlap(hex_provider: pd.DataFrame, state_fips: str, trace=NULL_TRACE) -> pd.DataFrame:
+    """Shared hexes for every provider pair, per county and statewide (home hex rows only)."""
+    with trace.stage("provider_overlap", rows_in=len(hex_provider)) as s:
+        hex_codes, hexes = pd.factorize(hex_provider["h3_res8_id"])
+        # sorted provider codes, so code order == provider_id order (a <= b)
+        prov_codes, providers = pd.factorize(hex_provider["provider_id"].astype(str), sort=True)
+        county_codes, counties = pd.factorize(hex_provider["county_fips"], sort=True)
+        n_hex, n_prov, n_county = len(hexes), len(providers), len(counties)
+        ones = np.ones(len(hex_provider), dtype=np.int64)
+        fast = _meets(hex_provider, UNDERSERVED_BELOW).astype(np.int64)
+
+        frames = []
+        for level, group_codes, n_groups in [
+            ("county", county_codes * n_prov + prov_codes, n_county * n_prov),
+            ("state", prov_codes, n_prov),
+        ]:
+            pairs = _pair_counts(hex_codes, group_codes, n_hex, n_groups, ones)
+            pairs_fast = _pair_counts(hex_codes, group_codes, n_hex, n_groups, fast)
+            df = pd.DataFrame({"row": pairs.row, "col": pairs.col, "shared_hexes": pairs.data})
+            df = df.merge(
+                pd.DataFrame({"row": pairs_fast.row, "col": pairs_fast.col, "shared_hexes_100_20": pairs_fast.data}),
+                on=["row", "col"], how="left",
+            )
+            df["shared_hexes_100_20"] = df["shared_hexes_100_20"].fillna(0).astype(np.int64)
+            df["level"] = level
+            df["county_fips"] = counties[df["row"] // n_prov] if level == "county" else state_fips
+            df["provider_a"] = providers[df["row"] % n_prov]
+            df["provider_b"] = providers[df["col"] % n_prov]
+            frames.append(df[OVERLAP_COLS])
+
+        overlap = pd.concat(frames, ignore_index=True)
+        s.rows_out = len(overlap)
+
+    print(f"Provider overlap: {n_prov:,} providers, {len(overlap):,} county/state pairs")
+    return overlap
+
+
+def main(in_h3_path=IN_H3_PATH, in_provider_path=IN_PROVIDER_PATH, out_overlap_path=OUT_OVERLAP_PATH,
+         out_county_path=OUT_COUNTY_PATH, out_h3_path=IN_H3_PATH, state_fips="21"):
+    with PipelineTrace("step_provider_competition") as trace:
+        with trace.stage("load") as s:
+            h3_points = pd.read_csv(in_h3_path, dtype={"county_fips": str, "h3_res8_id": str})
+            hex_provider = pd.read_csv(
+                in_provider_path, dtype={"county_fips": str, "h3_res8_id": str, "provider_id": str}
+            )
+            s.rows_out = len(hex_provider)
+
+        h3_points = add_competition_counts(h3_points, hex_provider)
+        overlap = provider_overlap(home_hex_provider(h3_points, hex_provider), state_fips, trace)
+        competition = county_competition(h3_points)
+
+        with trace.stage("write", rows_in=len(overlap)):
+            overlap.to_csv(out_overlap_path, index=False)
+            competition.to_csv(out_county_path, index=False)
+            # hex_coverage picks up the per-hex counts from the H3 points file
+            h3_points.to_csv(out_h3_path, index=False)
+
+        print("\nProvider competition saved to:")
+        print(out_overlap_path)
+        print(out_county_path)
+    return len(overlap)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Mergeable speed-distribution sketches per county and provider-county.
+
+Step4/step5 only keep means (and step5's county_avg_down is a mean of
+provider means). This step keeps a fixed-bin histogram of download and
+upload speeds instead: log-spaced bins, 16 per decade from 0.1 Mbps to
+100 Gbps, plus one bin for anything below 0.1 (including 0). Every bin
+stores its count and the sum of its speeds, so merged histograms give
+exact bin means; BDC speeds sit on a few advertised tiers, which makes
+a quantile read as "mean of the bin it falls in" exact in practice.
+
+    b"H" + <bins per decade, low exponent, n bins> + uint32 counts + float64 sums
+
+Sketches are built over locations (each location's best advertised speed
+in the county, or from that provider) when location_id is present, and
+over BDC records otherwise. Histograms add bin by bin, so any set of
+counties or providers merges without the raw rows
+(analysis/speed_sketch.py reads this format).
+"""
+import struct
+
+import numpy as np
+import pandas as pd
+
+from pipeline_trace import NULL_TRACE, PipelineTrace
+
+IN_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\processed\bdc_step3_with_flags.csv"
+OUT_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\speed_sketches.parquet"
+
+BINS_PER_DECADE = 16
+LO_EXP = -1  # 0.1 Mbps
+HI_EXP = 5   # 100 Gbps
+N_BINS = 1 + (HI_EXP - LO_EXP) * BINS_PER_DECADE
+
+SKETCH_COLS = ["level", "county_fips", "provider_id", "units", "down_sketch", "up_sketch"]
+
+
+# ------------ HISTOGRAMS ------------
+def speed_bins(speeds: np.ndarray) -> np.ndarray:
+    """Bin index per speed; bin 0 holds everything below 10**LO_EXP."""
+    with np.errstate(divide="ignore"):
+        # the epsilon keeps exact tier values (100, 1000, ...) on their own edge
+        pos = (np.log10(speeds) - LO_EXP) * BINS_PER_DECADE + 1e-9
+    idx = np.where(speeds < 10.0 ** LO_EXP, 0, np.floor(pos).astype(np.int64) + 1)
+    return np.clip(idx, 0, N_BINS - 1)
+
+
+def encode_histogram(counts: np.ndarray, sums: np.ndarray) -> bytes:
+    header = struct.pack("<BbH", BINS_PER_DECADE, LO_EXP, N_BINS)
+    return b"H" + header + counts.astype("<u4").tobytes() + sums.astype("<f8").tobytes()
+
+
+def group_histograms(codes: np.ndarray, n_groups: int, speeds: np.ndarray) -> list:
+    """One encoded histogram per group code (0..n_groups-1)."""
+    flat = codes * N_BINS + speed_bins(speeds)
+    counts = np.bincount(flat, minlength=n_groups * N_BINS).reshape(n_groups, N_BINS)
+    sums = np.bincount(flat, weights=speeds, minlength=n_groups * N_BINS).reshape(n_groups, N_BINS)
+    return [encode_histogram(c, s) for c, s in zip(counts, sums)]
+
+
+def speed_sketches(df: pd.DataFrame, trace=NULL_TRACE) -> pd.DataFrame:
+    """
+    Download/upload histograms per county and per county x provider from
+    flagged rows (county_fips, provider_id, maxDown, maxUp[, location_id]).
+    """
+    with trace.stage("speed_sketches", rows_in=len(df)) as s:
+        cols = [c for c in ["county_fips", "provider_id", "location_id", "maxDown", "maxUp"] if c in df.columns]
+        df = df[cols].dropna()
+        df = df.assign(county_fips=df["county_fips"].astype(str).str[:5],
+                       provider_id=df["provider_id"].astype(str))
+        by_location = "location_id" in df.columns
+
+        frames = []
+        for level, keys in {"county": ["county_fips"], "provider": ["county_fips", "provider_id"]}.items():
+            rows = df
+            if by_location:
+                # one row per location: its best speed in the group
+                rows = df.groupby(keys + ["location_id"], sort=False, observed=True)[["maxDown", "maxUp"]].max()
+                rows = rows.reset_index()
+            grouped = rows.groupby(keys, sort=True, observed=True)
+            codes = grouped.ngroup().to_numpy()
+            part = grouped.size().reset_index(name="n")[keys]
+            part["units"] = "locations" if by_location else "records"
+            part["down_sketch"] = group_histograms(codes, len(part), rows["maxDown"].to_numpy(dtype=float))
+            part["up_sketch"] = group_histograms(codes, len(part), rows["maxUp"].to_numpy(dtype=float))
+            part.insert(0, "level", level)
+            frames.append(part)
+
+        out = pd.concat(frames, ignore_index=True).reindex(columns=SKETCH_COLS)
+        s.rows_out = len(out)
+
+    print(f"Speed sketches: {len(out):,} groups over {out['units'].iloc[0] if len(out) else 'records'}, "
+          f"{(out['down_sketch'].str.len().sum() + out['up_sketch'].str.len().sum()) / 1e6:.1f} MB")
+    return out
+
+
+def main(in_path=IN_PATH, out_path=OUT_PATH):
+    with PipelineTrace("step_speed_sketches") as trace:
+        with trace.stage("load") as s:
+            df = pd.read_csv(in_path, dtype={"county_fips": str, "provider_id": str, "location_id": str})
+            s.rows_out = len(df)
+
+        sketches = speed_sketches(df, trace)
+
+        with trace.stage("write", rows_in=len(sketches)):
+            sketches.to_parquet(out_path, index=False)
+
+        print("\nSpeed sketches saved to:")
+        print(out_path)
+    return len(sketches)
+
+
+if __name__ == "__main__":
+    main()
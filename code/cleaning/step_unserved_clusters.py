@@ -0,0 +1,250 @@
+"""
+Contiguous unserved areas: connected components of Unserved (and of
+Unserved + Underserved) hexes over H3 adjacency.
+
+Adjacency comes from H3's local IJ grid (three neighbor offsets per cell
+cover every edge once); components come from a vectorized union-find:
+every round hooks the larger root of each edge under the smaller one and
+then compresses all paths, until no edge joins two roots.
+
+Writes a cluster id onto every hex in a cluster and one row per cluster:
+
+    cluster_id              "<state fips>-U-<rank>" / "<state fips>-UU-<rank>" (rank 1 = largest)
+    level                   unserved | unserved_underserved
+    hexes, lat, lon         size and centroid of the hex centers
+    min/max_lat, min/max_lon  bounding box (for zooming the map)
+    county_fips             county holding most of the cluster
+    counties, county_count  every county the cluster touches
+    candidate_providers     providers reporting service in or right next
+                            to the cluster, most hexes first
+    population, housing_units  apportioned census counts of the cluster's
+                            hexes (step_hex_population; NaN without it)
+"""
+import numpy as np
+import pandas as pd
+
+from h3_compat import grid_disk, local_ij_grid
+from pipeline_trace import NULL_TRACE, PipelineTrace
+
+# ------------ INPUT & OUTPUT PATHS ------------
+IN_PATH  = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
+OUT_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\bdc_h3_points.csv"
+OUT_CLUSTERS_PATH = r"H:\Broadband_Project_1\datasets\bdc_data_1\final\unserved_clusters.csv"
+
+# level -> (categories in the cluster, hex column, id prefix)
+CLUSTER_LEVELS = {
+    "unserved": (["Unserved"], "cluster_id", "U"),
+    "unserved_underserved": (["Unserved", "Underserved"], "cluster_id_underserved", "UU"),
+}
+MAX_CANDIDATES = 5
+
+CLUSTER_COLS = [
+    "cluster_id", "level", "hexes", "lat", "lon", "min_lat", "min_lon", "max_lat", "max_lon",
+    "county_fips", "counties", "county_count", "candidate_providers", "population", "housing_units",
+]
+
+
+# ------------ ADJACENCY ------------
+def hex_adjacency(h3_ids) -> tuple:
+    """(u, v) index arrays with one entry per pair of neighboring cells in h3_ids."""
+    h3_ids = np.asarray(h3_ids, dtype=object)
+    if len(h3_ids) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    ij = local_ij_grid(h3_ids)
+    if ij is None:
+        return _disk_adjacency(h3_ids)
+
+    ni, nj = ij.max(axis=0) + 1
+    grid = np.full((ni, nj), -1, dtype=np.int64)
+    grid[ij[:, 0], ij[:, 1]] = np.arange(len(h3_ids))
+
+    us, vs = [], []
+    for di, dj in [(1, 0), (0, 1), (1, 1)]:
+        i, j = ij[:, 0] + di, ij[:, 1] + dj
+        inside = (i < ni) & (j < nj)
+        nb = np.full(len(h3_ids), -1, dtype=np.int64)
+        nb[inside] = grid[i[inside], j[inside]]
+        hit = nb >= 0
+        us.append(np.flatnonzero(hit))
+        vs.append(nb[hit])
+    return np.concatenate(us), np.concatenate(vs)
+
+
+def _disk_adjacency(h3_ids: np.ndarray) -> tuple:
+    position = {h: k for k, h in enumerate(h3_ids)}
+    us, vs = [], []
+    for k, h in enumerate(h3_ids):
+        for n in grid_disk(h, 1):
+            m = position.get(n)
+            if m is not None and m > k:
+                us.append(k)
+                vs.append(m)
+    return np.array(us, dtype=np.int64), np.array(vs, dtype=np.int64)
+
+
+# ------------ UNION-FIND ------------
+def union_find(n: int, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Root (smallest member index) of every node's component."""
+    parent = np.arange(n)
+    while True:
+        pu, pv = parent[u], parent[v]
+        join = pu != pv
+        if not join.any():
+            return parent
+        # hook: each root goes under the smallest root it shares an edge with
+        np.minimum.at(parent, np.maximum(pu[join], pv[join]), np.minimum(pu[join], pv[join]))
+        # compress: point every node straight at its root
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+
+# ------------ CLUSTERS ------------
+def _joined(codes, values, n: int) -> list:
+    """"; "-joined values per code 0..n-1, in the order given (one pass, no groupby apply)."""
+    out = [[] for _ in range(n)]
+    for c, v in zip(codes.tolist(), values.tolist()):
+        out[c].append(v)
+    return ["; ".join(x) for x in out]
+
+
+def find_clusters(hexes: pd.DataFrame, in_set: np.ndarray, adjacency: tuple, level: str,
+                  state_fips: str) -> tuple:
+    """
+    (cluster id per hex row or None, CLUSTER_COLS table, largest first) for
+    the rows of `hexes` where in_set is True. `adjacency` is hex_adjacency()
+    of the same rows. Also used by the dashboard's threshold what-if
+    (analysis/clusters.py), on hex rows in any order.
+    """
+    u, v = adjacency
+    keep = in_set[u] & in_set[v]
+    root = union_find(len(hexes), u[keep], v[keep])
+
+    members = np.flatnonzero(in_set)
+    codes, _ = pd.factorize(root[members])
+    sizes = np.bincount(codes)
+    # rank 1 = largest cluster; ties go to the cluster with the smallest H3
+    # id, whatever the row order of `hexes`
+    by_h3 = codes[np.argsort(hexes["h3_res8_id"].astype(str).to_numpy()[members], kind="stable")]
+    _, first = np.unique(by_h3, return_index=True)
+    order = np.lexsort((first, -sizes))
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[order] = np.arange(1, len(sizes) + 1)
+    prefix = CLUSTER_LEVELS[level][2]
+    ids = np.array([f"{state_fips}-{prefix}-{r}" for r in rank], dtype=object)
+
+    hex_ids = np.full(len(hexes), None, dtype=object)
+    hex_ids[members] = ids[codes]
+
+    m = pd.DataFrame({
+        "cluster": codes,
+        "lat": hexes["lat"].to_numpy(dtype=float)[members],
+        "lon": hexes["lon"].to_numpy(dtype=float)[members],
+        "county_fips": hexes["county_fips"].astype(str).to_numpy()[members],
+    })
+    table = m.groupby("cluster").agg(
+        hexes=("lat", "size"),
+        lat=("lat", "mean"),
+        lon=("lon", "mean"),
+        min_lat=("lat", "min"),
+        min_lon=("lon", "min"),
+        max_lat=("lat", "max"),
+        max_lon=("lon", "max"),
+    )
+    for col in ["population", "housing_units"]:
+        values = (
+            pd.to_numeric(hexes[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)[members]
+            if col in hexes.columns else np.full(len(members), np.nan)
+        )
+        table[col] = pd.Series(values).groupby(codes).sum(min_count=1)
+    by_county = m.groupby(["cluster", "county_fips"]).size().rename("n").reset_index()
+    by_county = by_county.sort_values(["cluster", "n", "county_fips"], ascending=[True, False, True])
+    table["county_fips"] = by_county.drop_duplicates("cluster").set_index("cluster")["county_fips"]
+    by_fips = by_county.sort_values(["cluster", "county_fips"])
+    table["counties"] = _joined(by_fips["cluster"], by_fips["county_fips"], len(table))
+    table["county_count"] = by_county.groupby("cluster").size()
+
+    # providers in the cluster or in a hex sharing an edge with it
+    cluster_of = np.full(len(hexes), -1, dtype=np.int64)
+    cluster_of[members] = codes
+    edge = (cluster_of[u] >= 0) != (cluster_of[v] >= 0)
+    near = pd.DataFrame({
+        "cluster": np.concatenate([codes, cluster_of[u[edge]], cluster_of[v[edge]]]),
+        "hex": np.concatenate([members, v[edge], u[edge]]),
+    })
+    near = near[near["cluster"] >= 0].drop_duplicates()
+    # count distinct provider lists per cluster first, then split each list once
+    name_codes, names = pd.factorize(hexes["provider_names"].astype(object).fillna(""))
+    near["names"] = name_codes[near["hex"].to_numpy()]
+    lists = near.groupby(["cluster", "names"]).size().rename("n").reset_index()
+    split = pd.DataFrame({"names": np.arange(len(names)), "provider": pd.Series(names, dtype=object).str.split("; ")})
+    split = split.explode("provider")
+    split = split[split["provider"].astype(bool)]
+    top = (
+        lists.merge(split, on="names")
+        .groupby(["cluster", "provider"])["n"].sum().reset_index()
+        .sort_values(["cluster", "n", "provider"], ascending=[True, False, True])
+        .groupby("cluster").head(MAX_CANDIDATES)
+    )
+    table["candidate_providers"] = _joined(top["cluster"], top["provider"], len(table))
+
+    table["cluster_id"] = ids[table.index]
+    table["level"] = level
+    table["rank"] = rank[table.index]
+    table = table.sort_values("rank").reindex(columns=CLUSTER_COLS).reset_index(drop=True)
+    return hex_ids, table
+
+
+def unserved_clusters(h3_points: pd.DataFrame, state_fips: str, trace=NULL_TRACE) -> tuple:
+    """
+    (h3_points with cluster_id / cluster_id_underserved, cluster table).
+    A hex listed under two counties is clustered once (its first county
+    in sort order, as in hex_coverage).
+    """
+    with trace.stage("unserved_clusters", rows_in=len(h3_points)) as s:
+        hexes = h3_points.sort_values(["h3_res8_id", "county_fips"])
+        if "population" in hexes.columns:
+            # hex totals, as on the kept hex_coverage row
+            weights = ["population", "housing_units"]
+            hexes[weights] = hexes.groupby("h3_res8_id")[weights].transform("sum", min_count=1)
+        hexes = hexes.drop_duplicates("h3_res8_id").reset_index(drop=True)
+        adjacency = hex_adjacency(hexes["h3_res8_id"])
+
+        tables = []
+        out = h3_points.drop(columns=[c for _, c, _ in CLUSTER_LEVELS.values()], errors="ignore")
+        for level, (categories, column, _) in CLUSTER_LEVELS.items():
+            in_set = hexes["service_category"].isin(categories).to_numpy()
+            hex_ids, table = find_clusters(hexes, in_set, adjacency, level, state_fips)
+            out[column] = out["h3_res8_id"].map(pd.Series(hex_ids, index=hexes["h3_res8_id"]))
+            tables.append(table)
+        clusters = pd.concat(tables, ignore_index=True)
+        s.rows_out = len(clusters)
+
+    for level in CLUSTER_LEVELS:
+        lvl = clusters[clusters["level"] == level]
+        biggest = int(lvl["hexes"].max()) if len(lvl) else 0
+        print(f"Clusters ({level}): {len(lvl):,}, largest {biggest:,} hexes")
+    return out, clusters
+
+
+def main(in_path=IN_PATH, out_path=OUT_PATH, out_clusters_path=OUT_CLUSTERS_PATH, state_fips="21"):
+    with PipelineTrace("step_unserved_clusters") as trace:
+        with trace.stage("load") as s:
+            h3_points = pd.read_csv(in_path, dtype={"county_fips": str, "h3_res8_id": str})
+            s.rows_out = len(h3_points)
+
+        h3_points, clusters = unserved_clusters(h3_points, state_fips, trace)
+
+        with trace.stage("write", rows_in=len(clusters)):
+            h3_points.to_csv(out_path, index=False)
+            clusters.to_csv(out_clusters_path, index=False)
+
+        print("\nUnserved clusters saved to:")
+        print(out_clusters_path)
+    return len(clusters)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Batch threshold sweep: hexes and locations per county that meet every
+download/upload tier pair in a grid.
+
+For each county and each pair (down, up) of DOWN_TIERS x UP_TIERS the
+sweep counts the hexes (and BDC locations) whose best advertised speeds
+are at least down/up Mbps. It is done in one pass: every hex gets the
+number of download tiers and upload tiers it meets (searchsorted on the
+sorted tier lists), those go into one county x down x up histogram, and a
+reversed cumulative sum over both speed axes turns it into "meets at
+least this pair" counts for the whole grid.
+
+Any two grid pairs then give the three service categories:
+
+    unserved    = hexes - meets(unserved_below)
+    underserved = meets(unserved_below) - meets(underserved_below)
+    served      = meets(underserved_below)
+
+(sweep_categories() below). Hexes are apportioned to counties with the
+hex_county area shares when the DB has them; location counts come from
+the hex-level location sketches when present, people and housing units
+from the hex population columns (step_hex_population.py), split by the
+same area shares.
+
+    python code/cleaning/threshold_sweep.py --db db/broadband_ky.db
+    python code/cleaning/threshold_sweep.py --db db/broadband_states.db --state TN --csv tn_sweep.csv
+"""
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline_trace import NULL_TRACE, PipelineTrace
+from states import parse_states
+from step_h3_points import UNDERSERVED_BELOW, UNSERVED_BELOW
+
+DB_PATH = r"H:\Broadband_Project_1\analysis\broadband_ky.db"
+
+# Mbps; 10 x 10 = 100 pairs, including the FCC 25/3 and 100/20 rules
+DOWN_TIERS = [4, 10, 25, 50, 100, 250, 500, 1000, 2000, 5000]
+UP_TIERS   = [0.2, 1, 3, 10, 20, 25, 50, 100, 500, 1000]
+
+SWEEP_COLS = [
+    "county_fips", "down_mbps", "up_mbps", "hexes", "hexes_meeting", "locations", "locations_meeting",
+    "population", "population_meeting", "housing_units", "housing_units_meeting",
+]
+WEIGHT_COLS = ["population", "housing_units"]
+
+
+# ------------ GRID COUNTS ------------
+def tier_counts(county_codes, n_counties, down, up, weights, down_tiers, up_tiers) -> np.ndarray:
+    """
+    (n_counties, len(down_tiers), len(up_tiers)) array: summed weight of the
+    rows whose down >= down_tiers[i] and up >= up_tiers[j], per county.
+    """
+    nd, nu = len(down_tiers), len(up_tiers)
+    # how many tiers each row meets (NaN speeds meet none)
+    d_met = np.searchsorted(down_tiers, np.nan_to_num(down, nan=-1.0), side="right")
+    u_met = np.searchsorted(up_tiers, np.nan_to_num(up, nan=-1.0), side="right")
+
+    flat = (county_codes * (nd + 1) + d_met) * (nu + 1) + u_met
+    hist = np.bincount(flat, weights=weights, minlength=n_counties * (nd + 1) * (nu + 1))
+    hist = hist.reshape(n_counties, nd + 1, nu + 1)
+
+    # meets[c, i, j] = sum of hist[c, a, b] for a > i, b > j
+    meets = hist[:, ::-1, ::-1].cumsum(axis=1).cumsum(axis=2)[:, ::-1, ::-1]
+    return meets[:, 1:, 1:]
+
+
+def threshold_sweep(hex_df, hex_county=None, hex_locations=None, down_tiers=DOWN_TIERS,
+                    up_tiers=UP_TIERS, trace=NULL_TRACE) -> pd.DataFrame:
+    """
+    Long county x (down, up) table from hex_coverage rows (h3_res8_id,
+    county_fips, max_down, max_up, optional population / housing_units). hex_county: optional area shares
+    (h3_res8_id, county_fips, weight). hex_locations: optional distinct
+    locations per (county_fips, h3_res8_id).
+    """
+    down_tiers = np.sort(np.asarray(down_tiers, dtype=float))
+    up_tiers = np.sort(np.asarray(up_tiers, dtype=float))
+
+    with trace.stage("sweep", rows_in=len(hex_df)) as s:
+        hex_df = hex_df.reset_index(drop=True)
+        if hex_county is not None and len(hex_county):
+            pos = pd.Index(hex_df["h3_res8_id"]).get_indexer(hex_county["h3_res8_id"])
+            keep = pos >= 0
+            pos = pos[keep]
+            fips = hex_county["county_fips"].to_numpy()[keep]
+            weight = hex_county["weight"].to_numpy(dtype=float)[keep]
+        else:
+            pos = np.arange(len(hex_df))
+            fips = hex_df["county_fips"].to_numpy()
+            weight = np.ones(len(hex_df))
+
+        # locations keep their own county (the block's), not the area shares
+        if hex_locations is not None:
+            loc = hex_locations.merge(
+                hex_df[["h3_res8_id", "max_down", "max_up"]], on="h3_res8_id", how="inner"
+            )
+            loc_fips = loc["county_fips"].to_numpy()
+        else:
+            loc_fips = np.empty(0, dtype=object)
+
+        counties, codes = np.unique(np.concatenate([fips, loc_fips]).astype(str), return_inverse=True)
+        hex_codes, loc_codes = codes[:len(fips)], codes[len(fips):]
+        n = len(counties)
+
+        down = hex_df["max_down"].to_numpy(dtype=float)
+        up = hex_df["max_up"].to_numpy(dtype=float)
+        hex_meets = tier_counts(hex_codes, n, down[pos], up[pos], weight, down_tiers, up_tiers)
+        hex_totals = np.bincount(hex_codes, weights=weight, minlength=n)
+
+        nd, nu = len(down_tiers), len(up_tiers)
+        sweep = pd.DataFrame({
+            "county_fips": np.repeat(counties, nd * nu),
+            "down_mbps": np.tile(np.repeat(down_tiers, nu), n),
+            "up_mbps": np.tile(up_tiers, n * nd),
+            "hexes": np.repeat(hex_totals, nd * nu),
+            "hexes_meeting": hex_meets.ravel(),
+        })
+
+        if hex_locations is not None:
+            n_loc = loc["distinct_locations"].to_numpy(dtype=float)
+            loc_meets = tier_counts(loc_codes, n, loc["max_down"].to_numpy(dtype=float),
+                                    loc["max_up"].to_numpy(dtype=float), n_loc, down_tiers, up_tiers)
+            sweep["locations"] = np.repeat(np.bincount(loc_codes, weights=n_loc, minlength=n), nd * nu)
+            sweep["locations_meeting"] = loc_meets.ravel()
+        else:
+            sweep["locations"] = np.nan
+            sweep["locations_meeting"] = np.nan
+
+        for col in WEIGHT_COLS:
+            if col not in hex_df.columns:
+                sweep[col] = np.nan
+                sweep[f"{col}_meeting"] = np.nan
+                continue
+            w = weight * pd.to_numeric(hex_df[col], errors="coerce").fillna(0).to_numpy(dtype=float)[pos]
+            sweep[col] = np.repeat(np.bincount(hex_codes, weights=w, minlength=n), nd * nu)
+            sweep[f"{col}_meeting"] = tier_counts(hex_codes, n, down[pos], up[pos], w, down_tiers, up_tiers).ravel()
+        s.rows_out = len(sweep)
+
+    print(f"Threshold sweep: {len(hex_df):,} hexes x {nd * nu} tier pairs -> {len(sweep):,} rows "
+          f"({n} counties)")
+    return sweep[SWEEP_COLS]
+
+
+def sweep_categories(sweep: pd.DataFrame, unserved_below=UNSERVED_BELOW, underserved_below=UNDERSERVED_BELOW) -> pd.DataFrame:
+    """
+    Unserved / Underserved / Served hexes, locations, people and housing
+    units per county for two pairs of the grid (each must be one of the
+    swept tier pairs).
+    """
+    def meeting(pair):
+        rows = sweep[(sweep["down_mbps"] == pair[0]) & (sweep["up_mbps"] == pair[1])]
+        if rows.empty:
+            raise ValueError(f"{pair[0]}/{pair[1]} is not in the swept grid")
+        return rows.set_index("county_fips")
+
+    low, high = meeting(unserved_below), meeting(underserved_below)
+    out = pd.DataFrame(index=low.index)
+    for unit in ["hexes", "locations"] + [c for c in WEIGHT_COLS if c in sweep.columns]:
+        out[f"{unit}_unserved"] = low[unit] - low[f"{unit}_meeting"]
+        out[f"{unit}_underserved"] = low[f"{unit}_meeting"] - high[f"{unit}_meeting"]
+        out[f"{unit}_served"] = high[f"{unit}_meeting"]
+    return out.reset_index()
+
+
+# ------------ DB ------------
+def _has_table(conn, table) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def load_sweep_inputs(conn, state_fips=None):
+    """hex_coverage rows (with population when present) plus the optional hex_county shares and hex location counts."""
+    where, params = "", ()
+    if state_fips is not None:
+        where, params = " WHERE county_fips LIKE ?", (f"{state_fips}%",)
+
+    cols = "h3_res8_id, county_fips, max_down, max_up"
+    # DBs built before step_hex_population have no population columns
+    if "population" in {r[1] for r in conn.execute("PRAGMA table_info(hex_coverage)")}:
+        cols += ", population, housing_units"
+    hex_df = pd.read_sql(f"SELECT {cols} FROM hex_coverage" + where, conn, params=params)
+    hex_county = None
+    if _has_table(conn, "hex_county"):
+        hex_county = pd.read_sql("SELECT h3_res8_id, county_fips, weight FROM hex_county" + where,
+                                 conn, params=params)
+    hex_locations = None
+    if _has_table(conn, "location_sketch"):
+        hex_locations = pd.read_sql(
+            "SELECT county_fips, h3_res8_id, distinct_locations FROM location_sketch WHERE level = 'hex'"
+            + where.replace(" WHERE", " AND"), conn, params=params
+        )
+        if hex_locations.empty:
+            hex_locations = None
+    return hex_df, hex_county, hex_locations
+
+
+def main(db_path=DB_PATH, state_fips=None, csv_path=None, down_tiers=DOWN_TIERS, up_tiers=UP_TIERS):
+    t0 = time.perf_counter()
+    with PipelineTrace("threshold_sweep") as trace:
+        conn = sqlite3.connect(str(db_path))
+        with trace.stage("load") as s:
+            hex_df, hex_county, hex_locations = load_sweep_inputs(conn, state_fips)
+            s.rows_out = len(hex_df)
+
+        sweep = threshold_sweep(hex_df, hex_county, hex_locations, down_tiers, up_tiers, trace)
+
+        with trace.stage("write", rows_in=len(sweep)):
+            # a state's sweep replaces only that state's rows
+            if state_fips is not None and _has_table(conn, "threshold_sweep"):
+                conn.execute("DELETE FROM threshold_sweep WHERE county_fips LIKE ?", (f"{state_fips}%",))
+                sweep.to_sql("threshold_sweep", conn, if_exists="append", index=False)
+            else:
+                sweep.to_sql("threshold_sweep", conn, if_exists="replace", index=False)
+                conn.execute("CREATE INDEX idx_threshold_sweep ON threshold_sweep(down_mbps, up_mbps, county_fips)")
+            conn.commit()
+            if csv_path:
+                sweep.to_csv(csv_path, index=False)
+        conn.close()
+
+    print("\nthreshold_sweep table written to:", db_path)
+    if csv_path:
+        print("CSV copy:", csv_path)
+    print(f"Done in {time.perf_counter() - t0:.1f}s")
+    return sweep
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="County x speed-tier sweep over hex_coverage.")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--state", help="USPS code or FIPS of one state in the DB (default: every row)")
+    parser.add_argument("--csv", type=Path, help="also write the sweep to this CSV")
+    parser.add_argument("--down", help="comma list of download tiers in Mbps")
+    parser.add_argument("--up", help="comma list of upload tiers in Mbps")
+    args = parser.parse_args()
+
+    state = parse_states(args.state)[0] if args.state else None
+    main(
+        args.db, state, args.csv,
+        [float(x) for x in args.down.split(",")] if args.down else DOWN_TIERS,
+        [float(x) for x in args.up.split(",")] if args.up else UP_TIERS,
+    )
@@ -0,0 +1,80 @@
+"""
+Checks of the aggregate partials roll-ups (code/cleaning/step_aggregate_partials.py,
+analysis/partials.py) against an exact pandas groupby over the same rows.
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / "code" / "cleaning"))
+sys.path.append(str(ROOT / "analysis"))
+
+from partials import rollup_partials  # noqa: E402
+from step_aggregate_partials import aggregate_partials  # noqa: E402
+from step_h3_points import TECH_MAP  # noqa: E402
+
+BRANDS = {"130077": "Spectrum", "130228": "AT&T", "131310": "Windstream", "290111": "T-Mobile"}
+
+
+def flagged_rows(seed: int, n: int = 10_000) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    provider = rng.choice(list(BRANDS), n)
+    down = rng.choice([0, 10, 25, 50, 100, 300, 1000], n) * rng.uniform(0.5, 1.5, n)
+    return pd.DataFrame({
+        "county_fips": rng.choice(["21067", "21111", "21195", "47037"], n),
+        "provider_id": provider,
+        "brand_name": [BRANDS[p] for p in provider],
+        "technology": rng.choice([10, 40, 50, 70, 71], n),
+        "maxDown": down,
+        "maxUp": down * rng.uniform(0.05, 1.0, n),
+        "is_underserved": (down < 100).astype(int),
+    })
+
+
+def exact_rollup(rows: pd.DataFrame, by) -> pd.DataFrame:
+    """The same statistics straight from the rows."""
+    rows = rows.assign(tech_group=rows["technology"].astype(str).map(TECH_MAP).fillna("Other / Unknown"))
+    grouped = rows.groupby(by)
+    out = pd.DataFrame({"records": grouped.size(), "pct_underserved": grouped["is_underserved"].mean() * 100})
+    for d, col in [("down", "maxDown"), ("up", "maxUp")]:
+        out[f"{d}_mean"] = grouped[col].mean()
+        out[f"{d}_std"] = grouped[col].std(ddof=0)
+        out[f"{d}_min"] = grouped[col].min()
+        out[f"{d}_max"] = grouped[col].max()
+    return out
+
+
+@pytest.mark.parametrize("by", ["tech_group", "provider_name", ["county_fips", "tech_group"]])
+def test_rollup_matches_groupby(by):
+    rows = flagged_rows(0)
+    got = rollup_partials(aggregate_partials(rows), by).set_index(by)
+
+    key = "brand_name" if by == "provider_name" else by
+    expected = exact_rollup(rows, key)
+    expected.index.names = got.index.names
+    pd.testing.assert_frame_equal(got, expected.loc[got.index], check_dtype=False, rtol=1e-6)
+
+
+def test_rollup_of_everything():
+    rows = flagged_rows(1)
+    got = rollup_partials(aggregate_partials(rows)).iloc[0]
+    assert got["records"] == len(rows)
+    assert got["pct_underserved"] == pytest.approx(rows["is_underserved"].mean() * 100)
+    assert got["down_mean"] == pytest.approx(rows["maxDown"].mean())
+    assert got["down_std"] == pytest.approx(rows["maxDown"].std(ddof=0))
+    assert got["up_max"] == rows["maxUp"].max()
+
+
+def test_region_rollup_matches_rows_in_region():
+    rows = flagged_rows(2)
+    region = ["21067", "21195"]
+    partials = aggregate_partials(rows)
+    got = rollup_partials(partials[partials["county_fips"].isin(region)], "provider_id").set_index("provider_id")
+    expected = exact_rollup(rows[rows["county_fips"].isin(region)], "provider_id")
+    pd.testing.assert_frame_equal(got, expected.loc[got.index], check_dtype=False, rtol=1e-6)
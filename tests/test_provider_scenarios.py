@@ -0,0 +1,68 @@
+"""
+Checks of the provider scenario matrix in analysis/provider_scenarios.py
+against the hex_coverage rows step_h3_points.py builds from the same BDC rows.
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / "code" / "cleaning"))
+sys.path.append(str(ROOT / "analysis"))
+
+from h3_compat import grid_disk  # noqa: E402
+from provider_scenarios import provider_matrix, simulate  # noqa: E402
+from step_h3_points import aggregate_hexes, hex_provider_speeds, prepare_rows  # noqa: E402
+
+LEXINGTON = "88266dad03fffff"  # res-8 cell in Fayette County, KY
+DOWN_TIERS = np.array([0, 10, 25, 50, 100, 300, 1000])
+UP_TIERS = np.array([0, 1, 3, 10, 20, 100, 1000])
+
+
+def raw_rows(seed: int) -> pd.DataFrame:
+    """Raw BDC rows (as read with dtype=str) for a patch of hexes and a few providers."""
+    rng = np.random.default_rng(seed)
+    cells = np.array(sorted(grid_disk(LEXINGTON, 6)))
+    n = 400  # sparse enough that some hexes rely on a single provider
+    return pd.DataFrame({
+        "state_usps": "KY",
+        "h3_res8_id": cells[rng.integers(0, len(cells), n)],
+        "block_geoid": "210670001001000",
+        "provider_id": rng.choice(["130077", "130228", "131310", "290111", "460061"], n),
+        "brand_name": "Test ISP",
+        "technology": rng.choice(["10", "40", "50", "70"], n),
+        "max_advertised_download_speed": DOWN_TIERS[rng.integers(0, len(DOWN_TIERS), n)].astype(str),
+        "max_advertised_upload_speed": UP_TIERS[rng.integers(0, len(UP_TIERS), n)].astype(str),
+    })
+
+
+@pytest.fixture(params=range(3))
+def coverage(request):
+    """(hex_coverage rows, provider matrix over them) built from the same BDC rows."""
+    rows = prepare_rows(raw_rows(request.param))
+    hexes = aggregate_hexes(rows)
+    return hexes, provider_matrix(hexes["h3_res8_id"], hex_provider_speeds(rows))
+
+
+def test_no_change_reproduces_hex_coverage(coverage):
+    hexes, m = coverage
+    after = simulate(m)
+    assert np.array_equal(after["max_down"], hexes["max_down"].to_numpy(dtype=np.float32))
+    assert np.array_equal(after["max_up"], hexes["max_up"].to_numpy(dtype=np.float32))
+    assert np.array_equal(after["service_category"].astype(str), hexes["service_category"].astype(str))
+
+
+def test_removing_a_provider_never_unserves_fewer_hexes(coverage):
+    hexes, m = coverage
+    before = hexes["service_category"].to_numpy() == "Unserved"
+    newly_unserved = 0
+    for provider_id in m["providers"]:
+        after = simulate(m, remove=[provider_id])["service_category"].to_numpy() == "Unserved"
+        assert not (before & ~after).any(), f"removing {provider_id} served an unserved hex"
+        newly_unserved += (after & ~before).sum()
+    assert newly_unserved > 0  # the exits did change something
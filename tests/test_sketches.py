@@ -0,0 +1,126 @@
+"""
+Checks of the location and speed sketches (code/cleaning/step_location_sketches.py,
+code/cleaning/step_speed_sketches.py) and their merges in analysis/ against
+exact pandas results on the same rows.
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / "code" / "cleaning"))
+sys.path.append(str(ROOT / "analysis"))
+
+import location_sketch  # noqa: E402
+import speed_sketch  # noqa: E402
+from step_location_sketches import SPARSE_MAX, encode_sketch, location_hashes, location_sketches  # noqa: E402
+from step_speed_sketches import speed_sketches  # noqa: E402
+
+COUNTIES = ["21067", "21111", "21195", "47037"]
+PROVIDERS = ["130077", "130228", "131310", "290111"]
+DOWN_TIERS = np.array([0, 10, 25, 50, 100, 300, 1000, 2000])
+
+
+def bdc_rows(seed: int, n: int = 20_000) -> pd.DataFrame:
+    """Flagged BDC rows: locations repeat across providers, counties differ in size."""
+    rng = np.random.default_rng(seed)
+    county = rng.choice(COUNTIES, n, p=[0.6, 0.3, 0.08, 0.02])
+    return pd.DataFrame({
+        "county_fips": county,
+        "provider_id": rng.choice(PROVIDERS, n),
+        "h3_res8_id": [f"{c}-{k}" for c, k in zip(county, rng.integers(0, 40, n))],
+        "location_id": [f"{c}-{k}" for c, k in zip(county, rng.integers(0, 6_000, n))],
+        "maxDown": rng.choice(DOWN_TIERS, n).astype(float),
+        "maxUp": rng.choice([0, 1, 3, 10, 20, 100, 1000], n).astype(float),
+    })
+
+
+# ------------ LOCATION SKETCHES ------------
+@pytest.fixture(scope="module")
+def rows():
+    return bdc_rows(0)
+
+
+@pytest.fixture(scope="module")
+def loc_sketches(rows):
+    return location_sketches(rows)
+
+
+def test_stored_counts_are_exact(rows, loc_sketches):
+    county = loc_sketches[loc_sketches["level"] == "county"].set_index("county_fips")
+    exact = rows.groupby("county_fips")["location_id"].nunique()
+    assert county["distinct_locations"].to_dict() == exact.to_dict()
+
+
+@pytest.mark.parametrize("by", ["provider_id", "county_fips"])
+def test_rollup_matches_nunique(rows, loc_sketches, by):
+    # provider-county sketches merged across counties (or providers)
+    estimate = location_sketch.rollup(loc_sketches[loc_sketches["level"] == "provider"], by)
+    exact = rows.groupby(by)["location_id"].nunique()
+    for key, n in exact.items():
+        if n <= SPARSE_MAX:
+            assert estimate[key] == n  # still an exact hash set
+        else:
+            assert estimate[key] == pytest.approx(n, rel=0.05)  # HyperLogLog, ~1.6% error at p=12
+
+
+def test_merge_of_small_sketches_is_exact(rows, loc_sketches):
+    hexes = loc_sketches[loc_sketches["level"] == "hex"]
+    small = rows[rows["county_fips"] == "47037"]
+    assert small["location_id"].nunique() <= SPARSE_MAX
+    merged = location_sketch.distinct_locations(hexes.loc[hexes["county_fips"] == "47037", "sketch"])
+    assert merged == small["location_id"].nunique()
+
+
+def test_merge_rejects_mixed_precisions():
+    hashes = np.unique(location_hashes(pd.Series(["a", "b", "c"])))
+    with pytest.raises(ValueError):
+        location_sketch.merge([encode_sketch(hashes, 12), encode_sketch(hashes, 10)])
+
+
+# ------------ SPEED SKETCHES ------------
+def test_quantiles_match_pandas_on_tiers(rows):
+    # one location's best speed per group, as the sketches store it
+    sketches = speed_sketches(rows)
+    county = sketches[sketches["level"] == "county"]
+    region = ["21067", "21195"]
+    best = (rows[rows["county_fips"].isin(region)]
+            .groupby(["county_fips", "location_id"])["maxDown"].max())
+
+    got = speed_sketch.speed_quantiles(county.loc[county["county_fips"].isin(region), "down_sketch"])
+    for q, value in got.items():
+        # advertised tiers each sit in their own bin, so the bin mean is the exact order statistic
+        assert value == np.quantile(best.to_numpy(), q, method="inverted_cdf")
+
+
+def test_quantiles_within_a_bin_of_pandas():
+    rng = np.random.default_rng(1)
+    speeds = np.exp(rng.uniform(np.log(0.5), np.log(3_000), 5_000))
+    df = pd.DataFrame({"county_fips": "21067", "provider_id": "130077", "maxDown": speeds, "maxUp": speeds})
+    sketches = speed_sketches(df)
+    blob = sketches.loc[sketches["level"] == "county", "down_sketch"].iloc[0]
+
+    bin_ratio = 10 ** (1 / speed_sketch.decode(blob)[0])
+    for q, value in speed_sketch.speed_quantiles([blob]).items():
+        exact = np.quantile(speeds, q, method="inverted_cdf")
+        assert exact / bin_ratio <= value <= exact * bin_ratio
+
+
+def test_histogram_matches_pandas_counts():
+    rng = np.random.default_rng(2)
+    speeds = np.exp(rng.uniform(np.log(0.01), np.log(3_000), 5_000))
+    df = pd.DataFrame({"county_fips": "21067", "provider_id": "130077", "maxDown": speeds, "maxUp": speeds})
+
+    sketches = speed_sketches(df)
+    hist = speed_sketch.speed_histogram(sketches.loc[sketches["level"] == "county", "down_sketch"])
+
+    assert hist["count"].sum() == len(speeds)
+    for lo, hi, count, mean in hist[["lo", "hi", "count", "mean"]].itertuples(index=False):
+        inside = speeds[(speeds >= lo) & (speeds < hi)]
+        assert count == len(inside)
+        assert mean == pytest.approx(inside.mean())
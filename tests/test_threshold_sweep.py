@@ -0,0 +1,75 @@
+"""
+Checks of code/cleaning/threshold_sweep.py against brute-force counts.
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "code" / "cleaning"))
+
+from step_h3_points import classify_speeds  # noqa: E402
+from threshold_sweep import DOWN_TIERS, UP_TIERS, sweep_categories, threshold_sweep, tier_counts  # noqa: E402
+
+
+def random_speeds(rng, n):
+    """Speeds on and between the tiers, with some zeros and NaNs."""
+    down = rng.choice(np.concatenate([DOWN_TIERS, [0, 7.5, 30, 940]]), n).astype(float)
+    up = rng.choice(np.concatenate([UP_TIERS, [0, 2, 15, 35]]), n).astype(float)
+    down[rng.random(n) < 0.03] = np.nan
+    up[rng.random(n) < 0.03] = np.nan
+    return down, up
+
+
+# ------------ TIER COUNTS ------------
+@pytest.mark.parametrize("seed", range(5))
+def test_tier_counts_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n, n_counties = 3_000, 7
+    codes = rng.integers(0, n_counties, n)
+    down, up = random_speeds(rng, n)
+    weights = rng.random(n)
+    down_tiers = np.sort(np.asarray(DOWN_TIERS, dtype=float))
+    up_tiers = np.sort(np.asarray(UP_TIERS, dtype=float))
+
+    meets = tier_counts(codes, n_counties, down, up, weights, down_tiers, up_tiers)
+
+    expected = np.zeros_like(meets)
+    for c in range(n_counties):
+        for i, d in enumerate(down_tiers):
+            for j, u in enumerate(up_tiers):
+                expected[c, i, j] = weights[(codes == c) & (down >= d) & (up >= u)].sum()
+    assert np.allclose(meets, expected)
+
+
+# ------------ CATEGORIES ------------
+def test_sweep_categories_match_classify_speeds():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    down, up = random_speeds(rng, n)
+    hex_df = pd.DataFrame({
+        "h3_res8_id": [f"h{k}" for k in range(n)],
+        "county_fips": rng.choice(["21067", "21111", "47037"], n),
+        "max_down": down,
+        "max_up": up,
+    })
+
+    cats = sweep_categories(threshold_sweep(hex_df)).set_index("county_fips")
+
+    hex_df["service_category"] = np.asarray(classify_speeds(down, up), dtype=object)
+    # sweep counts NaN speeds as meeting no tier, i.e. Unserved
+    hex_df.loc[hex_df["service_category"] == "Unknown", "service_category"] = "Unserved"
+    expected = pd.crosstab(hex_df["county_fips"], hex_df["service_category"])
+    for category in ["Unserved", "Underserved", "Served"]:
+        assert np.array_equal(cats[f"hexes_{category.lower()}"].to_numpy(),
+                              expected.loc[cats.index, category].to_numpy())
+
+
+def test_sweep_categories_pair_not_in_grid():
+    hex_df = pd.DataFrame({"h3_res8_id": ["h0"], "county_fips": ["21067"], "max_down": [50.0], "max_up": [5.0]})
+    with pytest.raises(ValueError):
+        sweep_categories(threshold_sweep(hex_df), unserved_below=(30, 3))
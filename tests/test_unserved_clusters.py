@@ -0,0 +1,89 @@
+"""
+Checks of the cluster building blocks in code/cleaning/step_unserved_clusters.py
+against straightforward references.
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "code" / "cleaning"))
+
+from h3_compat import grid_disk  # noqa: E402
+from step_unserved_clusters import hex_adjacency, union_find  # noqa: E402
+
+LEXINGTON = "88266dad03fffff"  # res-8 cell in Fayette County, KY
+
+
+def brute_force_pairs(h3_ids) -> set:
+    """Every pair of neighboring cells as sorted (row, row) positions."""
+    position = {h: k for k, h in enumerate(h3_ids)}
+    pairs = set()
+    for k, h in enumerate(h3_ids):
+        for n in grid_disk(h, 1):
+            m = position.get(n)
+            if m is not None and m != k:
+                pairs.add((min(k, m), max(k, m)))
+    return pairs
+
+
+def adjacency_pairs(h3_ids) -> set:
+    u, v = hex_adjacency(h3_ids)
+    pairs = {(min(a, b), max(a, b)) for a, b in zip(u.tolist(), v.tolist())}
+    assert len(pairs) == len(u), "an edge was listed twice"
+    return pairs
+
+
+# ------------ UNION-FIND ------------
+@pytest.mark.parametrize("seed", range(5))
+def test_union_find_matches_connected_components(seed):
+    rng = np.random.default_rng(seed)
+    n = 2_000
+    m = int(rng.integers(200, 2_500))  # from mostly isolated nodes to one big component
+    u = rng.integers(0, n, m)
+    v = rng.integers(0, n, m)
+
+    root = union_find(n, u, v)
+
+    graph = sparse.coo_matrix((np.ones(m), (u, v)), shape=(n, n))
+    count, labels = connected_components(graph, directed=False)
+    # same partition: one root per scipy label and vice versa
+    assert len(np.unique(root)) == count
+    assert len({(r, lab) for r, lab in zip(root.tolist(), labels.tolist())}) == count
+    # each root is the smallest member of its component
+    smallest = np.full(count, n)
+    np.minimum.at(smallest, labels, np.arange(n))
+    assert np.array_equal(root, smallest[labels])
+
+
+def test_union_find_without_edges():
+    empty = np.empty(0, dtype=np.int64)
+    assert np.array_equal(union_find(4, empty, empty), np.arange(4))
+
+
+# ------------ ADJACENCY ------------
+def test_hex_adjacency_matches_grid_disk():
+    rng = np.random.default_rng(0)
+    patch = sorted(grid_disk(LEXINGTON, 12))
+    # a patchy subset, so there are holes and separate islands
+    cells = [h for h in patch if rng.random() < 0.6]
+    rng.shuffle(cells)
+    assert adjacency_pairs(cells) == brute_force_pairs(cells)
+
+
+def test_hex_adjacency_far_apart_cells():
+    # Kentucky plus a patch on the other side of the globe: no shared IJ grid,
+    # so hex_adjacency falls back to grid_disk lookups
+    far = "88cd969215fffff"  # Indian Ocean
+    cells = sorted(grid_disk(LEXINGTON, 2)) + sorted(grid_disk(far, 1))
+    assert adjacency_pairs(cells) == brute_force_pairs(cells)
+
+
+def test_hex_adjacency_empty():
+    u, v = hex_adjacency([])
+    assert len(u) == 0 and len(v) == 0